@@ -1,11 +1,13 @@
 import json
 
-from .exceptions import UnexpectedResponseException, ACME_ProblemException
-from .base import ACME_Object, ClassVar, AcmeObject, _object_register
+from collections.abc import AsyncIterator, Iterable
+
+from .exceptions import UnexpectedResponseException, ACME_ProblemException, AccountDoesNotExistException, UnauthorizedException
+from .base import ACME_Object, ClassVar, AcmeObject, slotted
 from .descriptors import AcmeDescriptor, Status, StatusDescriptor
-from dataclasses import dataclass, field
-from .order import ACME_Orders
-from ..request.session import Session
+from dataclasses import dataclass, field, fields
+from .order import ACME_Order, ACME_Orders
+from ..request.session import Session, BatchResult
 from ..request import JwsBase, JwsKid, JwsJwk, JwsRolloverRequest
 from jwcrypto.jwk import JWK
 import sys
@@ -17,6 +19,7 @@ class AccountStatus(Status):
     ACCOUNT_REVOKED = "revoked"
 
 
+@slotted
 @dataclass(order=False, kw_only=True)
 class ACME_Account(ACME_Object):
     key: JWK
@@ -24,7 +27,8 @@ class ACME_Account(ACME_Object):
     status: AccountStatus = field(default=StatusDescriptor(AccountStatus))
     contact: list[str] | None
     orders: ACME_Orders | ACME_Orders.url_class = field(default=AcmeDescriptor(ACME_Orders))
-    parent: None = field(default=None, init=False)
+    parent: None = field(default_factory=lambda: None, init=False)
+    from_cache: bool = field(default=False, repr=False)
 
     hold_keys: ClassVar[set[str]] = ACME_Object.hold_keys | {"key"}
 
@@ -39,17 +43,40 @@ class ACME_Account(ACME_Object):
         request_builder = JwsKid(kid=self.url, key=self.key, payload=payload, nonce=nonce, url=url)
         return await self.session.post(url, payload=request_builder.build())
 
-    async def fetch_orders(self):
-        if type(self.orders) == str:
-            url = self.orders
-            data, status = await self.request(url, None)
-            if status == 200:
-                self.orders = ACME_Orders(url=url, parent=self, **data)
-            else:
-                raise UnexpectedResponseException(status, data )
-        elif type(self.orders) == ACME_Orders:
-            await self.orders.update()
-        await self.orders.update_orders()
+    async def fetch_orders(self, from_server: bool = True, concurrency: int = 8) -> ACME_Orders:
+        """
+        Collect the orders of the account in `orders`, and request all of them, which are not yet contained as object.
+        If the session has a `StateStore`, the stored orders are added first, and orders with a final state are loaded from the store
+        instead of requesting them.
+
+        :param from_server: Page through the orders list on the server, to find orders which aren't stored.
+            Without a store, the orders list is always requested.
+        :ptype from_server: bool
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :return: The orders of the account.
+        :rtype: ACME_Orders
+        """
+        orders = self.order_list()
+        store = self.session.store
+        if store is not None:
+            for url in await store.urls(ACME_Order, account=self.url):
+                orders.add(url)
+        if from_server or store is None:
+            async for url in orders.iter_order_urls():
+                orders.add(url)
+        await orders.request_all_elements(concurrency=concurrency)
+        return orders
+
+    def order_list(self) -> ACME_Orders:
+        """
+        The container of the account's orders, created empty, while `orders` is only known by its URL.
+
+        :rtype: ACME_Orders
+        """
+        if not isinstance(self.orders, ACME_Orders):
+            self.orders = ACME_Orders(url=str(self.orders), parent=self, orders=[])
+        return self.orders
 
     @property
     def account(self):
@@ -69,17 +96,41 @@ class ACME_Account(ACME_Object):
             resp, status, location = await session.post(req)
             data = resp.copy()
             data.update({"key": key, "url": location})
-            if location in _object_register:
-                o = _object_register[location]
+            o = session.objects.get(location)
+            if o is not None:
                 await o.update_fields(data)
             else:
-                o = ACME_Account(session=session, **data)
+                o = session.objects.add(ACME_Account(session=session, **data))
+            o._store_in_cache(resp)
             return o
         except AssertionError:
             raise UnexpectedResponseException(status, resp).convert_exception()
 
     @classmethod
-    async def get_from_key(cls, session: Session, key: JWK):
+    async def get_from_key(cls, session: Session, key: JWK, use_cache: bool = True):
+        """
+        Get the existing account of a key.
+        If the session has a `WarmStartCache` containing the key, the account is constructed from the cached URL and data without a request.
+        The cached URL is only verified by the first request sent by the account, see `post`.
+
+        :param session: Session connected to the server of the account.
+        :ptype session: Session
+        :param key: Private key of the account.
+        :ptype key: JWK
+        :param use_cache: Look the account up in the session's cache, if it has one.
+        :ptype use_cache: bool
+        :rtype: ACME_Account
+        """
+        if use_cache and session.cache is not None:
+            cached = session.cache.get_account(session.directory_url, key)
+            if cached is not None:
+                url, resp = cached
+                o = session.objects.get(url)
+                if o is not None:
+                    return o
+                class_fields = {f.name for f in fields(cls) if f.init}
+                data = {"contact": None} | {k: v for (k, v) in resp.items() if k in class_fields} | {"key": key, "url": url, "from_cache": True}
+                return session.objects.add(ACME_Account(session=session, **data))
         payload = {"onlyReturnExisting": True}
         url = session.directory.newAccount
         req = JwsJwk(payload=payload, key=key, url=url)
@@ -88,18 +139,80 @@ class ACME_Account(ACME_Object):
             assert status == 200
             data = resp.copy()
             data.update({"key": key, "url": location})
-            if location in _object_register:
-                o = _object_register[location]
+            o = session.objects.get(location)
+            if o is not None:
                 await o.update_fields(data)
             else:
-                o = ACME_Account(session=session, **data)
+                o = session.objects.add(ACME_Account(session=session, **data))
+            o._store_in_cache(resp)
             return o
         except AssertionError:
             raise UnexpectedResponseException(status, response=resp).convert_exception()
 
+    def _store_in_cache(self, data: dict):
+        self.from_cache = False
+        if self.session.cache is not None:
+            self.session.cache.store_account(self.session.directory_url, self.key, self.url, data)
+
     async def post(self, url: str, payload: dict | bytes | None, empty_response: bool = False) -> tuple[dict, int, str]:
-        req = JwsKid(url=url, kid=self.url, key=self.key, payload=payload)
-        return await self.session.post(req, empty_response=empty_response)
+        return await self.send(JwsKid(url=url, kid=self.url, key=self.key, payload=payload), empty_response=empty_response)
+
+    async def send(self, request: JwsKid, empty_response: bool = False) -> tuple[dict, int, str]:
+        """
+        Send a request signed by this account.
+        If the account has been constructed from the warm-start cache and the server doesn't know its URL,
+        the cache entry is dropped, the account is looked up again and the request is resent once.
+        Once a request has succeeded, the cached URL counts as verified.
+
+        :param request: Request with this account's URL as `kid`.
+        :ptype request: JwsKid
+        :param empty_response: Don't parse the body of the response.
+        :ptype empty_response: bool
+        :return: Parsed response, status code and Location header of the response.
+        :rtype: tuple[dict, int, str]
+        """
+        try:
+            response = await self.session.post(request, empty_response=empty_response)
+            self.from_cache = False
+            return response
+        except (AccountDoesNotExistException, UnauthorizedException):
+            if not self.from_cache:
+                raise
+        self.session.cache.forget_account(self.session.directory_url, self.key)
+        old_url = self.url
+        fresh = await ACME_Account.get_from_key(self.session, self.key, use_cache=False)
+        if fresh is not self:
+            self.url = fresh.url
+            await self.update_fields({f.name: getattr(fresh, f.name) for f in fields(fresh) if f.init})
+        if request.url == old_url:
+            request.url = self.url
+        request.kid = self.url
+        request.reset_build()
+        return await self.session.post(request, empty_response=empty_response)
+
+    async def post_many(self, jobs: Iterable[tuple[str, dict | bytes | None]], concurrency: int = 16, empty_response: bool = False) -> list[BatchResult]:
+        """
+        Send many requests signed by this account, with bounded concurrency. See `Session.post_many`.
+
+        :param jobs: Pairs of URL and payload. A payload of `None` sends a POST-as-GET request.
+        :ptype jobs: Iterable[tuple[str, dict | bytes | None]]
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :return: One result per job, in the order of `jobs`. Failed jobs carry their exception instead of a response.
+        :rtype: list[BatchResult]
+        """
+        requests = [JwsKid(url=url, kid=self.url, key=self.key, payload=payload) for (url, payload) in jobs]
+        return await self.session.post_many(requests, concurrency=concurrency, empty_response=empty_response)
+
+    def paginate(self, url: str) -> AsyncIterator[dict]:
+        """
+        POST-as-GET a paginated resource, and iterate over its pages as they arrive.
+
+        :param url: URL of the first page.
+        :ptype url: str
+        :rtype: AsyncIterator[dict]
+        """
+        return self.session.paginate(JwsKid(url=url, kid=self.url, key=self.key))
 
     async def update_account(self, **updated_payload):
         try:
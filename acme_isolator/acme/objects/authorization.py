@@ -1,8 +1,9 @@
-from .base import ACME_Object, ElementList
+from .base import ACME_Object, ElementList, slotted
 from .descriptors import Status, StatusDescriptor, IdentifierDescriptor, ListDescriptor
 from .challenge import ACME_Challenge, ACME_Challenges
 from .identifier import ACME_Identifier
 from dataclasses import dataclass, field
+from typing import ClassVar
 
 
 class AuthorizationStatus(Status):
@@ -14,6 +15,7 @@ class AuthorizationStatus(Status):
     AUTHORIZATION_REVOKED = "revoked"
 
 
+@slotted
 @dataclass(order=False, kw_only=True)
 class ACME_Authorization(ACME_Object):
     identifier: ACME_Identifier = field(default=IdentifierDescriptor())
@@ -22,9 +24,12 @@ class ACME_Authorization(ACME_Object):
     challenges: ACME_Challenges = field(default=ListDescriptor(ACME_Challenges))
     wildcard: bool | None
 
+    interned_keys: ClassVar[frozenset[str]] = frozenset({"expires"})
+
     async def deactivate(self):
         resp, code, location = await self.account.post(url=self.url, payload={"status": str(AuthorizationStatus.AUTHORIZATION_DEACTIVATED)})
         await self.update_fields(resp)
+        self._persist(resp)
 
     #TODO translate challanges from json to objects
 
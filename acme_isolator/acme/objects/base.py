@@ -1,16 +1,22 @@
+import sys
 from abc import ABC
-from collections.abc import MutableSet
-from dataclasses import dataclass, fields, field, InitVar
-from typing import Self, Union, TypeVar, ClassVar, Generic, get_args, Coroutine
-from asyncio import gather, Lock
+from collections.abc import MutableSet, AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass, fields, field, InitVar, MISSING
+from typing import Self, Union, TypeVar, ClassVar, Generic, get_args
+from functools import cache
+from asyncio import Lock, Semaphore, Task, CancelledError, create_task, gather, wait, FIRST_COMPLETED
+from time import monotonic
+from .exceptions import UnexpectedResponseException
 
 AcmeUrl = TypeVar("AcmeUrl", bound="AcmeUrlBase")
 AcmeObject = TypeVar("AcmeObject", bound="ACME_Object")
 AcmeElement = TypeVar("AcmeElement", bound="ACME_Object")
 ACME_Account = TypeVar("ACME_Account", bound="ACME_Object")
+ChangeSet = dict[str, tuple]  # Names of changed fields, mapped to their old and new value (for lists, tuples of the elements before and after the merge)
 
 
 class AcmeUrlBase(str, ABC):
+    __slots__ = ()
     outer_class: ClassVar[type(AcmeObject)]
 
     @property
@@ -21,8 +27,62 @@ class AcmeUrlBase(str, ABC):
         return await self.outer_class.get_from_url(parent_object=parent, url=str(self))
 
 
-_object_register: dict[str, AcmeObject] = dict()
+def _replace_class_cell(value, old_cls: type, new_cls: type):
+    """
+    Point the `__class__` cell of a function from the class body (used by `super()`) to the recreated class.
+    """
+    if isinstance(value, (classmethod, staticmethod)):
+        value = value.__func__
+    elif isinstance(value, property):
+        for function in (value.fget, value.fset, value.fdel):
+            _replace_class_cell(function, old_cls, new_cls)
+        return
+    closure = getattr(value, "__closure__", None)
+    if closure is None:
+        return
+    for name, cell in zip(value.__code__.co_freevars, closure):
+        if name == "__class__" and cell.cell_contents is old_cls:
+            cell.cell_contents = new_cls
+
+
+def slotted(cls: type) -> type:
+    """
+    Class decorator, which recreates a dataclass with `__slots__` instead of a `__dict__` per instance. Has to be applied on top of `@dataclass`.
 
+    Unlike `dataclass(slots=True)`, fields implemented by a data descriptor (e.g. `StatusDescriptor`) keep their descriptor,
+    which stores the value in the slot named by its `storage` attribute. Plain fields get a slot of their own name.
+    Fields excluded from `__init__` need a `default_factory`, since a plain default would only be a class attribute.
+    A `__weakref__` slot is added, unless a base class already provides one, so objects can be referenced by an `ObjectRegistry`.
+    The instances only lose their `__dict__`, if all base classes are slotted as well.
+    """
+    inherited = {name for base in cls.__mro__[1:] for name in getattr(base, "__slots__", ())}
+    own_fields = cls.__dict__.get("__annotations__", {}).keys()
+    cls_dict = dict(cls.__dict__)
+    slots = list()
+    for f in fields(cls):
+        if f.name not in own_fields:
+            continue
+        attribute = cls_dict.get(f.name, None)
+        storage = getattr(attribute, "storage", None) if hasattr(type(attribute), "__set__") else None
+        if storage is None:
+            if not f.init and f.default is not MISSING:
+                raise TypeError(f"Field {f.name} of {cls.__name__} needs a default_factory instead of a default, since __init__ doesn't assign it.")
+            cls_dict.pop(f.name, None)  # The default is kept by __init__, the class attribute would hide the slot
+        name = f.name if storage is None else storage
+        if name not in inherited and name not in slots:
+            slots.append(name)
+    if not any(base.__weakrefoffset__ for base in cls.__bases__):
+        slots.append("__weakref__")
+    cls_dict["__slots__"] = tuple(slots)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    for value in cls_dict.values():
+        _replace_class_cell(value, cls, new_cls)
+    return new_cls
+
+
+@slotted
 @dataclass(order=False, kw_only=True)
 class ACME_Object(ABC):
     """
@@ -39,19 +99,28 @@ class ACME_Object(ABC):
     :vartype account: ACME_Account
     :cvar request_return_code: By default expected return code when  fetching the current state of the object from the server. Defaults to 200.
     :vartype request_return_code: int
+    :cvar interned_keys: Fields with string values, which repeat across many objects and are therefore interned.
+    :vartype interned_keys: frozenset[str]
     """
     url: str
     parent: Union["ACME_Object", None]
 
-    _lock: Lock = field(init=False, default_factory=Lock)
+    _fetched: float = field(init=False, default_factory=float, repr=False, compare=False)  # time.monotonic() of the last fetch from the server
     url_class: ClassVar[type(AcmeUrl)]
     request_return_code: ClassVar[int] = 200
 
     hold_keys: ClassVar[set] = {"parent", "url"}  # Set of keys, not to be updated by generic update method
+    interned_keys: ClassVar[frozenset[str]] = frozenset()
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__()
-        cls.url_class = type(f"{cls.__name__}Url", (AcmeUrlBase,), dict(outer_class=cls))
+        cls.url_class = type(f"{cls.__name__}Url", (AcmeUrlBase,), dict(outer_class=cls, __slots__=()))
+
+    def __post_init__(self):
+        for key in self.interned_keys:
+            value = getattr(self, key)
+            if type(value) is str:
+                setattr(self, key, sys.intern(value))
 
     @property
     def account(self) -> ACME_Account:
@@ -65,6 +134,8 @@ class ACME_Object(ABC):
     async def get_from_url(cls, parent_object: AcmeObject, url: str, **additional_fields) -> Self:
         """
         Factory method, to construct a new instance from URL, by sending a request to the server and parsing the response.
+        Concurrent calls for the same URL within a session share a single request, see `ObjectRegistry.fetch`.
+        If the session has a `StateStore`, resources with a final or recent enough state are loaded from the store instead, see `StateStore.load`.
 
         :param parent_object: Parent of the requested object.
         :ptype parent_object: AcmeObject
@@ -72,38 +143,246 @@ class ACME_Object(ABC):
         :param additional_fields:
         :rtype: ACME_Object
         """
+        url = str(url)
+        return await parent_object.account.session.objects.fetch(url, lambda: cls._request_from_url(parent_object, url))
+
+    @classmethod
+    async def _request_from_url(cls, parent_object: AcmeObject, url: str) -> Self:
+        store = parent_object.account.session.store
+        if store is not None:
+            o = await store.load(cls, parent_object, url)
+            if o is not None:
+                return o
         data, status, location = await parent_object.account.post(url=url, payload=None)
         assert status == cls.request_return_code
         data.update({"parent": parent_object, "url": url})
-        if url in _object_register:
-            o = _object_register[url]
+        registry = parent_object.account.session.objects
+        o = registry.get(url)
+        if o is not None:
             await o.update_fields(data)
         else:
-            o = cls(**data)
+            o = registry.add(cls._class_for(data)(**data))
+        o._fetched = monotonic()
+        o._persist(data)
         return o
 
+    @classmethod
+    def from_data(cls, data: dict, parent: AcmeObject | None) -> Self:
+        """
+        Construct an object from a resource embedded into the response of another resource (e.g. the challenges of an authorization),
+        ignoring entries which are not defined as part of the class.
 
+        :param data: Parsed resource, including its URL.
+        :ptype data: dict
+        :param parent: Parent of the object.
+        :ptype parent: AcmeObject | None
+        :rtype: ACME_Object
+        """
+        cls = cls._class_for(data)
+        init_fields = _init_fields(cls)
+        return cls(parent=parent, **{k: v for (k, v) in data.items() if k in init_fields and k != "parent"})
 
-    async def update_fields(self, data: dict):
+    @classmethod
+    def _class_for(cls, data: dict) -> type:
+        """
+        Class to construct for a parsed resource. Overridden by classes with a subclass per kind of resource (e.g. challenge types).
+        """
+        return cls
+
+    def apply_fields(self, data: dict) -> ChangeSet:
         """
         Update the object's fields with data from a dictionary, ommitting entries which are not defined as part of the class.
+        The update is applied at once, without giving control to the event loop, so concurrent updates can't interleave.
 
         :param data: Dictionary with keys having some intersection with the set of fields available to the object.
         :ptype data: dict
+        :return: Fields, whose value has actually changed, mapped to their old and new value.
+            Lists are merged in place, so they are mapped to tuples of their elements before and after the merge.
+        :rtype: ChangeSet
         """
-        if not self._lock.locked():
-            async with self._lock:
-                keys = {f.name for f in fields(self)} & set(data.keys()) - self.__class__.hold_keys
-                for key in keys:
-                    setattr(self, key, data[key])
-        else:
-            async with self._lock:
-                pass
+        return _field_updater(type(self))(self, data)
+
+    async def update_fields(self, data: dict) -> ChangeSet:
+        """
+        Update the object's fields with data from a dictionary, ommitting entries which are not defined as part of the class.
+        See `apply_fields`.
+
+        :param data: Dictionary with keys having some intersection with the set of fields available to the object.
+        :ptype data: dict
+        :return: Fields, whose value has actually changed, mapped to their old and new value.
+        :rtype: ChangeSet
+        """
+        return self.apply_fields(data)
+
+    async def get_update(self) -> Self:  # TODO maybe adding an recursive option probably has to be combined with lock
+        """
+        Fetch the current state of the resource from the server and apply it to the object.
 
-    async def get_update(self):  # TODO maybe adding an recursive option probably has to be combined with lock
+        :return: The object itself.
+        :rtype: ACME_Object
+        """
         data, status, location = await self.account.post(url=self.url, payload=None)
-        assert status == 200
-    #    ** kwargs       self.update_fields(data)
+        if status != self.request_return_code:
+            raise UnexpectedResponseException(status, response=data).convert_exception()
+        await self.update_fields(data)
+        self._fetched = monotonic()
+        self._persist(data)
+        return self
+
+    def _persist(self, data: dict):
+        """
+        Queue a response of the resource for the session's `StateStore`, if it has one.
+        """
+        store = self.account.session.store
+        if store is not None:
+            store.put(self, data, account=str(self.account.url))
+
+    async def prefetch(self, *paths: str, concurrency: int = 8) -> dict[str, Exception]:
+        """
+        Resolve referenced resources, which are only known by their URL, in a single concurrent pass.
+        Each path names a field holding a URL or an `ElementList`, and may continue with the fields of the referenced objects,
+        separated by dots (e.g. `"authorizations.challenges"`, which implies `"authorizations"`).
+        The references of an object are requested as soon as the object itself has arrived, instead of level by level.
+
+        :param paths: Fields to resolve.
+        :param concurrency: Maximal number of requests in flight, shared by all paths.
+        :ptype concurrency: int
+        :return: Exceptions of the failed requests, keyed by URL. Failed references stay URLs.
+        :rtype: dict[str, Exception]
+        """
+        failures = dict()
+        await _prefetch(self, _prefetch_tree(paths), Semaphore(concurrency), failures)
+        return failures
+
+    async def wait_for_status(self, *targets, timeout: float | None = None) -> Self:
+        """
+        Wait until the object's status is one of `targets` or has become final, polled by the session's `PollScheduler`.
+
+        :param targets: Statuses to wait for.
+        :param timeout: Seconds to wait at most.
+        :ptype timeout: float | None
+        :return: The object itself.
+        :rtype: ACME_Object
+        :raises TimeoutError: If the status hasn't been reached within `timeout`.
+        """
+        return await self.account.session.poller.wait_for(self, targets, timeout=timeout)
+
+
+@cache
+def _init_fields(cls: type) -> frozenset[str]:
+    return frozenset(f.name for f in fields(cls) if f.init)
+
+
+def _differs(old, new) -> bool:
+    if old is new:
+        return False
+    if type(old) is not type(new):
+        return True
+    return old != new
+
+
+@cache
+def _field_updater(cls: type):
+    """
+    Build the update function of a class once, with the updatable fields, the fields to intern
+    and the lists merged in place resolved upfront, instead of inspecting the dataclass fields on every update.
+    """
+    updatable = [f for f in fields(cls) if f.init and f.name not in cls.hold_keys]
+    keys = tuple(f.name for f in updatable)
+    interned = cls.interned_keys
+    merged = frozenset(f.name for f in updatable if hasattr(f.default, "listSubclass"))  # ElementList fields, see ListDescriptor
+    missing = object()
+
+    def update(o: ACME_Object, data: dict) -> ChangeSet:
+        changes = dict()
+        for key in keys:
+            value = data.get(key, missing)
+            if value is missing:
+                continue
+            if key in interned and type(value) is str:
+                value = sys.intern(value)
+            if key in merged:
+                old = getattr(o, key)
+                size = len(old)
+                setattr(o, key, value)
+                if len(old) != size:
+                    elements = tuple(old)  # Merging only appends, so the elements before are a prefix
+                    changes[key] = (elements[:size], elements)
+            else:
+                old = getattr(o, key, None)
+                setattr(o, key, value)
+                new = getattr(o, key)
+                if _differs(old, new):
+                    changes[key] = (old, new)
+        return changes
+
+    return update
+
+
+def _prefetch_tree(paths: Iterable[str]) -> dict[str, dict]:
+    tree = dict()
+    for path in paths:
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, dict())
+    return tree
+
+
+async def _prefetch(o: ACME_Object, tree: dict[str, dict], semaphore: Semaphore, failures: dict[str, Exception]):
+    """
+    Resolve the fields of `tree` of an object, and continue with the subtree of each resolved object as soon as it has arrived.
+    The semaphore only bounds the requests, not the recursion, so nested paths can't starve each other.
+    """
+    async def resolve(reference, request, store, subtree):
+        if isinstance(reference, AcmeUrlBase):
+            try:
+                async with semaphore:
+                    reference = await request(reference)
+            except Exception as e:
+                failures[str(reference)] = e
+                return
+            store(reference)
+        if len(subtree) > 0:
+            await _prefetch(reference, subtree, semaphore, failures)
+
+    jobs = list()
+    for name, subtree in tree.items():
+        value = getattr(o, name)
+        if isinstance(value, ElementList):
+            jobs += [resolve(element, value.request_element, value.add, subtree) for element in value]
+        elif isinstance(value, (ACME_Object, AcmeUrlBase)):
+            jobs.append(resolve(value, lambda url: url.request_object(o), lambda resolved, name=name: setattr(o, name, resolved), subtree))
+        elif value is not None:
+            raise ValueError(f"Field {name} of {type(o).__name__} doesn't reference other resources.")
+    await gather(*jobs)
+
+
+async def _bounded_as_completed(function: Callable[[AcmeElement], Awaitable], items: Iterable, concurrency: int) -> AsyncIterator[tuple[Task, AcmeElement]]:
+    """
+    Run `function` for each item with at most `concurrency` calls running at the same time, and yield each finished task together with its item,
+    in the order the calls complete. Calls are only started as earlier ones finish, and the remaining calls are cancelled, if the iteration stops early.
+    """
+    items = iter(items)
+    pending: dict[Task, AcmeElement] = dict()
+
+    def fill():
+        while len(pending) < concurrency:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            pending[create_task(function(item))] = item
+
+    fill()
+    try:
+        while pending:
+            done, _ = await wait(pending.keys(), return_when=FIRST_COMPLETED)
+            for task in done:
+                yield task, pending.pop(task)
+            fill()
+    finally:
+        for task in pending.keys():
+            task.cancel()
 
 
 class ElementList(Generic[AcmeElement], MutableSet, ABC):
@@ -113,16 +392,19 @@ class ElementList(Generic[AcmeElement], MutableSet, ABC):
     Trying to add a resource that is already contained in the set can "upgrade" the element by replacing it, if the new object is an instance of `ACME_Object`, while the already contained element is an `AcmeUrl`.
     This class also provides methods to iterate though all elements, fetch their updated data from the server and update the elements accordingly.
 
+    The elements are stored in a dictionary indexed by their URLs, so membership tests, adding, upgrading and removing elements take constant time.
+    Iteration follows the order, in which the resources have been added. Upgrading an element keeps its position.
+
     :ivar parent: Object, which has to contain this "list" of resources, according to RFC 8555.
     :vartype parent: ACME_Object
     :cvar content_type: Subclass of `ACME_Object`, that represents the resource, which is contained by this class. Set while subclassing `ElementList`
     :vartype content_type: Class
     """
     items: list[AcmeElement | AcmeUrl | str] | None
-    _list: list[AcmeElement | AcmeUrl]
+    _elements: dict[str, AcmeElement | AcmeUrl]
     parent: AcmeObject
 
-    list_lock: Lock = field(init=False, default_factory=Lock)
+    _list_lock: Lock | None
     content_type: ClassVar[type(AcmeObject)]
 
     def __init_subclass__(cls, **kwargs):
@@ -131,41 +413,58 @@ class ElementList(Generic[AcmeElement], MutableSet, ABC):
 
     def __init__(self, items: list, parent: AcmeObject):
         self.parent = parent
-        self._list = list()
+        self._elements = dict()
+        self._list_lock = None
         for element in items:
             self.add(element)
 
-    def __find_element(self, value) -> int | None:
+    @property
+    def list_lock(self) -> Lock:
+        """
+        Lock serializing passes over all elements, created on first use.
         """
-        Check, if a object representation of a resource is already in the list, not matter if it is derived from `ACME_Object` or from `AcmeUrl`, by comparing the URLs of the objects.
+        if self._list_lock is None:
+            self._list_lock = Lock()
+        return self._list_lock
 
-        :param value: The object of the resource to find in the list.
-        :ptype value: `content_type` | `content_type.url_class` | `str`
-        :return: Index of the object, found inside of the list, or `None` if it isn't found in the list.
-        :rtype: int | None
+    @property
+    def _list(self) -> list[AcmeElement | AcmeUrl]:
         """
-        if type(value) in [str, self.content_type, self.content_type.url_class]:
-            if type(value) is self.content_type:
-                url = value.url
-            else:
-                url = value
-            for i in range(len(self._list)):
-                e = self._list[i]
-                if e.url == url:
-                    return i
-        else:
-            raise TypeError(f"Tried to look for type {type(value)} but only {self.content_type} and {self.content_type.url_class} are allowed.")
-        return None
+        Elements as list, in iteration order.
+        """
+        return list(self._elements.values())
+
+    def __key(self, value) -> str:
+        """
+        URL identifying the resource of an element, no matter if it is derived from `ACME_Object` or from `AcmeUrl`.
 
+        :param value: The object of the resource.
+        :ptype value: `content_type` | `content_type.url_class` | `str`
+        :rtype: str
+        """
+        if isinstance(value, self.content_type):
+            return str(value.url)
+        elif isinstance(value, str):
+            return str(value)
+        raise TypeError(f"Tried to look for type {type(value)} but only {self.content_type} and {self.content_type.url_class} are allowed.")
 
     def __contains__(self, item):
-        return self.__find_element(item) is not None
+        return self.__key(item) in self._elements
 
     def __iter__(self):
-        return self._list.__iter__()
+        return iter(self._elements.values())
 
     def __len__(self):
-        return self._list.__len__()
+        return len(self._elements)
+
+    def get(self, url: str) -> AcmeElement | AcmeUrl | None:
+        """
+        Get the element of a resource by its URL.
+
+        :return: The contained element, or `None` if the resource is not contained.
+        :rtype: `content_type` | `content_type.url_class` | None
+        """
+        return self._elements.get(str(url), None)
 
     def add(self, value):
         """
@@ -174,40 +473,37 @@ class ElementList(Generic[AcmeElement], MutableSet, ABC):
         If a resource is already contained represented by its `AcmeUrl` object, and the new object is the same resource,
         but represented as `ACME_Object`, the element in the list gets replaced, but not the other way round.
 
+        Embedded resources given as `dict` are converted to `content_type` objects, or update the object, if the resource is already contained as object.
+
         :param value: New element to add to the list.
-        :ptype value: `content_type` | `content_type.url_class`
+        :ptype value: `content_type` | `content_type.url_class` | `str` | `dict`
         """
-        if value not in self:
-            if type(value) is self.content_type or value in self and type(value) is self.content_type:
-                self._list.append(value)
-            elif type(value) is str:
-                self._list.append(self.content_type.url_class(value))
-            else:
-                raise ValueError(f"Class {self.__class__.__name__} does no accept objects of type {type(value)}")
-        elif type(value) is self.content_type:
-            i = self.__find_element(value)
-            if type(self._list[i]) is self.content_type.url_class:
-                del self._list[i]
-                self._list.append(value)
+        if isinstance(value, dict):
+            current = self._elements.get(value.get("url", None), None)
+            if isinstance(current, self.content_type):
+                current.apply_fields(value)
+                return
+            value = self.content_type.from_data(value, parent=self._get_parent())
+        if not isinstance(value, (self.content_type, str)):
+            raise ValueError(f"Class {self.__class__.__name__} does no accept objects of type {type(value)}")
+        key = self.__key(value)
+        current = self._elements.get(key, None)
+        if current is None:
+            self._elements[key] = value if isinstance(value, (self.content_type, self.content_type.url_class)) else self.content_type.url_class(value)
+        elif isinstance(value, self.content_type) and current is not value:
+            if isinstance(current, self.content_type.url_class):
+                self._elements[key] = value
             else:
                 raise NotImplementedError("Total replacement of complete ACME_Object not implemented")
-        elif type(value) is self.content_type.url_class | str:
-            pass
-        else:
-            raise ValueError(f"Class {self.__class__.__name__} does no accept objects of type {type(value)}")
 
     def remove(self, value):
-        e = self.__find_element(value)
-        if e is not None:
-            del self._list[e]
-        else:
-            raise KeyError(f"Key with url representation {value.url if type(value) is self.content_type else str(value)} does not exist.")
-
-    def discard(self, value):
         try:
-            self.remove(value)
+            del self._elements[self.__key(value)]
         except KeyError:
-            pass
+            raise KeyError(f"Key with url representation {self.__key(value)} does not exist.") from None
+
+    def discard(self, value):
+        self._elements.pop(self.__key(value), None)
 
     def _get_parent(self) -> AcmeObject:
         return self.parent
@@ -223,29 +519,76 @@ class ElementList(Generic[AcmeElement], MutableSet, ABC):
         """
         return await element.outer_class.get_from_url(parent_object=self._get_parent(), url=element)
 
-    async def request_all_elements(self):
+    async def iter_requested_elements(self, concurrency: int = 8, failures: dict[str, Exception] | None = None) -> AsyncIterator[AcmeElement]:
+        """
+        Request all resources, which are currently only contained as `content_type.url_class`,
+        replace them in the container with the corresponding `content_type` objects, and yield each object as soon as its request has completed.
+
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :param failures: Dictionary, into which the exception of each failed request is put, keyed by the URL of the element.
+            Failed elements stay in the container as URL.
+        :ptype failures: dict[str, Exception] | None
+        :rtype: AsyncIterator[`content_type`]
+        """
+        todo = [element for element in self._elements.values() if isinstance(element, AcmeUrlBase)]
+        async for task, element in _bounded_as_completed(self.request_element, todo, concurrency):
+            if task.cancelled() or task.exception() is not None:
+                if failures is not None:
+                    failures[str(element)] = CancelledError() if task.cancelled() else task.exception()
+                continue
+            o = task.result()
+            self._elements[str(element)] = o
+            yield o
+
+    async def iter_updated_elements(self, concurrency: int = 8, failures: dict[str, Exception] | None = None) -> AsyncIterator[AcmeElement]:
+        """
+        Request the current state of all resources, which are contained as `content_type` objects, apply it to the objects,
+        and yield each object as soon as its update has completed.
+
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :param failures: Dictionary, into which the exception of each failed request is put, keyed by the URL of the element.
+        :ptype failures: dict[str, Exception] | None
+        :rtype: AsyncIterator[`content_type`]
+        """
+        todo = [element for element in self._elements.values() if isinstance(element, ACME_Object)]
+        async for task, element in _bounded_as_completed(lambda e: e.get_update(), todo, concurrency):
+            if task.cancelled() or task.exception() is not None:
+                if failures is not None:
+                    failures[str(element.url)] = CancelledError() if task.cancelled() else task.exception()
+                continue
+            yield element
+
+    async def request_all_elements(self, concurrency: int = 8) -> dict[str, Exception]:
         """
         Request all resources, which are currently only contained as `content_type.url_class`,
         generate the corresponding `content_type` objects and replace them in the container.
+        A failing request doesn't stop the other requests.
+
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :return: Exceptions of the failed requests, keyed by the URL of the element.
+        :rtype: dict[str, Exception]
         """
-        with self.list_lock:
-            temp_list = list()
-            todo: list[Coroutine] = list()
-            for element in self._list:
-                if isinstance(element, ACME_Object):
-                    temp_list.append(element)
-                elif isinstance(element, AcmeUrlBase):
-                    todo.append(self.request_element(element))
-            new_elements = await gather(*todo)
-            self._list = temp_list + list(new_elements)
+        failures = dict()
+        async with self.list_lock:
+            async for _ in self.iter_requested_elements(concurrency, failures):
+                pass
+        return failures
 
-    async def update_all_elements(self):
+    async def update_all_elements(self, concurrency: int = 8) -> dict[str, Exception]:
         """
         Request all resources, which are contained as `content_type` objects and update them.
+        A failing request doesn't stop the other requests.
+
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :return: Exceptions of the failed requests, keyed by the URL of the element.
+        :rtype: dict[str, Exception]
         """
-        with self.list_lock:
-            tasks: list[Coroutine] = list()
-            for element in self._list:
-                if isinstance(element, ACME_Object):
-                    tasks.append(element.get_update())
-            await gather(*tasks)
+        failures = dict()
+        async with self.list_lock:
+            async for _ in self.iter_updated_elements(concurrency, failures):
+                pass
+        return failures
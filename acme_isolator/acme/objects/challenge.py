@@ -1,8 +1,11 @@
-from .base import ACME_Object, ClassVar, ElementList
+from .base import ACME_Object, AcmeObject, ClassVar, ElementList, slotted
 from .exceptions import ACME_ProblemException
 from .descriptors import Status, StatusDescriptor
+from ..request.jws import _b64, get_signer
 from abc import ABC
+from collections.abc import Iterable
 from dataclasses import dataclass, field
+from hashlib import sha256
 
 
 class ChallengeStatus(Status):
@@ -13,39 +16,123 @@ class ChallengeStatus(Status):
 
 
 class ErrorDescriptor:
+    storage = "_error"
+
     def __get__(self, instance, owner):
-        return instance.__dict__["error"]
+        return getattr(instance, self.storage)
 
     def __set__(self, instance, value):
+        if value is self:
+            value = None  # Not provided to __init__, since challenges only have an error after failing
+        if value is None or isinstance(value, ACME_ProblemException):
+            setattr(instance, self.storage, value)
+            return
         e = ACME_ProblemException.parse_problem(value)
         if e is None:
             e = value
-        instance.__dict__["error"] = e
+        setattr(instance, self.storage, e)
+
 
+_challenge_register: dict[str, type] = dict()
 
+
+@slotted
 @dataclass(kw_only=True)
 class ACME_Challenge(ACME_Object):
+    """
+    Challenge of an authorization. Challenges of a type with a registered subclass (e.g. `ACME_Challenge_dns_01`)
+    are constructed as that subclass.
+
+    :cvar challenge_type: Value of the `type` member, for which a subclass is constructed.
+    :vartype challenge_type: str
+    """
     type: str
     status: ChallengeStatus = field(default=StatusDescriptor(ChallengeStatus))
-    validated: None | str
+    token: str | None = None
+    validated: None | str = None
     error: ACME_ProblemException | dict = field(default=ErrorDescriptor())
-    # For now this is just a stub
-    #TODO add concrete implementation for dns challenge
 
-    def keyAuthorization(self) -> str:
-        #TODO implement rfc7638
-        pass
+    challenge_type: ClassVar[str | None] = None
+    interned_keys: ClassVar[frozenset[str]] = frozenset({"type", "validated"})
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.challenge_type is not None:
+            _challenge_register[cls.challenge_type] = cls
+
+    @classmethod
+    def _class_for(cls, data: dict) -> type:
+        return _challenge_register.get(data.get("type", None), cls)
+
+    @property
+    def authorization(self) -> AcmeObject:
+        return self.parent
+
+    def keyAuthorization(self, thumbprint: str | None = None) -> str:
+        """
+        Key authorization of the challenge (RFC 8555 section 8.1): the token and the thumbprint of the account key, joined by a dot.
+
+        :param thumbprint: RFC 7638 thumbprint of the account key. Defaults to the cached thumbprint of the account's key.
+        :ptype thumbprint: str | None
+        :rtype: str
+        """
+        if self.token is None:
+            raise ValueError(f"Challenge {self.url} of type {self.type} has no token.")
+        if thumbprint is None:
+            thumbprint = get_signer(self.account.key).thumbprint
+        return f"{self.token}.{thumbprint}"
 
 
-@dataclass
 class ACME_Challenges(ElementList[ACME_Challenge]):
     pass
 
 
+@slotted
+@dataclass(kw_only=True)
 class ACME_Challenge_dns_01(ACME_Challenge):
-    token: str
-    type: str = "dns-01"
-    type: ClassVar[str] = "dns-01"
+    challenge_type: ClassVar[str] = "dns-01"
+
+    @property
+    def record_name(self) -> str:
+        """
+        Name of the TXT record to provision, `_acme-challenge.` followed by the identifier of the authorization (RFC 8555 section 8.4).
+        For wildcard authorizations the identifier already lacks the `*.` label.
+        """
+        return f"_acme-challenge.{self.authorization.identifier.value}"
+
+    def txt_value(self, thumbprint: str | None = None) -> str:
+        """
+        Value of the TXT record: the base64url encoded SHA-256 digest of the key authorization.
+
+        :param thumbprint: RFC 7638 thumbprint of the account key. Defaults to the cached thumbprint of the account's key.
+        :ptype thumbprint: str | None
+        :rtype: str
+        """
+        return _b64(sha256(self.keyAuthorization(thumbprint).encode("ascii")).digest()).decode("ascii")
+
 
+def dns_01_records(challenges: Iterable[ACME_Challenge_dns_01], thumbprint: str | None = None) -> dict[str, list[str]]:
+    """
+    Compute the TXT records of many dns-01 challenges at once.
+    The thumbprint is looked up once per account, instead of once per challenge.
 
-type: str = "dns-01"
+    :param challenges: Challenges to compute the records for.
+    :ptype challenges: Iterable[ACME_Challenge_dns_01]
+    :param thumbprint: RFC 7638 thumbprint of the account key of all challenges. Defaults to the thumbprint of each challenge's account.
+    :ptype thumbprint: str | None
+    :return: Values of the TXT records, keyed by record name. A name has several values, if several challenges share it
+        (e.g. for `example.com` and `*.example.com`).
+    :rtype: dict[str, list[str]]
+    """
+    records = dict()
+    thumbprints = dict()
+    for challenge in challenges:
+        if thumbprint is None:
+            account = challenge.account
+            key_thumbprint = thumbprints.get(id(account), None)
+            if key_thumbprint is None:
+                key_thumbprint = thumbprints[id(account)] = get_signer(account.key).thumbprint
+        else:
+            key_thumbprint = thumbprint
+        records.setdefault(challenge.record_name, list()).append(challenge.txt_value(key_thumbprint))
+    return records
@@ -13,27 +13,29 @@ class AcmeDescriptor:
 
     def __set_name__(self, owner, name):
         self.name = name
+        self.storage = f"_{name}"
 
     def __get__(self, instance, insttype = None):
-        return instance.__dict__[self.name]
+        return getattr(instance, self.storage)
 
     def __set__(self, instance, value):
         if value is self:
             raise ValueError(f"Field {self.name} has not been provided to __init__ of {self.type}.")
-        if isinstance(instance.__dict__.get(self.name, None), self.type):
+        current = getattr(instance, self.storage, None)
+        if isinstance(current, self.type):
             if isinstance(value, str):
-                if not instance.__dict__[self.name].url == str(value):
-                    raise NotImplementedError(f"URL from object has changed from {instance.__dict__[self.name].url} to {value}.")  # TODO maybe handle change of acme object after update from server
+                if not current.url == str(value):
+                    raise NotImplementedError(f"URL from object has changed from {current.url} to {value}.")  # TODO maybe handle change of acme object after update from server
             elif type(value) is self.type:
-                if not instance.__dict__[self.name].url == value.url:
-                    raise NotImplementedError(f"URL from object has changed from {instance.__dict__[self.name].url} to {value.url}.")  # TODO maybe handle change of acme object after update from server
+                if not current.url == value.url:
+                    raise NotImplementedError(f"URL from object has changed from {current.url} to {value.url}.")  # TODO maybe handle change of acme object after update from server
             else:
                 raise ValueError(f"Field can only take vales of the types str | {self.type.__name__} | {self.type.url_class.__name__}")
         else:
             if type(value) is str:
-                instance.__dict__[self.name] = self.type.url_class(value)
+                setattr(instance, self.storage, self.type.url_class(value))
             elif type(value) is self.type.url_class or type(value) is self.type:
-                instance.__dict__[self.name] = value
+                setattr(instance, self.storage, value)
             else:
                 raise ValueError(f"Field can only take vales of the types str | {self.type.__name__} | {self.type.url_class.__name__} and not of type {type(value).__name__}.")
 
@@ -46,22 +48,26 @@ class ListDescriptor:
             raise ValueError("Type has to be a subclass of ElementList")
 
     def __get__(self, instance, owner):
-        if self.name in instance.__dict__.keys():
-            l = instance.__dict__[self.name]
-        else:
+        l = getattr(instance, self.storage, None)
+        if l is None:
             l = self.listSubclass([], parent=instance)
-            instance.__dict__[self.name] = l
+            setattr(instance, self.storage, l)
         return l
 
     def __set__(self, instance, value):
-        if self.name not in instance.__dict__.keys() or getattr(instance, self.name) is None:
+        existing = getattr(instance, self.storage, None)
+        if existing is None:
             if isinstance(value, self.listSubclass):
-                instance.__dict__[self.name] = value
+                setattr(instance, self.storage, value)
             elif type(value) is list:
-                print(self.listSubclass, type(value), type(instance))
-                instance.__dict__[self.name] = self.listSubclass(value, instance)
+                setattr(instance, self.storage, self.listSubclass(value, instance))
+        elif isinstance(value, (list, self.listSubclass)):
+            # Lists of an existing object are only updated from the server, so merge the new elements into the existing list
+            for element in value:
+                existing.add(element)
         else:
-            raise NotImplementedError  # TODO has this to be implemented or should it be an error?
+            raise ValueError(f"Field {self.name} can only take values of the types list | {self.listSubclass.__name__}.")
 
     def __set_name__(self, owner, name):
         self.name = name
+        self.storage = f"_{name}"
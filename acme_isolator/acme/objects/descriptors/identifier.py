@@ -5,17 +5,18 @@ class IdentifierDescriptor:
 
     def __set__(self, instance, value):
         if isinstance(value, ACME_Identifier):
-            instance.__dict__[self.name] = value
+            setattr(instance, self.storage, value)
         else:
-            instance.__dict__[self.name] = ACME_Identifier.parse(value)
+            setattr(instance, self.storage, ACME_Identifier.parse(value))
         # else:
         #     raise ValueError(f"Type {type(value).__name__} not supported for field {self.name}.")
 
     def __get__(self, instance, owner):
-        return instance.__dict__[self.name]
+        return getattr(instance, self.storage)
 
     def __set_name__(self, owner, name):
         self.name = name
+        self.storage = f"_{name}"
 
 
 class IdentifierListDescriptor:
@@ -29,12 +30,13 @@ class IdentifierListDescriptor:
                     l.append(ACME_Identifier.parse(e))
                 else:
                     raise ValueError
-            instance.__dict__[self.name] = l
+            setattr(instance, self.storage, l)
         else:
             raise ValueError
 
     def __get__(self, instance, owner):
-        return instance.__dict__[self.name]
+        return getattr(instance, self.storage)
 
     def __set_name__(self, owner, name):
         self.name = name
+        self.storage = f"_{name}"
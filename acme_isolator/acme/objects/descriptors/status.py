@@ -4,15 +4,20 @@ from enum import Enum as Status
 class StatusDescriptor:
     def __init__(self, enumType: type, name = "status"):
         self.type = enumType
-        self.name = "status"
+        self.name = name
+        self.storage = f"_{name}"
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.storage = f"_{name}"
 
     def __set__(self, instance, value):
         if type(value) is str:
-            instance.__dict__[self.name] = self.type(value)
+            setattr(instance, self.storage, self.type(value))
         elif type(value) is self.type:
-            instance.__dict__[self.name] = value
+            setattr(instance, self.storage, value)
         else:
             raise ValueError(f"Type {type(value).__name__} not supported for field {self.name}.")
 
     def __get__(self, instance, owner):
-        return instance.__dict__[self.name]
+        return getattr(instance, self.storage)
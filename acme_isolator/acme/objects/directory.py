@@ -1,8 +1,9 @@
 from .base import ACME_Object
 from .exceptions import ACME_ProblemException, UnexpectedResponseException, ACME_Exception
 from dataclasses import dataclass, InitVar, fields, field
-from aiohttp import request
+from aiohttp import request, ClientSession
 from ..request.constants import USER_AGENT
+from ..request.codec import JsonCodec, get_codec
 
 
 @dataclass(order=False, kw_only=True)
@@ -29,20 +30,40 @@ class ACME_Directory(ACME_Object):
         return iter({k: v for (k, v) in self.__dict__.items() if k in {"newNonce", "newAccount", "newOrder", "newAuthz", "revokeCert", "keyChange"} and v is not None}.items())
 
     @classmethod
-    async def get_directory(cls, url: str):
+    async def get_directory(cls, url: str, session: ClientSession | None = None, codec: JsonCodec | None = None):
         """
         Factory for fetching a directory resource and creating an `ACME_Directory` from it.
         This subclass of `ACME_Object` has it's own implementation of a factory, since it doesn't have to be related to an account.
         :param url: URL of the directory resource to fetch
         :ptype url: str
+        :param session: Session to send the request with, so its pooled connection can be reused afterwards. Without it, a one-shot request is sent.
+        :ptype session: ClientSession | None
+        :param codec: JSON codec to decode the response with. Defaults to the fastest installed codec.
+        :ptype codec: JsonCodec | None
         :return: Object created from the server's response.
         :rtype: ACME_Directory
         """
-        async with request("GET", url, headers={"User-Agent": USER_AGENT}) as resp:
-            j = await resp.json(encoding="utf-8")
+        if session is None:
+            context = request("GET", url, headers={"User-Agent": USER_AGENT})
+        else:
+            context = session.get(url)
+        async with context as resp:
+            j = (get_codec() if codec is None else codec).decode(await resp.read())
             if not resp.status == 200:
-                raise UnexpectedResponseException(resp.status, response=await resp.json(encoding="utf-8"), msg="Error while getting directory data").convert_exception()
-            class_fields = {f.name for f in fields(cls)}
-            return cls(url=url, **{k: v for k, v in j.items() if k in class_fields or k == "meta"})
+                raise UnexpectedResponseException(resp.status, response=j, msg="Error while getting directory data").convert_exception()
+            return cls.from_dict(url, j)
+
+    @classmethod
+    def from_dict(cls, url: str, data: dict):
+        """
+        Create an `ACME_Directory` from the parsed directory resource, ignoring unknown entries.
+        :param url: URL of the directory resource
+        :ptype url: str
+        :param data: Parsed directory resource
+        :ptype data: dict
+        :rtype: ACME_Directory
+        """
+        class_fields = {f.name for f in fields(cls)}
+        return cls(url=url, **{k: v for k, v in data.items() if k in class_fields or k == "meta"})
 
 
@@ -13,6 +13,7 @@ class ACME_ProblemException(ACME_Exception):
     detail: str
     identifier = None
     subproblems: list | None = None
+    retry_after: float | None = None  # Seconds to wait before retrying, taken from the Retry-After header of the response
 
     def __init__(self, data: dict):
         if self.__class__ == ACME_ProblemException:
@@ -190,3 +191,14 @@ class UnexpectedResponseException(ACME_Exception):
             if e is not None:
                 return ACME_ProblemException.parse_problem(self.response)
         return self
+
+
+class OrderFailedException(ACME_Exception):
+    """
+    Raised when an order has become invalid instead of ready. The problem document of the order, if any, is the cause.
+    """
+    def __init__(self, order):
+        self.order = order
+        super().__init__(f"Order {order.url} has status {order.status}.")
+        if isinstance(order.error, dict) and "detail" in order.error:
+            self.__cause__ = ACME_ProblemException.parse_problem(order.error) or ACME_ProblemException(order.error)
@@ -5,7 +5,7 @@ from cryptography.x509 import DNSName
 _identifier_register = dict()
 
 
-@dataclass(order=False, kw_only=True)
+@dataclass(order=False, kw_only=True, slots=True)
 class ACME_Identifier:
 
     type: ClassVar[str]
@@ -31,6 +31,7 @@ class ACME_Identifier:
 
 
 class ACME_Identifier_DNS(ACME_Identifier):
+    __slots__ = ()
     type: ClassVar[str] = "dns"
     type: str = "dns"
 
@@ -1,11 +1,13 @@
-from .base import ACME_Object, ElementList, _object_register
+from .base import ACME_Object, ElementList, slotted
 from .descriptors import ListDescriptor, Status, StatusDescriptor, IdentifierListDescriptor
 from .exceptions import UnexpectedResponseException
 from .identifier import ACME_Identifier
 from .authorization import ACME_Authorization, ACME_Authorizations
 from cryptography.x509 import CertificateSigningRequest, DNSName, SubjectAlternativeName
 from dataclasses import dataclass, field, InitVar
+from typing import ClassVar
 from asyncio import gather, create_task
+from collections.abc import AsyncIterator, Iterable
 
 
 class OrderStatus(Status):
@@ -16,6 +18,7 @@ class OrderStatus(Status):
     ORDER_INVALID = "invalid"
 
 
+@slotted
 @dataclass(order=False, kw_only=True)
 class ACME_Order(ACME_Object):
     status: OrderStatus = field(default=StatusDescriptor(OrderStatus))
@@ -28,6 +31,8 @@ class ACME_Order(ACME_Object):
     finalize: str
     certificate: str | None = None
 
+    interned_keys: ClassVar[frozenset[str]] = frozenset({"expires", "notBefore", "notAfter"})
+
     async def finalization_request(self, csr: CertificateSigningRequest):  # TODO Implement methid for finalizing the order, after class for CSR is defined
         raise NotImplementedError
 
@@ -54,16 +59,52 @@ class ACME_Orders(OrderSet, ACME_Object):
         OrderSet.__init__(self, items=orders, parent=kwargs["parent"])
         ACME_Object.__init__(self, *args, **kwargs)
 
-    async def create_order(self, identifiers: list[ACME_Identifier], notBefore: str | None = None, notAfter: str | None = None):
+    async def iter_pages(self) -> AsyncIterator[list[ACME_Order.url_class]]:
+        """
+        Iterate over the pages of the orders list on the server, requesting each page only when it is needed.
+        The pages are not added to this container, so memory usage is bounded by a single page.
+
+        :return: Asynchronous iterator over the order URLs of each page.
+        :rtype: AsyncIterator[list[ACME_Order.url_class]]
+        """
+        async for page in self.account.paginate(self.url):
+            yield [ACME_Order.url_class(url) for url in page.get("orders", [])]
+
+    async def iter_order_urls(self) -> AsyncIterator[ACME_Order.url_class]:
+        """
+        Iterate over the URLs of all orders on the server, page by page. Breaking out of the loop stops requesting further pages.
+
+        :rtype: AsyncIterator[ACME_Order.url_class]
+        """
+        async for page in self.iter_pages():
+            for url in page:
+                yield url
+
+    async def create_order(self, identifiers: list[ACME_Identifier], notBefore: str | None = None, notAfter: str | None = None,
+                           prefetch: Iterable[str] = (), concurrency: int = 8) -> ACME_Order:
+        """
+        Create a new order on the server.
+
+        :param identifiers: Identifiers, the certificate is requested for.
+        :ptype identifiers: list[ACME_Identifier]
+        :param prefetch: Paths of referenced resources to resolve right after the order has been created,
+            e.g. `("authorizations", "authorizations.challenges")`, see `ACME_Object.prefetch`.
+            References, which fail to resolve, stay URLs.
+        :ptype prefetch: Iterable[str]
+        :param concurrency: Maximal number of prefetch requests in flight.
+        :ptype concurrency: int
+        :rtype: ACME_Order
+        """
         payload = {"notBefore": notBefore, "notAfter": notAfter}
         payload["identifiers"] = [id.as_dict() for id in identifiers]
         try:
             resp, status, location = await self.account.post(self.account.session.directory.newOrder, payload=payload)
             assert status == 201
             resp.update({"url": location})
-            order = ACME_Order(parent=self, **resp)
+            order = self.account.session.objects.add(ACME_Order(parent=self, **resp))
             self.add(order)
-            _object_register[location] = order
-            return order
+            order._persist(resp)
         except AssertionError:
             raise UnexpectedResponseException(status, response=resp).convert_exception()
+        await order.prefetch(*prefetch, concurrency=concurrency)
+        return order
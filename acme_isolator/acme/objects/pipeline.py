@@ -0,0 +1,335 @@
+from asyncio import Queue, Task, create_task, gather
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any
+from .account import ACME_Account
+from .authorization import ACME_Authorization, AuthorizationStatus
+from .challenge import ACME_Challenge_dns_01, dns_01_records
+from .exceptions import OrderFailedException
+from .identifier import ACME_Identifier
+from .order import ACME_Order, OrderStatus
+from ..request.jws import get_signer
+from ...dns_api import ChangeSet, DnsProvider, PropagationChecker
+
+
+@dataclass(eq=False, kw_only=True)
+class IssuanceJob:
+    """
+    A single order flowing through an `IssuancePipeline`.
+
+    :ivar index: Position of the job in the input of the pipeline.
+    :ivar identifiers: Identifiers of the order.
+    :ivar order: The order, once it has been created.
+    :ivar challenges: The dns-01 challenges answered for the pending authorizations of the order.
+    :ivar records: TXT records deployed for `challenges`, keyed by record name. They are removed when the job leaves the pipeline.
+    :ivar result: Return value of the finalizer.
+    :ivar error: Exception, which made the job leave the pipeline early.
+    :ivar failed_stage: Name of the stage, which raised `error`.
+    :ivar started: Time (`time.monotonic()`) the job entered the pipeline.
+    :ivar finished: Time (`time.monotonic()`) the job left the pipeline.
+    """
+    index: int
+    identifiers: list[ACME_Identifier]
+    order: ACME_Order | None = None
+    challenges: list[ACME_Challenge_dns_01] = field(default_factory=list)
+    records: dict[str, list[str]] = field(default_factory=dict)
+    result: Any = None
+    error: Exception | None = None
+    failed_stage: str | None = None
+    started: float = field(default_factory=monotonic)
+    finished: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class StageStatistics:
+    """
+    Counters of one stage of an `IssuancePipeline`.
+
+    :ivar workers: Number of jobs the stage processes at the same time.
+    :ivar completed: Number of jobs, which passed the stage.
+    :ivar failed: Number of jobs, which failed in the stage.
+    :ivar active: Number of jobs currently processed.
+    :ivar queued: Number of jobs currently waiting for the stage.
+    :ivar max_queued: Largest number of jobs, which have been waiting for the stage at the same time.
+    :ivar busy: Seconds spent processing jobs, summed over all workers.
+    :ivar first_started: Time (`time.monotonic()`) the stage started processing its first job.
+    :ivar last_finished: Time (`time.monotonic()`) the stage finished processing its last job.
+    """
+    workers: int
+    completed: int = 0
+    failed: int = 0
+    active: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    busy: float = 0.0
+    first_started: float | None = None
+    last_finished: float | None = None
+
+    @property
+    def throughput(self) -> float:
+        """
+        Jobs passed per second, from the first job the stage started until its last finished job, or until now while jobs are active.
+        """
+        if self.first_started is None:
+            return 0.0
+        end = monotonic() if self.active > 0 or self.last_finished is None else self.last_finished
+        return self.completed / max(end - self.first_started, 1e-9)
+
+
+@dataclass(eq=False)
+class _Stage:
+    name: str
+    function: Callable[[list[IssuanceJob]], Awaitable]
+    workers: int
+    batch: int
+    queue: Queue
+    stats: StageStatistics
+
+
+DEFAULT_CONCURRENCY: dict[str, int] = {"order": 8, "deploy": 2, "propagate": 32, "respond": 8, "validate": 128, "finalize": 8}
+
+
+class IssuancePipeline:
+    """
+    Issues many orders of an account concurrently, as a chain of stages connected by bounded queues:
+
+    * `order`: create the order and resolve its authorizations,
+    * `deploy`: publish the TXT records of the dns-01 challenges of its pending authorizations through `provider`,
+    * `propagate`: wait until the records are served by all authoritative nameservers (only with a `checker`),
+    * `respond`: tell the server the challenges are ready to be validated,
+    * `validate`: wait until the order is ready, polled by the session's `PollScheduler`,
+    * `finalize`: hand the ready order to `finalizer` (only with a `finalizer`).
+
+    Each stage runs its own number of workers, so slow stages (e.g. waiting for validation) don't hold back fast ones,
+    and each job moves on as soon as it has passed a stage, so orders progress in an overlapping fashion instead of in batches.
+    When a stage falls behind, its queue fills up and the stages before it wait, so no more orders are created than can be processed.
+    The `deploy` stage takes up to `deploy_batch` waiting jobs at once, and publishes all their records as a single change set.
+    A failing job leaves the pipeline with its error, without affecting other jobs.
+    Deployed records are handed to `DnsProvider.defer_cleanup`, when their job leaves the pipeline.
+
+    :ivar account: Account, the orders are created for.
+    :ivar provider: DNS backend publishing the records.
+    :ivar checker: Propagation checker run before the challenges are answered, if any.
+    :ivar finalizer: Coroutine function called with each ready order, e.g. to submit a CSR and download the certificate.
+        Its return value is stored in `IssuanceJob.result`.
+    :ivar queue_size: Maximal number of jobs waiting in front of each stage.
+    :ivar propagation_timeout: Seconds to wait for the records of an order to propagate.
+    :ivar validation_timeout: Seconds to wait for an order to become ready.
+    :ivar stats: Counters of each stage, keyed by the name of the stage. They accumulate over all runs of the pipeline.
+    """
+    account: ACME_Account
+    provider: DnsProvider
+    checker: PropagationChecker | None
+    finalizer: Callable[[ACME_Order], Awaitable] | None
+    queue_size: int
+    propagation_timeout: float | None
+    validation_timeout: float | None
+    stats: dict[str, StageStatistics]
+
+    def __init__(self, account: ACME_Account, provider: DnsProvider, checker: PropagationChecker | None = None,
+                 finalizer: Callable[[ACME_Order], Awaitable] | None = None, concurrency: dict[str, int] | None = None,
+                 queue_size: int = 16, deploy_batch: int = 32, propagation_timeout: float | None = 300.0, validation_timeout: float | None = 300.0):
+        """
+        :param concurrency: Number of workers of stages, keyed by the name of the stage. Missing stages use `DEFAULT_CONCURRENCY`.
+        :ptype concurrency: dict[str, int] | None
+        :param deploy_batch: Maximal number of jobs, whose records are published together.
+        :ptype deploy_batch: int
+        """
+        self.account = account
+        self.provider = provider
+        self.checker = checker
+        self.finalizer = finalizer
+        self.queue_size = queue_size
+        self.propagation_timeout = propagation_timeout
+        self.validation_timeout = validation_timeout
+        concurrency = DEFAULT_CONCURRENCY | (concurrency or dict())
+        stages = [("order", self._create_order, 1), ("deploy", self._deploy, deploy_batch)]
+        if checker is not None:
+            stages.append(("propagate", self._propagate, 1))
+        stages += [("respond", self._respond, 1), ("validate", self._validate, 1)]
+        if finalizer is not None:
+            stages.append(("finalize", self._finalize, 1))
+        self._stages = [_Stage(name=name, function=function, workers=concurrency[name], batch=batch, queue=Queue(queue_size),
+                               stats=StageStatistics(workers=concurrency[name])) for (name, function, batch) in stages]
+        self.stats = {stage.name: stage.stats for stage in self._stages}
+        self._results: Queue = Queue()
+        self._jobs: dict[int, IssuanceJob] = dict()
+        self._count = 0
+        self._running = False
+
+    async def _create_order(self, jobs: list[IssuanceJob]):
+        for job in jobs:
+            job.order = await self.account.order_list().create_order(job.identifiers, prefetch=("authorizations",))
+            if not all(isinstance(authorization, ACME_Authorization) for authorization in job.order.authorizations):
+                failures = await job.order.prefetch("authorizations")  # Retry the authorizations, which failed to resolve
+                if len(failures) > 0:
+                    raise next(iter(failures.values()))
+
+    async def _deploy(self, jobs: list[IssuanceJob]):
+        thumbprint = get_signer(self.account.key).thumbprint
+        changes = ChangeSet()
+        for job in jobs:
+            challenges = list()
+            try:
+                for authorization in job.order.authorizations:
+                    if authorization.status != AuthorizationStatus.AUTHORIZATION_PENDING:
+                        continue
+                    for challenge in authorization.challenges:
+                        if isinstance(challenge, ACME_Challenge_dns_01):
+                            challenges.append(challenge)
+                            break
+                    else:
+                        raise ValueError(f"Authorization {authorization.url} offers no dns-01 challenge.")
+                records = dns_01_records(challenges, thumbprint)
+            except Exception as e:
+                job.error = e
+                continue
+            job.challenges = challenges
+            job.records = records  # Set before applying, so records of partially applied changes are removed as well
+            changes.update(ChangeSet.from_records(records))
+        if changes:
+            await self.provider.apply(changes)
+
+    async def _propagate(self, jobs: list[IssuanceJob]):
+        for job in jobs:
+            if len(job.records) > 0:
+                await self.checker.wait(job.records, timeout=self.propagation_timeout)
+
+    async def _respond(self, jobs: list[IssuanceJob]):
+        for job in jobs:
+            if len(job.challenges) == 0:
+                continue
+            results = await self.account.post_many([(str(challenge.url), {}) for challenge in job.challenges])
+            for challenge, result in zip(job.challenges, results):
+                if not result.ok:
+                    raise result.error
+                await challenge.update_fields(result.data)
+                challenge._persist(result.data)
+
+    async def _validate(self, jobs: list[IssuanceJob]):
+        for job in jobs:
+            order = await job.order.wait_for_status(OrderStatus.ORDER_READY, timeout=self.validation_timeout)
+            if order.status == OrderStatus.ORDER_INVALID:
+                raise OrderFailedException(order)
+
+    async def _finalize(self, jobs: list[IssuanceJob]):
+        for job in jobs:
+            job.result = await self.finalizer(job.order)
+
+    def _enqueue(self, stage: _Stage, job: IssuanceJob) -> Awaitable:
+        stage.stats.queued += 1
+        stage.stats.max_queued = max(stage.stats.max_queued, stage.stats.queued)
+        return stage.queue.put(job)
+
+    def _leave(self, job: IssuanceJob):
+        del self._jobs[job.index]
+        if len(job.records) > 0:
+            self.provider.defer_cleanup(job.records)
+        job.finished = monotonic()
+        self._results.put_nowait(job)
+
+    async def _work(self, position: int):
+        stage = self._stages[position]
+        stats = stage.stats
+        following = self._stages[position + 1] if position + 1 < len(self._stages) else None
+        while True:
+            jobs = [await stage.queue.get()]
+            while len(jobs) < stage.batch and not stage.queue.empty():
+                jobs.append(stage.queue.get_nowait())
+            stats.queued -= len(jobs)
+            stats.active += len(jobs)
+            start = monotonic()
+            if stats.first_started is None:
+                stats.first_started = start
+            try:
+                await stage.function(jobs)
+            except Exception as e:
+                for job in jobs:
+                    if job.error is None:
+                        job.error = e
+            finally:
+                stats.active -= len(jobs)
+                stats.last_finished = monotonic()
+                stats.busy += stats.last_finished - start
+            for job in jobs:
+                if job.error is not None and job.failed_stage is None:
+                    job.failed_stage = stage.name
+                    stats.failed += 1
+                    self._leave(job)
+                    continue
+                stats.completed += 1
+                if following is None:
+                    self._leave(job)
+                else:
+                    await self._enqueue(following, job)
+
+    async def iter_issue(self, orders: Iterable[Iterable[ACME_Identifier]]) -> AsyncIterator[IssuanceJob]:
+        """
+        Run orders through the pipeline, and yield each job as soon as it has left the pipeline, successful or not.
+        Orders are taken from `orders` only as fast as the first stage accepts them, so `orders` may be a lazy iterable.
+        Closing the iterator (e.g. with `contextlib.aclosing`, when breaking out of the loop) cancels all jobs still in the pipeline.
+
+        :param orders: Identifiers of each order.
+        :ptype orders: Iterable[Iterable[ACME_Identifier]]
+        :return: Asynchronous iterator over the finished jobs, in the order they finish.
+        :rtype: AsyncIterator[IssuanceJob]
+        """
+        if self._running:
+            raise RuntimeError("The pipeline is already running.")
+        self._running = True
+        submitted = 0
+
+        async def feed():
+            nonlocal submitted
+            try:
+                for identifiers in orders:
+                    job = IssuanceJob(index=self._count, identifiers=list(identifiers))
+                    self._count += 1
+                    self._jobs[job.index] = job
+                    submitted += 1
+                    await self._enqueue(self._stages[0], job)
+            finally:
+                self._results.put_nowait(None)  # Wakes the consumer, once no more jobs are submitted
+
+        tasks: list[Task] = [create_task(self._work(position)) for (position, stage) in enumerate(self._stages) for _ in range(stage.workers)]
+        feeder = create_task(feed())
+        try:
+            received = 0
+            fed = False
+            while not fed or received < submitted:
+                job = await self._results.get()
+                if job is None:
+                    await feeder
+                    fed = True
+                    continue
+                received += 1
+                yield job
+        finally:
+            for task in tasks + [feeder]:
+                task.cancel()
+            await gather(*tasks, feeder, return_exceptions=True)
+            for job in list(self._jobs.values()):
+                self._leave(job)  # Removes the records of cancelled jobs
+            for stage in self._stages:
+                stage.queue = Queue(self.queue_size)
+                stage.stats.queued = 0
+                stage.stats.active = 0
+            self._results = Queue()
+            self._running = False
+
+    async def issue(self, orders: Iterable[Iterable[ACME_Identifier]]) -> list[IssuanceJob]:
+        """
+        Run orders through the pipeline, and wait until all of them have left it.
+
+        :param orders: Identifiers of each order.
+        :ptype orders: Iterable[Iterable[ACME_Identifier]]
+        :return: One job per order, in the order of `orders`.
+        :rtype: list[IssuanceJob]
+        """
+        jobs = [job async for job in self.iter_issue(orders)]
+        return sorted(jobs, key=lambda job: job.index)
@@ -0,0 +1,228 @@
+from asyncio import Event, Future, Semaphore, Task, CancelledError, TimeoutError, create_task, get_running_loop, gather, shield, sleep, wait_for
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from heapq import heappush, heappop
+from itertools import count
+from time import monotonic
+from .base import AcmeObject
+from .descriptors import Status
+from .order import OrderStatus
+from .authorization import AuthorizationStatus
+from .challenge import ChallengeStatus
+from ..request.jws import JwsKid
+
+FINAL_STATUSES: frozenset[Status] = frozenset({
+    OrderStatus.ORDER_VALID, OrderStatus.ORDER_INVALID,
+    AuthorizationStatus.AUTHORIZATION_VALID, AuthorizationStatus.AUTHORIZATION_INVALID, AuthorizationStatus.AUTHORIZATION_DEACTIVATED,
+    AuthorizationStatus.AUTHORIZATION_EXPIRED, AuthorizationStatus.AUTHORIZATION_REVOKED,
+    ChallengeStatus.CHALLENGE_VALID, ChallengeStatus.CHALLENGE_INVALID,
+})  # Statuses, which never change again
+
+
+@dataclass
+class PollStatistics:
+    """
+    Counters of a `PollScheduler`.
+
+    :ivar polls: Number of POST-as-GET requests sent.
+    :ivar changes: Number of polls, which returned a different status than before.
+    :ivar resolved: Number of waiters, whose object has reached one of their target statuses or a final status.
+    :ivar failed: Number of polls, which raised an exception.
+    """
+    polls: int = 0
+    changes: int = 0
+    resolved: int = 0
+    failed: int = 0
+
+
+@dataclass(eq=False)
+class _PollEntry:
+    o: AcmeObject
+    interval: float
+    waiters: list[tuple[frozenset[Status], Future]] = field(default_factory=list)
+
+
+class PollScheduler:
+    """
+    Polls the status of orders, authorizations and challenges for all waiting tasks of a session,
+    instead of each task running its own sleep loop.
+
+    Objects are kept in a heap ordered by the time of their next poll. Each object is polled by a single request,
+    no matter how many tasks are waiting for it. The delay before the next poll is taken from the Retry-After header of the response,
+    if the server sent one, otherwise it starts at `min_interval` and grows by `backoff` with every poll, which didn't change the status.
+    All polls of the scheduler together are limited to `max_rate` requests per second and `concurrency` requests in flight.
+    Polled objects are pinned in the session's object registry, until no task is waiting for them any more.
+
+    :ivar min_interval: Delay before the first poll of an object, and after each status change, in seconds.
+    :ivar max_interval: Upper bound for the delay between two polls of an object, in seconds. Also bounds Retry-After.
+    :ivar backoff: Factor applied to the delay after a poll, which didn't change the status.
+    :ivar max_rate: Maximal number of polls per second.
+    :ivar concurrency: Maximal number of polls in flight.
+    :ivar stats: Counters of polls and resolved waiters.
+    """
+    min_interval: float
+    max_interval: float
+    backoff: float
+    max_rate: float
+    concurrency: int
+    stats: PollStatistics
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 30.0, backoff: float = 1.5, max_rate: float = 20.0, concurrency: int = 8):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.stats = PollStatistics()
+        self._heap: list[tuple[float, int, _PollEntry]] = list()
+        self._entries: dict[str, _PollEntry] = dict()
+        self._sequence = count()
+        self._wakeup = Event()
+        self._loop: Task | None = None
+        self._tasks: set[Task] = set()
+        self._semaphore = Semaphore(concurrency)
+        self._last_poll = 0.0
+
+    def __len__(self) -> int:
+        """
+        Number of objects currently polled.
+        """
+        return len(self._entries)
+
+    async def wait_for(self, o: AcmeObject, targets: Iterable[Status], timeout: float | None = None) -> AcmeObject:
+        """
+        Wait until the status of an object is one of `targets`, or has become final (e.g. invalid), polling the object as necessary.
+        The caller has to check the status of the returned object, to distinguish both cases.
+
+        :param o: Order, authorization or challenge to poll.
+        :ptype o: AcmeObject
+        :param targets: Statuses to wait for.
+        :ptype targets: Iterable[Status]
+        :param timeout: Seconds to wait at most.
+        :ptype timeout: float | None
+        :return: The object, updated to its current state.
+        :rtype: AcmeObject
+        :raises TimeoutError: If the status hasn't been reached within `timeout`.
+        """
+        targets = frozenset(targets)
+        if self._done(o, targets):
+            return o
+        future = get_running_loop().create_future()
+        url = str(o.url)
+        entry = self._entries.get(url, None)
+        if entry is None:
+            entry = _PollEntry(o=o, interval=self.min_interval)
+            self._entries[url] = entry
+            o.account.session.objects.pin(o)
+            self._schedule(entry, self.min_interval)
+        entry.waiters.append((targets, future))
+        if self._loop is None:
+            self._loop = create_task(self._run())
+        try:
+            return await wait_for(shield(future), timeout)
+        except (TimeoutError, CancelledError):
+            self._remove_waiter(entry, future)
+            raise
+
+    async def close(self):
+        """
+        Stop polling and cancel all waiting tasks.
+        """
+        tasks = list(self._tasks)
+        if self._loop is not None:
+            tasks.append(self._loop)
+            self._loop = None
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+        for entry in list(self._entries.values()):
+            for targets, future in entry.waiters:
+                if not future.done():
+                    future.cancel()
+            self._drop(entry)
+        self._heap.clear()
+
+    @staticmethod
+    def _done(o: AcmeObject, targets: frozenset[Status]) -> bool:
+        return o.status in targets or o.status in FINAL_STATUSES
+
+    def _schedule(self, entry: _PollEntry, delay: float):
+        heappush(self._heap, (monotonic() + delay, next(self._sequence), entry))
+        self._wakeup.set()
+
+    def _drop(self, entry: _PollEntry):
+        if self._entries.get(str(entry.o.url), None) is entry:
+            del self._entries[str(entry.o.url)]
+            entry.o.account.session.objects.unpin(entry.o)
+
+    def _remove_waiter(self, entry: _PollEntry, future: Future):
+        entry.waiters = [(targets, f) for (targets, f) in entry.waiters if f is not future]
+        if len(entry.waiters) == 0:
+            self._drop(entry)
+
+    async def _run(self):
+        while True:
+            if len(self._heap) == 0:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due, _, entry = self._heap[0]
+            now = monotonic()
+            if due > now:
+                self._wakeup.clear()
+                try:
+                    await wait_for(self._wakeup.wait(), due - now)
+                except TimeoutError:
+                    pass
+                continue
+            heappop(self._heap)
+            if self._entries.get(str(entry.o.url), None) is not entry:
+                continue  # Nobody is waiting any more
+            await sleep(max(self._last_poll + 1 / self.max_rate - monotonic(), 0))
+            self._last_poll = monotonic()
+            await self._semaphore.acquire()
+            task = create_task(self._poll(entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _poll(self, entry: _PollEntry):
+        try:
+            o = entry.o
+            account = o.account
+            request = JwsKid(url=str(o.url), kid=account.url, key=account.key)
+            self.stats.polls += 1
+            try:
+                data, status, location = await account.send(request)
+                changes = await o.update_fields(data)
+                o._fetched = monotonic()
+                if changes:
+                    o._persist(data)
+            except Exception as e:
+                self.stats.failed += 1
+                for targets, future in entry.waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                self._drop(entry)
+                return
+            if "status" in changes:
+                self.stats.changes += 1
+                entry.interval = self.min_interval
+            else:
+                entry.interval = min(entry.interval * self.backoff, self.max_interval)
+            waiting = list()
+            for targets, future in entry.waiters:
+                if future.done():
+                    continue
+                if self._done(o, targets):
+                    self.stats.resolved += 1
+                    future.set_result(o)
+                else:
+                    waiting.append((targets, future))
+            entry.waiters = waiting
+            if len(waiting) == 0:
+                self._drop(entry)
+            else:
+                delay = entry.interval if request.retry_after is None else min(request.retry_after, self.max_interval)
+                self._schedule(entry, delay)
+        finally:
+            self._semaphore.release()
@@ -0,0 +1,173 @@
+from asyncio import Task, create_task, shield
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import monotonic
+from weakref import WeakValueDictionary
+from .base import AcmeObject
+
+
+@dataclass
+class RegistrySize:
+    """
+    Snapshot of the number of objects held by an `ObjectRegistry`.
+
+    :ivar objects: Number of objects, which are still alive and can be looked up.
+    :ivar recent: Number of objects kept alive by the registry, because they have been used recently.
+    :ivar pinned: Number of objects kept alive by the registry, because they are pinned.
+    :ivar in_flight: Number of resources, which are currently being fetched.
+    """
+    objects: int
+    recent: int
+    pinned: int
+    in_flight: int
+
+
+class ObjectRegistry:
+    """
+    Identity map of the `ACME_Object` instances of a single session, so each resource on the server is represented by one object.
+
+    Objects are only referenced weakly, so the registry doesn't keep objects alive, which aren't used anywhere else.
+    To avoid refetching objects, which are dropped and looked up again shortly after, the `max_recent` most recently used objects
+    are additionally referenced strongly. Objects, which have to stay in the registry no matter what (e.g. while they are polled),
+    can be pinned.
+
+    Fetching resources through `fetch` is single-flight: while a resource is requested, further fetches of the same URL wait for that request
+    and share its result, instead of sending their own. Optionally, objects fetched less than `freshness` seconds ago are returned without a request.
+
+    :ivar max_recent: Number of recently used objects, which are kept alive by the registry.
+    :ivar freshness: Seconds after a fetch, during which `fetch` returns the registered object without a request. `0` always requests.
+    :ivar coalesced: Number of fetches, which have joined a request already in flight.
+    :ivar fresh_hits: Number of fetches, which have been answered from a fresh object.
+    """
+    max_recent: int
+    freshness: float
+    coalesced: int
+    fresh_hits: int
+
+    def __init__(self, max_recent: int = 1024, freshness: float = 0.0):
+        self.max_recent = max_recent
+        self.freshness = freshness
+        self.coalesced = 0
+        self.fresh_hits = 0
+        self._in_flight: dict[str, Task] = dict()
+        self._objects: WeakValueDictionary[str, AcmeObject] = WeakValueDictionary()
+        self._recent: OrderedDict[str, AcmeObject] = OrderedDict()
+        self._pinned: dict[str, tuple[AcmeObject, int]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __contains__(self, url: str) -> bool:
+        return str(url) in self._objects
+
+    @property
+    def size(self) -> RegistrySize:
+        return RegistrySize(objects=len(self._objects), recent=len(self._recent), pinned=len(self._pinned), in_flight=len(self._in_flight))
+
+    def _touch(self, url: str, o: AcmeObject):
+        self._recent[url] = o
+        self._recent.move_to_end(url)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    def get(self, url: str) -> AcmeObject | None:
+        """
+        Look up the object of a resource.
+
+        :param url: URL of the resource.
+        :ptype url: str
+        :return: The registered object, or `None`, if there is none or it has been garbage collected.
+        :rtype: AcmeObject | None
+        """
+        url = str(url)
+        o = self._objects.get(url, None)
+        if o is not None:
+            self._touch(url, o)
+        return o
+
+    def add(self, o: AcmeObject) -> AcmeObject:
+        """
+        Register an object under its URL, replacing a previously registered object of the same resource.
+
+        :return: The registered object.
+        :rtype: AcmeObject
+        """
+        url = str(o.url)
+        self._objects[url] = o
+        self._touch(url, o)
+        return o
+
+    async def fetch(self, url: str, request: Callable[[], Awaitable[AcmeObject]], freshness: float | None = None) -> AcmeObject:
+        """
+        Get the current state of a resource, merging concurrent fetches of the same URL into one request.
+        The request keeps running, if the task, which started it, is cancelled while others are still waiting for it.
+
+        :param url: URL of the resource.
+        :ptype url: str
+        :param request: Coroutine function sending the request, and returning the registered and updated object.
+        :ptype request: Callable[[], Awaitable[AcmeObject]]
+        :param freshness: Overrides the registry's `freshness` for this call.
+        :ptype freshness: float | None
+        :rtype: AcmeObject
+        """
+        url = str(url)
+        freshness = self.freshness if freshness is None else freshness
+        if freshness > 0:
+            o = self.get(url)
+            if o is not None and monotonic() - o._fetched < freshness:
+                self.fresh_hits += 1
+                return o
+        task = self._in_flight.get(url, None)
+        if task is None:
+            task = create_task(request())
+            self._in_flight[url] = task
+            task.add_done_callback(lambda t: self._in_flight.pop(url, None))
+        else:
+            self.coalesced += 1
+        return await shield(task)
+
+    def discard(self, url: str):
+        """
+        Remove the object of a resource from the registry, including its pins.
+        """
+        url = str(url)
+        self._objects.pop(url, None)
+        self._recent.pop(url, None)
+        self._pinned.pop(url, None)
+
+    def pin(self, o: AcmeObject):
+        """
+        Keep an object alive and registered, until it is unpinned as often as it has been pinned.
+        """
+        url = str(o.url)
+        self.add(o)
+        count = self._pinned.get(url, (o, 0))[1]
+        self._pinned[url] = (o, count + 1)
+
+    def unpin(self, o: AcmeObject):
+        url = str(o.url)
+        entry = self._pinned.get(url, None)
+        if entry is None:
+            return
+        if entry[1] <= 1:
+            del self._pinned[url]
+        else:
+            self._pinned[url] = (entry[0], entry[1] - 1)
+
+    @contextmanager
+    def pinned(self, o: AcmeObject):
+        """
+        Context manager pinning an object for the duration of the block.
+        """
+        self.pin(o)
+        try:
+            yield o
+        finally:
+            self.unpin(o)
+
+    def clear(self):
+        self._objects.clear()
+        self._recent.clear()
+        self._pinned.clear()
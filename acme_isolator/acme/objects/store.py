@@ -0,0 +1,240 @@
+import json
+import sqlite3
+from asyncio import Lock as AsyncLock, Task, create_task, sleep, to_thread
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from time import monotonic, time
+from .base import AcmeObject
+from .poll import FINAL_STATUSES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    account TEXT,
+    data TEXT NOT NULL,
+    final INTEGER NOT NULL,
+    fetched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS objects_account ON objects (account, kind);
+"""
+
+
+@dataclass
+class StoredState:
+    """
+    State of a resource, as persisted by a `StateStore`.
+
+    :ivar kind: Name of the `ACME_Object` subclass of the resource.
+    :ivar account: URL of the account, the resource belongs to.
+    :ivar data: Resource as last received from the server.
+    :ivar final: Whether the resource had a status, which never changes again.
+    :ivar fetched: Time (`time.time()`) the resource has been received.
+    """
+    kind: str
+    account: str | None
+    data: dict
+    final: bool
+    fetched: float
+
+    @property
+    def age(self) -> float:
+        return time() - self.fetched
+
+
+@dataclass
+class StoreStatistics:
+    """
+    Counters of a `StateStore`.
+
+    :ivar hits: Number of objects loaded from the store instead of requesting them.
+    :ivar misses: Number of lookups, which had to be answered by the server, because the resource wasn't stored, or was stale.
+    :ivar writes: Number of rows written.
+    :ivar flushes: Number of batches written.
+    """
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    flushes: int = 0
+
+
+class StateStore:
+    """
+    Optional SQLite database persisting the state of orders, authorizations and other resources across restarts.
+
+    Every response a `Session` with a store receives for a resource is queued with its time of arrival,
+    and written together with the other queued responses after `flush_interval` seconds, or once `batch_size` responses are queued.
+    Responses of the same resource arriving in between replace each other, so a polled resource is only written once per batch.
+    When a resource is requested through `ACME_Object.get_from_url`, it is loaded from the store instead,
+    if its status is final (e.g. a valid authorization), or it has been received less than `max_age` seconds ago.
+    Objects are only constructed on access, e.g. `ACME_Account.fetch_orders` adds the stored orders as URLs.
+
+    The database is accessed from a worker thread, so the event loop isn't blocked by disk access.
+
+    :ivar path: Location of the database file.
+    :ivar max_age: Seconds, during which a stored resource with a status, which can still change, is used without requesting it. `0` always requests.
+    :ivar flush_interval: Seconds a response is queued at most, before it is written.
+    :ivar batch_size: Number of queued responses, which are written at once without waiting for `flush_interval`.
+    :ivar stats: Counters of loads and writes.
+    """
+    path: Path
+    max_age: float
+    flush_interval: float
+    batch_size: int
+    stats: StoreStatistics
+
+    def __init__(self, path: str | Path, max_age: float = 0.0, flush_interval: float = 1.0, batch_size: int = 256):
+        self.path = Path(path)
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.stats = StoreStatistics()
+        self._connection: sqlite3.Connection | None = None
+        self._db_lock = Lock()
+        self._pending: dict[str, tuple] = dict()
+        self._writing: dict[str, tuple] = dict()  # Batch currently written, still visible to readers
+        self._flush_task: Task | None = None
+        self._flush_lock = AsyncLock()  # Batches have to be written in order, since a later batch may hold a newer state of the same resource
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def _execute(self, query: str, parameters: tuple = ()) -> list[tuple]:
+        with self._db_lock:
+            return self._connect().execute(query, parameters).fetchall()
+
+    def _write(self, rows: list[tuple]):
+        with self._db_lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany("INSERT INTO objects (url, kind, account, data, final, fetched) VALUES (?, ?, ?, ?, ?, ?) "
+                                       "ON CONFLICT (url) DO UPDATE SET kind = excluded.kind, account = excluded.account, data = excluded.data, "
+                                       "final = excluded.final, fetched = excluded.fetched", rows)
+
+    def put(self, o: AcmeObject, data: dict, account: str | None):
+        """
+        Queue the state of a resource for writing.
+
+        :param o: Object of the resource, after `data` has been applied to it.
+        :ptype o: AcmeObject
+        :param data: Resource as received from the server.
+        :ptype data: dict
+        :param account: URL of the account, the resource belongs to.
+        :ptype account: str | None
+        """
+        url = str(o.url)
+        data = {k: v for (k, v) in data.items() if k not in ("url", "parent")}
+        final = getattr(o, "status", None) in FINAL_STATUSES
+        self._pending[url] = (url, type(o).__name__, account, json.dumps(data, default=str), int(final), time())
+        if len(self._pending) >= self.batch_size:
+            self._start_flush(0)
+        elif self._flush_task is None:
+            self._start_flush(self.flush_interval)
+
+    def _start_flush(self, delay: float):
+        async def flush_later():
+            await sleep(delay)
+            self._flush_task = None
+            await self.flush()
+
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        self._flush_task = create_task(flush_later())
+
+    async def flush(self):
+        """
+        Write all queued responses in a single transaction. A scheduled flush is cancelled, since it has nothing left to write.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        async with self._flush_lock:
+            if len(self._pending) == 0:
+                return
+            self._writing, self._pending = self._pending, dict()
+            rows = list(self._writing.values())
+            try:
+                await to_thread(self._write, rows)
+            except BaseException:
+                for url, row in self._writing.items():
+                    self._pending.setdefault(url, row)  # Keep unwritten states, unless a newer one has been queued meanwhile
+                raise
+            finally:
+                self._writing = dict()
+            self.stats.writes += len(rows)
+            self.stats.flushes += 1
+
+    async def get(self, url: str) -> StoredState | None:
+        """
+        Get the latest state of a resource, including states, which haven't been written yet.
+
+        :rtype: StoredState | None
+        """
+        url = str(url)
+        row = self._pending.get(url, None) or self._writing.get(url, None)
+        if row is None:
+            rows = await to_thread(self._execute, "SELECT url, kind, account, data, final, fetched FROM objects WHERE url = ?", (url,))
+            if len(rows) == 0:
+                return None
+            row = rows[0]
+        return StoredState(kind=row[1], account=row[2], data=json.loads(row[3]), final=bool(row[4]), fetched=row[5])
+
+    async def urls(self, kind: type, account: str) -> list[str]:
+        """
+        URLs of all stored resources of a type, which belong to an account, in the order they have been stored first.
+
+        :param kind: `ACME_Object` subclass of the resources.
+        :ptype kind: type
+        :param account: URL of the account.
+        :ptype account: str
+        :rtype: list[str]
+        """
+        rows = await to_thread(self._execute, "SELECT url FROM objects WHERE kind = ? AND account = ? ORDER BY rowid", (kind.__name__, str(account)))
+        urls = dict.fromkeys(row[0] for row in rows)
+        for row in (*self._writing.values(), *self._pending.values()):
+            if row[1] == kind.__name__ and row[2] == str(account):
+                urls[row[0]] = None
+        return list(urls)
+
+    async def load(self, cls: type, parent: AcmeObject, url: str) -> AcmeObject | None:
+        """
+        Construct the object of a resource from the store, or update the registered object with the stored state,
+        if the stored state is final or younger than `max_age`.
+
+        :param cls: `ACME_Object` subclass of the resource.
+        :ptype cls: type
+        :param parent: Parent of the object.
+        :ptype parent: AcmeObject
+        :param url: URL of the resource.
+        :ptype url: str
+        :return: The registered object, or `None` if the resource has to be requested from the server.
+        :rtype: AcmeObject | None
+        """
+        state = await self.get(url)
+        if state is None or state.kind != cls.__name__ or not (state.final or state.age < self.max_age):
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        registry = parent.account.session.objects
+        o = registry.get(url)
+        if o is not None:
+            o.apply_fields(state.data)
+        else:
+            o = registry.add(cls.from_data(state.data | {"url": url}, parent=parent))
+        o._fetched = monotonic() - state.age
+        return o
+
+    async def close(self):
+        """
+        Write the queued responses and close the database.
+        """
+        await self.flush()
+        if self._connection is not None:
+            with self._db_lock:
+                self._connection.close()
+                self._connection = None
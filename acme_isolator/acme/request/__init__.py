@@ -1,3 +1,6 @@
 from .constants import USER_AGENT
-from .nonce import NonceManager
+from .nonce import NonceManager, NonceStatistics
 from .jws import JwsBase, JwsJwk, JwsKid, JwsRolloverRequest
+from .retry import RetryPolicy, RetryRule
+from .connection import ConnectionSettings
+from .codec import JsonCodec, available_codecs, get_codec, set_default_codec
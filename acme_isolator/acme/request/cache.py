@@ -0,0 +1,110 @@
+import json
+import os
+from aiohttp import ClientSession
+from jwcrypto.jwk import JWK
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from ..objects.directory import ACME_Directory
+from ..objects.exceptions import UnexpectedResponseException
+from .constants import USER_AGENT
+from .codec import JsonCodec, get_codec
+from .jws import get_signer
+
+
+class WarmStartCache:
+    """
+    On-disk cache of the data, a `Session` needs before it can send its first real request,
+    so short-lived processes and restarts can skip those round trips.
+
+    The cache holds the directory resource of each server, which is used without a request while it is younger than `directory_ttl`,
+    and revalidated with a conditional request afterwards.
+    It also maps the thumbprint of each account key to the account URL and account data, which `ACME_Account.get_from_key` uses instead of
+    looking the account up through newAccount. Such an entry is only checked lazily: if the server rejects the first request of the
+    account, the entry is dropped and the account is looked up again.
+
+    :ivar path: Location of the JSON file holding the cache.
+    :ivar directory_ttl: Seconds a cached directory is used without revalidating it.
+    """
+    path: Path
+    directory_ttl: float
+    _data: dict | None
+
+    def __init__(self, path: str | Path, directory_ttl: float = 24 * 3600):
+        self.path = Path(path)
+        self.directory_ttl = directory_ttl
+        self._data = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = dict()
+            self._data.setdefault("directories", dict())
+            self._data.setdefault("accounts", dict())
+        return self._data
+
+    def save(self):
+        """
+        Write the cache to disk. The file is replaced atomically, so concurrent readers never see a partially written cache.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile("w", dir=self.path.parent, prefix=f".{self.path.name}.", delete=False) as f:
+            json.dump(self.data, f)
+        os.replace(f.name, self.path)
+
+    async def get_directory(self, url: str, session: ClientSession, codec: JsonCodec | None = None) -> ACME_Directory:
+        """
+        Get the directory resource from the cache, revalidate it if it is older than `directory_ttl`, or fetch it if it isn't cached yet.
+
+        :param url: URL of the directory resource.
+        :ptype url: str
+        :param session: Session to revalidate or fetch the directory with.
+        :ptype session: ClientSession
+        :param codec: JSON codec to decode the response with. Defaults to the fastest installed codec.
+        :ptype codec: JsonCodec | None
+        :rtype: ACME_Directory
+        """
+        codec = get_codec() if codec is None else codec
+        entry = self.data["directories"].get(url, None)
+        if entry is not None and time() - entry["fetched"] < self.directory_ttl:
+            return ACME_Directory.from_dict(url, entry["data"])
+        headers = {"User-Agent": USER_AGENT}
+        if entry is not None and entry.get("etag", None) is not None:
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified", None) is not None:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        async with session.get(url, headers=headers) as resp:
+            if resp.status == 304 and entry is not None:
+                entry["fetched"] = time()
+            elif resp.status == 200:
+                entry = {"data": codec.decode(await resp.read()), "fetched": time(),
+                         "etag": resp.headers.get("ETag", None), "last_modified": resp.headers.get("Last-Modified", None)}
+                self.data["directories"][url] = entry
+            else:
+                raise UnexpectedResponseException(resp.status, response=codec.decode(await resp.read()), msg="Error while getting directory data").convert_exception()
+        self.save()
+        return ACME_Directory.from_dict(url, entry["data"])
+
+    def get_account(self, directory_url: str, key: JWK) -> tuple[str, dict] | None:
+        """
+        Look up the account of a key.
+
+        :return: Account URL and the account data as last seen, or `None` if the key isn't cached.
+        :rtype: tuple[str, dict] | None
+        """
+        entry = self.data["accounts"].get(directory_url, dict()).get(get_signer(key).thumbprint, None)
+        if entry is None:
+            return None
+        return entry["url"], entry["data"]
+
+    def store_account(self, directory_url: str, key: JWK, url: str, data: dict):
+        self.data["accounts"].setdefault(directory_url, dict())[get_signer(key).thumbprint] = {"url": url, "data": data}
+        self.save()
+
+    def forget_account(self, directory_url: str, key: JWK):
+        if self.data["accounts"].get(directory_url, dict()).pop(get_signer(key).thumbprint, None) is not None:
+            self.save()
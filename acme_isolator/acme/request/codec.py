@@ -0,0 +1,108 @@
+import json
+from abc import ABC, abstractmethod
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JsonCodec(ABC):
+    """
+    Encoder and decoder for the JSON bodies of requests and responses, working on bytes, as they are sent and received.
+    Objects are encoded compactly and with sorted keys, no matter which implementation is used.
+
+    :cvar name: Name of the codec, as accepted by `get_codec`.
+    """
+    name: str
+
+    @abstractmethod
+    def encode(self, o) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes | str):
+        pass
+
+
+class StdlibCodec(JsonCodec):
+    name = "json"
+
+    def encode(self, o) -> bytes:
+        return json.dumps(o, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+    def decode(self, data: bytes | str):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def encode(self, o) -> bytes:
+        return orjson.dumps(o, option=orjson.OPT_SORT_KEYS)
+
+    def decode(self, data: bytes | str):
+        return orjson.loads(data)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder(order="sorted")
+        self._decoder = msgspec.json.Decoder()
+
+    def encode(self, o) -> bytes:
+        return self._encoder.encode(o)
+
+    def decode(self, data: bytes | str):
+        return self._decoder.decode(data)
+
+
+_codec_classes: dict[str, type[JsonCodec]] = {"json": StdlibCodec}
+if msgspec is not None:
+    _codec_classes["msgspec"] = MsgspecCodec
+if orjson is not None:
+    _codec_classes["orjson"] = OrjsonCodec
+
+_preference = ("orjson", "msgspec", "json")
+_default: JsonCodec | None = None
+
+
+def available_codecs() -> list[str]:
+    """
+    Names of the codecs, whose library is installed, fastest first.
+    """
+    return [name for name in _preference if name in _codec_classes]
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    """
+    Get a codec by name, or the default codec, which is the fastest installed one, unless it has been changed with `set_default_codec`.
+
+    :param name: One of `available_codecs()`.
+    :ptype name: str | None
+    :rtype: JsonCodec
+    :raises ValueError: If the library of the codec isn't installed.
+    """
+    global _default
+    if name is None:
+        if _default is None:
+            _default = _codec_classes[available_codecs()[0]]()
+        return _default
+    if name not in _codec_classes:
+        raise ValueError(f"JSON codec {name} is not available, choose one of {', '.join(available_codecs())}.")
+    return _codec_classes[name]()
+
+
+def set_default_codec(name: str):
+    """
+    Change the codec used by sessions and requests, which aren't given a codec explicitly.
+    """
+    global _default
+    _default = get_codec(name)
@@ -0,0 +1,43 @@
+from aiohttp import TCPConnector, ClientTimeout
+from dataclasses import dataclass
+from ssl import SSLContext
+
+
+@dataclass(kw_only=True)
+class ConnectionSettings:
+    """
+    Settings of the connection pool, which is shared by all `ClientSession` objects of a `Session`.
+
+    Connections are kept alive between requests, so thousands of requests to the same host only pay for a few TCP and TLS handshakes.
+    All connections use the same `SSLContext`, which is aiohttp's cached default context, unless `ssl_context` is given.
+
+    :ivar limit: Maximal number of simultaneous connections.
+    :ivar limit_per_host: Maximal number of simultaneous connections to the same host. `0` means no limit.
+    :ivar keepalive_timeout: Seconds an idle connection is kept open for reuse.
+    :ivar ttl_dns_cache: Seconds a resolved host name is cached. `None` caches forever.
+    :ivar ssl_context: Context used to verify the server, instead of the default context.
+    :ivar connect_timeout: Timeout in seconds for acquiring and establishing a connection.
+    :ivar read_timeout: Timeout in seconds between two reads from a connection.
+    :ivar total_timeout: Timeout in seconds for a whole request. `None` disables it.
+    """
+    limit: int = 100
+    limit_per_host: int = 20
+    keepalive_timeout: float = 60.0
+    ttl_dns_cache: int | None = 300
+    ssl_context: SSLContext | None = None
+    connect_timeout: float = 15.0
+    read_timeout: float = 15.0
+    total_timeout: float | None = None
+
+    def create_connector(self) -> TCPConnector:
+        """
+        Create the connection pool. Has to be called from within a running event loop.
+        """
+        kwargs = dict(limit=self.limit, limit_per_host=self.limit_per_host, keepalive_timeout=self.keepalive_timeout,
+                      use_dns_cache=True, ttl_dns_cache=self.ttl_dns_cache)
+        if self.ssl_context is not None:
+            kwargs["ssl"] = self.ssl_context
+        return TCPConnector(**kwargs)
+
+    def create_timeout(self) -> ClientTimeout:
+        return ClientTimeout(total=self.total_timeout, connect=self.connect_timeout, sock_read=self.read_timeout)
@@ -1,45 +1,292 @@
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
+from weakref import finalize
 from jwcrypto.jwk import JWK
 from jwcrypto.jws import JWS
-from jwcrypto.common import json_encode, base64url_encode
+from jwcrypto.common import base64url_encode
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+from asyncio import get_running_loop
+from base64 import urlsafe_b64encode
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from hashlib import sha256
+import json
+from .codec import JsonCodec, get_codec
 
 CONTENT_TYPE = "application/jose+json"
 
 
+def _b64(data: bytes) -> bytes:
+    return urlsafe_b64encode(data).rstrip(b"=")
+
+
+def algorithm_for_key(key: JWK) -> str:
+    """
+    Pick the JWS algorithm for a key. An `alg` member of the JWK takes precedence,
+    otherwise EC keys use the ECDSA variant matching their curve, RSA keys use RS256 and OKP keys use EdDSA.
+
+    :raises ValueError: If no algorithm is known for the key type or curve.
+    """
+    alg = key.get("alg", None)
+    if alg is not None:
+        return alg
+    kty = key.get("kty", None)
+    if kty == "EC" and key.get("crv", None) in _curve_algorithms:
+        return _curve_algorithms[key["crv"]]
+    elif kty == "RSA":
+        return "RS256"
+    elif kty == "OKP" and key.get("crv", None) in {"Ed25519", "Ed448"}:
+        return "EdDSA"
+    raise ValueError(f"No signature algorithm known for key type {kty} with curve {key.get('crv', None)}.")
+
+
+_curve_algorithms = {"P-256": "ES256", "P-384": "ES384", "P-521": "ES512"}
+_thumbprint_members = {"EC": ("crv", "kty", "x", "y"), "RSA": ("e", "kty", "n"), "OKP": ("crv", "kty", "x")}  # Required members, RFC 7638 section 3.2
+_ecdsa_parameters = {"ES256": (hashes.SHA256, 32), "ES384": (hashes.SHA384, 48), "ES512": (hashes.SHA512, 66)}
+_rsa_parameters = {"RS256": (hashes.SHA256, False), "PS256": (hashes.SHA256, True)}
+
+
+def _sign(private_key, alg: str, signing_input: bytes) -> bytes:
+    if alg in _ecdsa_parameters:
+        hash_type, size = _ecdsa_parameters[alg]
+        r, s = decode_dss_signature(private_key.sign(signing_input, ec.ECDSA(hash_type())))
+        return _b64(r.to_bytes(size, "big") + s.to_bytes(size, "big"))
+    elif alg in _rsa_parameters:
+        hash_type, pss = _rsa_parameters[alg]
+        if pss:
+            signature_padding = padding.PSS(mgf=padding.MGF1(hash_type()), salt_length=hash_type.digest_size)
+        else:
+            signature_padding = padding.PKCS1v15()
+        return _b64(private_key.sign(signing_input, signature_padding, hash_type()))
+    elif alg == "EdDSA":
+        return _b64(private_key.sign(signing_input))
+    raise ValueError(f"Algorithm {alg} is not supported.")
+
+
+@lru_cache(maxsize=16)
+def _load_private_key(pem: bytes):
+    return serialization.load_pem_private_key(pem, password=None)
+
+
+def sign_with_pem(pem: bytes, alg: str, signing_input: bytes) -> bytes:
+    """
+    Sign with a PEM encoded private key. Used in worker processes, which can't receive the key object itself.
+    Loaded keys are cached per process, so each worker only parses a key once.
+    """
+    return _sign(_load_private_key(pem), alg, signing_input)
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    """
+    Compute the RFC 7638 thumbprint of a public key: the base64url encoded SHA-256 digest of the required members of the JWK,
+    serialized with sorted keys and without whitespace.
+
+    :param jwk: Public key as dictionary.
+    :ptype jwk: dict
+    :rtype: str
+    """
+    canonical = json.dumps({k: jwk[k] for k in _thumbprint_members[jwk["kty"]]}, separators=(",", ":"), sort_keys=True)
+    return _b64(sha256(canonical.encode("utf-8")).digest()).decode("ascii")
+
+
+class JwsSigner:
+    """
+    Signing material of a single account key, computed once and shared by all requests signed with that key.
+
+    Besides the key object of the `cryptography` backend, the signer caches the base64url encoded start of the protected header,
+    which only depends on the key (the algorithm and the `jwk` or `kid` member).
+    The JSON of that start is padded with whitespace to a multiple of three bytes,
+    so its base64url encoding can be concatenated with the encoding of the per request members (nonce and url)
+    and yields the encoding of the complete header.
+
+    :ivar alg: JWS algorithm used with the key, as picked by `algorithm_for_key`.
+    :ivar public_jwk: Public part of the key as dictionary, as used for the `jwk` header member.
+    :ivar jwk_prefix: Base64url encoded start of a protected header, containing the algorithm and the `jwk` member.
+    :ivar expensive: Signing takes long enough to be worth moving off the event loop (RSA keys).
+    :ivar thumbprint: RFC 7638 thumbprint of the key (base64url encoded SHA-256), as used in key authorizations of challenges.
+    """
+    alg: str
+    public_jwk: dict
+    jwk_prefix: bytes
+    expensive: bool
+    thumbprint: str
+
+    def __init__(self, key: JWK):
+        self.alg = algorithm_for_key(key)
+        if self.alg not in _ecdsa_parameters and self.alg not in _rsa_parameters and self.alg != "EdDSA":
+            raise ValueError(f"Algorithm {self.alg} is not supported.")
+        self.public_jwk = key.export_public(as_dict=True)
+        self.expensive = key.get("kty", None) == "RSA"
+        self._private_key = key.get_op_key("sign")
+        self._pem: bytes | None = None
+        self.jwk_prefix = self._header_prefix("jwk", self.public_jwk)
+        self.thumbprint = jwk_thumbprint(self.public_jwk)
+        self._kid_prefixes: dict[str, bytes] = dict()
+
+    def _header_prefix(self, member: str, value: str | dict) -> bytes:
+        start = f'{{"alg":"{self.alg}","{member}":{json.dumps(value, separators=(",", ":"), sort_keys=True)},'.encode("utf-8")
+        start += b" " * (-len(start) % 3)
+        return _b64(start)
+
+    def kid_prefix(self, kid: str) -> bytes:
+        """
+        Base64url encoded start of a protected header, containing the algorithm and the account URL as `kid` member.
+        """
+        prefix = self._kid_prefixes.get(kid, None)
+        if prefix is None:
+            prefix = self._header_prefix("kid", kid)
+            self._kid_prefixes[kid] = prefix
+        return prefix
+
+    @property
+    def pem(self) -> bytes:
+        """
+        PEM encoding of the private key, for handing it to worker processes.
+        """
+        if self._pem is None:
+            self._pem = self._private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        return self._pem
+
+    def sign(self, signing_input: bytes) -> bytes:
+        return _sign(self._private_key, self.alg, signing_input)
+
+    async def sign_async(self, signing_input: bytes, executor: Executor | None = None) -> bytes:
+        """
+        Sign in an executor, if the signature is expensive and an executor is given, otherwise inline.
+        Process pools receive the PEM encoded key, since key objects can't be pickled.
+        """
+        if executor is None or not self.expensive:
+            return self.sign(signing_input)
+        elif isinstance(executor, ProcessPoolExecutor):
+            return await get_running_loop().run_in_executor(executor, sign_with_pem, self.pem, self.alg, signing_input)
+        else:
+            return await get_running_loop().run_in_executor(executor, self.sign, signing_input)
+
+
+_signers: dict[int, JwsSigner] = dict()
+
+
+def get_signer(key: JWK) -> JwsSigner:
+    """
+    Get the cached `JwsSigner` of a key, and create it on first use. The cache entry is removed, when the key object is garbage collected.
+    """
+    signer = _signers.get(id(key), None)
+    if signer is None:
+        signer = JwsSigner(key)
+        _signers[id(key)] = signer
+        finalize(key, _signers.pop, id(key), None)
+    return signer
+
+
 @dataclass(kw_only=True)
 class JwsBase(ABC):
     nonce: str = field(default="", init=False)
     url: str
     key: JWK
     payload: dict | bytes | None = None
-    alg: str = field(default="ES256", init=False, repr=False)
+    alg: str = field(default="", init=False, repr=False)
     jws: JWS = None
+    _payload: bytes = field(default=b"", init=False, repr=False)
+    _payload_b64: bytes = field(default=b"", init=False, repr=False)
+    _payload_codec: JsonCodec | None = field(default=None, init=False, repr=False, compare=False)  # Codec, `_payload` has been encoded with
+    retry_after: float | None = field(default=None, init=False, repr=False)  # Retry-After of the last response to this request, in seconds
 
     def __post_init__(self):
+        self.alg = get_signer(self.key).alg
+
+    def _encode_payload(self, codec: JsonCodec):
+        if self._payload_codec is codec:
+            return
         if type(self.payload) == bytes:
             payload = self.payload
         elif self.payload is None:
             payload = b""
         else:
-            payload = json_encode(self.payload)
-        self.jws = JWS(payload=payload)
+            payload = codec.encode(self.payload)
+        self._payload = payload
+        self._payload_b64 = _b64(payload)
+        self._payload_codec = codec
+
+    def _signing_input(self, nonce: str, codec: JsonCodec | None) -> tuple[JwsSigner, bytes]:
+        codec = get_codec() if codec is None else codec
+        self._encode_payload(codec)
+        self.nonce = nonce
+        signer = get_signer(self.key)
+        protected = self.header_prefix(signer) + _b64(codec.encode(self.request_members())[1:])
+        return signer, protected
+
+    def _serialize(self, protected: bytes, signature: bytes) -> bytes:
+        return b'{"protected":"' + protected + b'","payload":"' + self._payload_b64 + b'","signature":"' + signature + b'"}'
 
-    def build(self, nonce: str) -> bytes:
+    def build(self, nonce: str, codec: JsonCodec | None = None) -> bytes:
+        """
+        Sign the request with a nonce, and serialize it as flattened JSON.
+        The request is signed without jwcrypto, using the cached `JwsSigner` of the key.
+
+        :param nonce: Nonce to include into the protected header.
+        :ptype nonce: str
+        :param codec: JSON codec encoding the payload and the protected header. Defaults to `get_codec()`.
+        :ptype codec: JsonCodec | None
+        :return: Flattened JWS JSON serialization.
+        :rtype: bytes
+        """
+        signer, protected = self._signing_input(nonce, codec)
+        return self._serialize(protected, signer.sign(protected + b"." + self._payload_b64))
+
+    async def build_async(self, nonce: str, executor: Executor | None = None, codec: JsonCodec | None = None) -> bytes:
+        """
+        Like `build`, but expensive signatures (RSA keys) are computed in `executor`, so they don't block the event loop.
+
+        :param nonce: Nonce to include into the protected header.
+        :ptype nonce: str
+        :param executor: Thread or process pool for signing. Without it, the request is signed inline.
+        :ptype executor: Executor | None
+        :param codec: JSON codec encoding the payload and the protected header. Defaults to `get_codec()`.
+        :ptype codec: JsonCodec | None
+        :return: Flattened JWS JSON serialization.
+        :rtype: bytes
+        """
+        signer, protected = self._signing_input(nonce, codec)
+        return self._serialize(protected, await signer.sign_async(protected + b"." + self._payload_b64, executor))
+
+    def build_jwcrypto(self, nonce: str) -> bytes:
+        """
+        Sign the request with a nonce through jwcrypto's generic `JWS` object.
+        """
         self.nonce = nonce
+        self._encode_payload(get_codec())
+        self.jws = JWS(payload=self._payload)
         self.jws.add_signature(self.key, self.alg, protected=self.create_headers())
         return self.jws.serialize(compact=False).encode("utf-8")
 
     def reset_build(self):
         self.nonce = ""
-        del self.jws.objects["protected"]
-        # del self.jws.objects["signatures"]
-        del self.jws.objects["signature"]
+        self.jws = None
 
     @abstractmethod
     def create_headers(self):
         return {"alg": self.alg, "nonce": self.nonce, "url": self.url}
 
+    def request_members(self) -> dict:
+        """
+        Members of the protected header, that change with every request.
+        """
+        return {"nonce": self.nonce, "url": self.url}
+
+    @abstractmethod
+    def header_prefix(self, signer: JwsSigner) -> bytes:
+        """
+        Cached, base64url encoded start of the protected header, containing the algorithm and the member identifying the key.
+        """
+
+    def post_as_get(self, url: str) -> "JwsBase":
+        """
+        Create a POST-as-GET request to another URL, signed the same way as this request, e.g. for following a link to the next page.
+        """
+        return self.__class__(url=url, key=self.key)
+
 
 @dataclass(kw_only=True)
 class JwsJwk(JwsBase):
@@ -49,6 +296,9 @@ class JwsJwk(JwsBase):
         header["jwk"] = self.key.export_public(as_dict=True)
         return header
 
+    def header_prefix(self, signer: JwsSigner) -> bytes:
+        return signer.jwk_prefix
+
 
 @dataclass(kw_only=True)
 class JwsKid(JwsBase):
@@ -59,6 +309,12 @@ class JwsKid(JwsBase):
         header["kid"] = self.kid
         return header
 
+    def header_prefix(self, signer: JwsSigner) -> bytes:
+        return signer.kid_prefix(self.kid)
+
+    def post_as_get(self, url: str) -> "JwsKid":
+        return self.__class__(url=url, key=self.key, kid=self.kid)
+
 
 @dataclass(kw_only=True)
 class JwsRolloverRequest(JwsJwk):
@@ -78,6 +334,9 @@ class JwsRolloverRequest(JwsJwk):
         del d["nonce"]
         return d
 
+    def request_members(self) -> dict:
+        return {"url": self.url}
+
     # def build(self) -> bytes:
     #     h = self.create_headers()
     #     self.jws.add_signature(self.key, self.alg, protected=self.create_headers())
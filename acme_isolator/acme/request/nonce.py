@@ -1,25 +1,126 @@
-from asyncio import Queue, QueueEmpty, Task, create_task, current_task, CancelledError, gather, sleep
+from asyncio import Future, Queue, QueueEmpty, Task, Event, FIRST_COMPLETED, create_task, current_task, CancelledError, gather, get_running_loop, wait
 from aiohttp import ClientSession
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from math import ceil
+from time import monotonic
 from .constants import USER_AGENT
 from urllib.parse import urlparse
 
 
+@dataclass
+class NonceStatistics:
+    """
+    Counters describing how well the nonce pool keeps up with the demand.
+
+    :ivar hits: Number of `get_nonce` calls, which could be served from the pool immediately.
+    :ivar misses: Number of `get_nonce` calls, which had to wait for a nonce to be fetched.
+    :ivar wait_time: Accumulated time in seconds, spent waiting on misses.
+    :ivar fetched: Number of nonces fetched from the newNonce resource.
+    :ivar returned: Number of nonces put back into the pool from responses.
+    :ivar expired: Number of pooled nonces, which have been dropped for exceeding the maximal age.
+    :ivar bad_nonces: Number of nonces, which have been rejected by the server with a badNonce problem.
+    """
+    hits: int = 0
+    misses: int = 0
+    wait_time: float = 0.0
+    fetched: int = 0
+    returned: int = 0
+    expired: int = 0
+    bad_nonces: int = 0
+
+
+class NonceQueue(Queue):
+    """
+    LIFO variant of `asyncio.Queue`, which remembers when each nonce has been put into it.
+    Getting from the queue returns a tuple of the nonce and the `time.monotonic` timestamp of its arrival,
+    the most recently received nonce first.
+    """
+
+    def _init(self, maxsize):
+        self._queue = deque()
+
+    def _put(self, item):
+        self._queue.append((item, monotonic()))
+
+    def _get(self):
+        return self._queue.pop()
+
+    def prune(self, max_age: float) -> int:
+        """
+        Drop all nonces, which have been in the queue for longer than `max_age` seconds.
+
+        :return: Number of dropped nonces.
+        :rtype: int
+        """
+        deadline = monotonic() - max_age
+        count = 0
+        while self._queue and self._queue[0][1] < deadline:
+            self._queue.popleft()
+            self.task_done()
+            count += 1
+        return count
+
+
 class NonceManager:
-    queue: Queue
+    """
+    Pool of nonces, which is refilled from the newNonce resource on demand.
+
+    The refill loop sleeps until `get_nonce` signals demand, which happens as soon as the number of available nonces
+    (pooled and currently fetched) drops below `refill_point`. It then tops the pool up to `high_watermark`.
+    Both follow the observed consumption rate multiplied by the latency of a newNonce request,
+    so a burst of requests can be served from the pool, while an idle session doesn't fetch nonces it won't use.
+    Every caller waiting for a nonce has a fetch in flight, and gets the exception raised, if a fetch fails while it waits.
+
+    :ivar low_watermark: Minimal number of available nonces, below which the pool is always refilled.
+    :ivar initial_depth: Number of nonces to fetch, before any consumption has been observed.
+    :ivar max_depth: Upper bound for the number of nonces, the pool is filled up to.
+    :ivar max_age: Age in seconds, after which a pooled nonce is considered stale and dropped instead of being handed out.
+        It is decreased every time the server rejects a nonce younger than the current limit,
+        and slowly increased again while nonces close to the limit are accepted.
+    :ivar stats: Hit, miss and wait time counters.
+    """
+    queue: NonceQueue
     tasks: set[Task]
     session: ClientSession
     url: str
     initialized: bool = False
     loop: Task
+    low_watermark: int
+    initial_depth: int
+    max_depth: int
+    max_age: float
+    stats: NonceStatistics
 
-    def __init__(self, url: str, session: ClientSession):
+    rate_smoothing: float = 0.2  # Weight of the newest sample in the moving averages of consumption rate and latency
+    min_age: float = 5.0  # Lower bound for the learned maximal age
+    age_limit: float = 3600.0  # Upper bound for the learned maximal age
+    age_decrease: float = 0.5  # Factor applied to the age of a rejected nonce, to get the new maximal age
+    age_increase: float = 1.0  # Seconds added to the maximal age, when a nonce close to the limit is accepted
+    tracked_nonces: int = 1024  # Number of handed out nonces, whose age is remembered until their outcome is reported
+
+    def __init__(self, url: str, session: ClientSession, low_watermark: int = 2, initial_depth: int = 10, max_depth: int = 64, max_age: float = 120.0):
         self.url = url
         self.session = session
-        self.queue = Queue()
+        self.queue = NonceQueue()
         self.tasks = set()
+        self.low_watermark = low_watermark
+        self.initial_depth = initial_depth
+        self.max_depth = max(max_depth, low_watermark + 1)
+        self.max_age = max_age
+        self.stats = NonceStatistics()
+        self._issued: OrderedDict[str, float] = OrderedDict()
+        self._expected = 0
+        self._demand = Event()
+        self._waiting = 0
+        self._failure: Future | None = None
+        self._last_request: float | None = None
+        self._interval: float | None = None
+        self._latency: float | None = None
 
     async def __aenter__(self):
         self.initialized = True
+        self._demand.set()
         self.loop = create_task(self.refill_loop())
         return self
 
@@ -27,39 +128,174 @@ class NonceManager:
         self.loop.cancel()
         for task in self.tasks:
             task.cancel()
-        await gather(*self.tasks)
+        await gather(self.loop, *self.tasks, return_exceptions=True)
         self.initialized = False
 
+    @property
+    def available(self) -> int:
+        """
+        Number of nonces, that are either in the pool or currently being fetched.
+        """
+        return self.queue.qsize() + len(self.tasks)
+
+    @property
+    def round_trip_demand(self) -> int:
+        """
+        Number of nonces expected to be consumed during a single request to the newNonce resource.
+        """
+        if self._interval is None or self._latency is None:
+            return 0
+        return ceil(self._latency / max(self._interval, 1e-6))
+
+    @property
+    def refill_point(self) -> int:
+        """
+        Number of available nonces, below which the refill loop is woken up.
+        """
+        return min(self.low_watermark + self.round_trip_demand, self.max_depth - 1)
+
+    @property
+    def high_watermark(self) -> int:
+        """
+        Number of nonces the pool is filled up to, derived from the consumption rate and the latency of the newNonce resource.
+        """
+        if self._interval is None or self._latency is None:
+            depth = max(self.initial_depth, self.low_watermark + 1)
+        else:
+            depth = max(self.low_watermark + 2 * self.round_trip_demand, self.low_watermark + 1)
+        return min(max(depth, self._expected), self.max_depth)
+
+    def expect(self, count: int):
+        """
+        Announce, that `count` nonces are about to be requested at once, e.g. by a batch of requests.
+        The pool is filled up to that number right away (bounded by `max_depth`), instead of learning the demand from misses.
+        The announcement is used up by the following calls of `get_nonce`.
+        """
+        self._expected = max(self._expected, count)
+        self._demand.set()
+
+    @staticmethod
+    def _average(old: float | None, sample: float, weight: float) -> float:
+        return sample if old is None else (1 - weight) * old + weight * sample
+
+    def _record_request(self):
+        now = monotonic()
+        if self._last_request is not None:
+            self._interval = self._average(self._interval, now - self._last_request, self.rate_smoothing)
+        self._last_request = now
+
     async def _fetch_nonce(self):
         try:
+            start = monotonic()
             async with self.session.head(self.url) as resp:
-                if resp.status == 200:
+                if resp.status == 200 and "Replay-Nonce" in resp.headers:
+                    self._latency = self._average(self._latency, monotonic() - start, self.rate_smoothing)
+                    self.stats.fetched += 1
                     self.queue.put_nowait(resp.headers.get("Replay-Nonce"))
                 else:
-                    raise ConnectionError(f"Server returned status code {resp.status} while getting nonce.")
+                    raise ConnectionError(f"{self.url} returned status code {resp.status} instead of a nonce.")
         except CancelledError:
             pass
+        except Exception as e:
+            self._fail(e)
         finally:
             self.tasks.remove(current_task())
 
+    def _fail(self, e: Exception):
+        """
+        Hand the exception of a failed fetch to all `get_nonce` calls currently waiting for a nonce.
+        """
+        failure, self._failure = self._failure, None
+        if failure is not None and not failure.done():
+            failure.set_exception(e)
+
     async def _request_nonce(self):
         self.tasks.add(create_task(self._fetch_nonce()))
 
     def put_nonce(self, nonce):
+        self.stats.returned += 1
         self.queue.put_nowait(nonce)
 
+    def _issue(self, entry: tuple[str, float]) -> str:
+        nonce, received = entry
+        self._issued[nonce] = received
+        while len(self._issued) > self.tracked_nonces:
+            self._issued.popitem(last=False)
+        return nonce
+
     async def get_nonce(self):
         assert self.initialized
+        self._record_request()
+        self._expected = max(self._expected - 1, 0)
+        self.stats.expired += self.queue.prune(self.max_age)
         try:
-            return self.queue.get_nowait()
-        except QueueEmpty:
+            try:
+                entry = self.queue.get_nowait()
+                self.stats.hits += 1
+            except QueueEmpty:
+                self.stats.misses += 1
+                start = monotonic()
+                entry = await self._wait_for_nonce()
+                self.stats.wait_time += monotonic() - start
+            self.queue.task_done()
+            return self._issue(entry)
+        finally:
+            if self.available < self.refill_point:
+                self._demand.set()
+
+    async def _wait_for_nonce(self) -> tuple[str, float]:
+        """
+        Wait for the next nonce put into the pool, making sure a fetch is in flight for every waiting caller.
+
+        :raises Exception: The exception of a fetch, which has failed while waiting.
+        """
+        if self._failure is None:
+            self._failure = get_running_loop().create_future()
+            self._failure.add_done_callback(lambda f: f.cancelled() or f.exception())  # Retrieved, even if all waiters are gone
+        failure = self._failure
+        self._waiting += 1
+        if len(self.tasks) < self._waiting:
             await self._request_nonce()
-            return await self.queue.get()
+        getter = create_task(self.queue.get())
+        try:
+            await wait([getter, failure], return_when=FIRST_COMPLETED)
+        except BaseException:
+            if getter.done() and not getter.cancelled():
+                self.queue.put_nowait(getter.result()[0])  # Cancelled right after getting a nonce, so return it to the pool
+                self.queue.task_done()
+            raise
         finally:
-            self.queue.task_done()
+            self._waiting -= 1
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            return getter.result()
+        return failure.result()
+
+    def report_accepted(self, nonce: str):
+        """
+        Report, that the server has accepted a nonce handed out by `get_nonce`.
+        Accepting nonces close to the current maximal age lets the limit grow again.
+        """
+        received = self._issued.pop(nonce, None)
+        if received is not None and monotonic() - received > 0.8 * self.max_age:
+            self.max_age = min(self.max_age + self.age_increase, self.age_limit)
+
+    def report_bad_nonce(self, nonce: str):
+        """
+        Report, that the server has rejected a nonce handed out by `get_nonce` with a badNonce problem.
+        If the nonce was younger than the current maximal age, the limit is lowered below its age.
+        Rejections of nonces younger than `min_age` are not attributed to their age and leave the limit untouched.
+        """
+        self.stats.bad_nonces += 1
+        received = self._issued.pop(nonce, None)
+        if received is not None:
+            age = monotonic() - received
+            if self.min_age <= age < self.max_age:
+                self.max_age = max(age * self.age_decrease, self.min_age)
 
     async def refill_loop(self):
         while True:
-            if len(self.tasks) == 0 and self.queue.qsize() == 0:
-                await gather(*[self._request_nonce() for _ in range(10)])
-            await sleep(0)
+            await self._demand.wait()
+            self._demand.clear()
+            await gather(*[self._request_nonce() for _ in range(self.high_watermark - self.available)])
@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from random import uniform
+from ..objects.exceptions import ACME_Exception, BadNonceException, RateLimitedException, ServerInternalException
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse the value of a Retry-After header, which can either be a number of seconds or a HTTP date.
+
+    :param value: Header value or `None`, if the header is missing.
+    :ptype value: str | None
+    :return: Number of seconds to wait, or `None` if the value is missing or can't be parsed.
+    :rtype: float | None
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass(frozen=True, kw_only=True)
+class RetryRule:
+    """
+    Describes how often and how fast a request is retried after a specific problem.
+
+    :ivar attempts: Maximal number of retries after this problem within one operation.
+    :ivar base_delay: Delay before the first retry in seconds, doubled for each following retry.
+    :ivar max_delay: Upper bound for the computed backoff delay in seconds.
+    :ivar jitter: Fraction of the backoff delay, which is randomly subtracted to spread retries of concurrent requests.
+    :ivar respect_retry_after: Wait as long as the Retry-After header of the response demands instead of backing off,
+        plus a random fraction of `base_delay` for spreading.
+    """
+    attempts: int
+    base_delay: float = 0.0
+    max_delay: float = 60.0
+    jitter: float = 0.5
+    respect_retry_after: bool = True
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Compute the delay before a retry.
+
+        :param attempt: Number of retries after this problem, that have already been made.
+        :ptype attempt: int
+        :param retry_after: Delay requested by the server.
+        :ptype retry_after: float | None
+        :rtype: float
+        """
+        if self.respect_retry_after and retry_after is not None:
+            return retry_after + uniform(0, self.jitter * self.base_delay)
+        backoff = min(self.base_delay * 2 ** attempt, self.max_delay)
+        return backoff - uniform(0, self.jitter * backoff)
+
+
+def _default_rules() -> dict[type[ACME_Exception], RetryRule]:
+    return {BadNonceException: RetryRule(attempts=5),
+            ServerInternalException: RetryRule(attempts=3, base_delay=1.0, max_delay=30.0),
+            RateLimitedException: RetryRule(attempts=3, base_delay=5.0, max_delay=120.0)}
+
+
+@dataclass(kw_only=True)
+class RetryPolicy:
+    """
+    Configuration, which problems of a request are retried by `Session.post`, and how.
+    Problems without a rule, or whose rule or the budget of the operation is used up, are raised to the caller.
+
+    :ivar rules: Retry rule for each problem type. Subclasses of a problem type share its rule, unless they have their own.
+    :ivar budget: Maximal number of retries of one operation, summed up over all problem types.
+    :ivar max_wait: Maximal time in seconds, one operation may spend waiting between retries.
+    """
+    rules: dict[type[Exception], RetryRule] = field(default_factory=_default_rules)
+    budget: int = 8
+    max_wait: float = 300.0
+
+    def rule_for(self, exception: Exception) -> tuple[type[Exception], RetryRule] | None:
+        for cls in type(exception).__mro__:
+            if cls in self.rules:
+                return cls, self.rules[cls]
+        return None
+
+    def start(self) -> "RetryState":
+        """
+        Create the bookkeeping for a single operation under this policy.
+        """
+        return RetryState(self)
+
+
+class RetryState:
+    """
+    Retries made and time waited so far by a single operation.
+    """
+    policy: RetryPolicy
+    attempts: dict[type[Exception], int]
+    retries: int
+    waited: float
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.attempts = dict()
+        self.retries = 0
+        self.waited = 0.0
+
+    def next_delay(self, exception: Exception) -> float | None:
+        """
+        Decide, if an operation is retried after a problem, and account for the retry.
+
+        :param exception: Problem raised by the last attempt.
+        :ptype exception: Exception
+        :return: Seconds to wait before the retry, or `None` if the problem has to be raised.
+        :rtype: float | None
+        """
+        match = self.policy.rule_for(exception)
+        if match is None or self.retries >= self.policy.budget:
+            return None
+        problem_type, rule = match
+        attempt = self.attempts.get(problem_type, 0)
+        if attempt >= rule.attempts:
+            return None
+        delay = rule.delay(attempt, getattr(exception, "retry_after", None))
+        if self.waited + delay > self.policy.max_wait:
+            return None
+        self.attempts[problem_type] = attempt + 1
+        self.retries += 1
+        self.waited += delay
+        return delay
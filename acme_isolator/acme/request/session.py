@@ -1,104 +1,309 @@
 import sys
 
 from .nonce import NonceManager
-from aiohttp import ClientSession, ClientResponseError
-from asyncio import gather
+from aiohttp import ClientSession, ClientResponse, ClientResponseError, TCPConnector
+from asyncio import gather, sleep, Semaphore
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from urllib.parse import urlparse
-from ..objects.exceptions import UnexpectedResponseException, BadNonceException
-from .jws import JwsBase, JwsKid
+from ..objects.exceptions import ACME_Exception, UnexpectedResponseException, BadNonceException
+from .jws import JwsBase
+from .retry import RetryPolicy, parse_retry_after
+from .connection import ConnectionSettings
+from .cache import WarmStartCache
 from ..objects.directory import ACME_Directory
+from ..objects.registry import ObjectRegistry
+from ..objects.poll import PollScheduler
+from ..objects.store import StateStore
 from .constants import USER_AGENT
+from .codec import JsonCodec, get_codec
+
+
+@dataclass(kw_only=True)
+class BatchResult:
+    """
+    Outcome of a single request of a batch sent by `Session.post_many`.
+
+    :ivar request: The request, this result belongs to.
+    :ivar data: Parsed response, if the request succeeded.
+    :ivar status: Status code of the response, if the request succeeded.
+    :ivar location: Location header of the response, if the request succeeded.
+    :ivar error: Exception raised by the request, if it failed.
+    """
+    request: JwsBase
+    data: dict | None = None
+    status: int | None = None
+    location: str | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 class Session:
+    """
+    Connection to an ACME server, sending signed requests on behalf of accounts.
+
+    :ivar directory_url: URL of the directory resource of the server.
+    :ivar retry_policy: Default policy for retrying requests after problems.
+    :ivar connection_settings: Settings of the connection pool shared by all requests.
+    :ivar signing_executor: Thread or process pool, in which expensive signatures (RSA keys) are computed. `None` signs on the event loop.
+    :ivar cache: Optional on-disk cache of the directory and of account URLs, to skip those requests when starting up.
+    :ivar objects: Identity map of the `ACME_Object` instances created through this session.
+    :ivar poller: Scheduler polling the status of orders, authorizations and challenges of this session.
+    :ivar codec: JSON codec encoding the requests and decoding the responses. Defaults to the fastest installed codec, see `get_codec`.
+    :ivar store: Optional database persisting the state of resources, so they don't have to be requested again after a restart.
+        The store belongs to the caller: leaving the session writes the queued states, but doesn't close the store.
+    """
     directory_url: str
     directory: ACME_Directory
     sessions: dict[str, ClientSession]
     resource_sessions: dict[str, ClientSession]
-    nonce_pool: NonceManager
+    nonce_pools: dict[str, NonceManager]
+    retry_policy: RetryPolicy
+    connection_settings: ConnectionSettings
+    connector: TCPConnector
+    signing_executor: Executor | None
+    cache: WarmStartCache | None
+    objects: ObjectRegistry
+    poller: PollScheduler
+    store: StateStore | None
+    codec: JsonCodec
 
-    def __init__(self, directory_url: str):
+    def __init__(self, directory_url: str, retry_policy: RetryPolicy | None = None, connection_settings: ConnectionSettings | None = None,
+                 signing_executor: Executor | None = None, cache: WarmStartCache | None = None, objects: ObjectRegistry | None = None,
+                 poller: PollScheduler | None = None, store: StateStore | None = None, codec: JsonCodec | None = None):
         self.directory_url = directory_url
+        self.cache = cache
+        self.objects = ObjectRegistry() if objects is None else objects
+        self.poller = PollScheduler() if poller is None else poller
+        self.store = store
+        self.codec = get_codec() if codec is None else codec
+        self.signing_executor = signing_executor
+        self.nonce_pools = dict()
+        self.sessions = dict()
+        self.retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self.connection_settings = ConnectionSettings() if connection_settings is None else connection_settings
 
     async def __aenter__(self):
-        self.directory = await ACME_Directory.get_directory(self.directory_url)
-        await self.define_sessions()
-        await gather(*[session.__aenter__() for session in self.sessions.values()])
-        self.nonce_pool = await NonceManager(self.directory.newNonce, self.resource_sessions["newNonce"]).__aenter__()
+        self.connector = self.connection_settings.create_connector()
+        self.sessions = dict()
+        try:
+            if self.cache is None:
+                self.directory = await ACME_Directory.get_directory(self.directory_url, session=await self.check_session(self.directory_url),
+                                                                    codec=self.codec)
+            else:
+                self.directory = await self.cache.get_directory(self.directory_url, await self.check_session(self.directory_url), codec=self.codec)
+            await self.define_sessions()
+            await self.get_nonce_pool(self.directory.newNonce)
+        except BaseException as e:
+            await self._close_connections(type(e), e, e.__traceback__)  # __aexit__ isn't called, if __aenter__ fails
+            raise
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.nonce_pool.__aexit__(exc_type, exc_val, exc_tb)
+        await self.poller.close()
+        if self.store is not None:
+            await self.store.flush()
+        await self._close_connections(exc_type, exc_val, exc_tb)
+
+    async def _close_connections(self, exc_type, exc_val, exc_tb):
+        await gather(*[pool.__aexit__(exc_type, exc_val, exc_tb) for pool in self.nonce_pools.values()])
+        self.nonce_pools = dict()
         await gather(*[session.__aexit__(exc_type, exc_val, exc_tb) for session in self.sessions.values()])
+        await self.connector.close()
+
+    @staticmethod
+    def _location(url: str) -> str:
+        return f"https://{urlparse(url).netloc}"
+
+    @property
+    def nonce_pool(self) -> NonceManager:
+        """
+        Nonce pool of the origin serving the newNonce resource of the directory.
+        """
+        return self.nonce_pools[self._location(self.directory.newNonce)]
+
+    async def get_nonce_pool(self, url: str) -> NonceManager:
+        """
+        Get the nonce pool for the origin of an URL, and create it on first use.
+        Pools of origins other than the one of the directory's newNonce resource fetch nonces from the newNonce path on their own origin.
+        Nonces are never taken from another origin, since the host receiving a nonce has to be the one, which issued it.
+        If an origin doesn't serve the newNonce path, its pool only holds the nonces of the origin's responses,
+        and requests, which find the pool empty, raise the `ConnectionError` of the failed newNonce request.
+        Since each pool refills independently, a badNonce retry against one host doesn't stall requests to other hosts.
+
+        :param url: URL of the resource, which is going to be requested with a nonce from the pool.
+        :ptype url: str
+        :return: Started nonce pool of the origin.
+        :rtype: NonceManager
+        """
+        location = self._location(url)
+        if location not in self.nonce_pools.keys():
+            new_nonce = self.directory.newNonce
+            if location == self._location(new_nonce):
+                pool = NonceManager(new_nonce, self.resource_sessions["newNonce"])
+            else:
+                nonce_url = urlparse(new_nonce)._replace(netloc=urlparse(url).netloc).geturl()
+                pool = NonceManager(nonce_url, await self.check_session(url))
+            self.nonce_pools[location] = pool
+            await pool.__aenter__()
+        return self.nonce_pools[location]
 
     async def define_sessions(self):
-        locations: dict[str, str] = {k: f"https://{urlparse(v).netloc}" for (k, v) in self.directory}
-        self.sessions = {location: ClientSession(headers={"User-Agent": USER_AGENT}, conn_timeout=15, read_timeout=15) for location in set(locations.values())}
+        locations: dict[str, str] = {k: self._location(v) for (k, v) in self.directory}
+        for (k, url) in self.directory:
+            await self.check_session(url)
         self.resource_sessions = {k: self.sessions[url] for (k, url) in locations.items()}
 
     async def check_session(self, url: str) -> ClientSession:
-        location = f"https://{urlparse(url).netloc}"
+        """
+        Get the `ClientSession` for the origin of an URL, and create it on first use.
+        All sessions share the connection pool of this `Session`.
+        """
+        location = self._location(url)
         if location in self.sessions.keys():
             return self.sessions[location]
         else:
-            new_session = ClientSession(base_url=location, headers={"User-Agent": USER_AGENT, "Content-Type": "application/jose+json"})
+            new_session = ClientSession(headers={"User-Agent": USER_AGENT}, connector=self.connector, connector_owner=False,
+                                        timeout=self.connection_settings.create_timeout())
             await new_session.__aenter__()
             self.sessions[location] = new_session
             return new_session
 
-    async def post(self, request: JwsBase, empty_response: bool = False) -> tuple[dict, int, str]:
+    async def post(self, request: JwsBase, empty_response: bool = False, retry_policy: RetryPolicy | None = None) -> tuple[dict, int, str]:
+        """
+        Send a signed request, and retry it according to the retry policy, if the server answers with a problem.
+        If the response links to further pages, they are requested as well and their lists are merged into the first page.
+        Any other member present on several pages keeps the value of the first page.
+        Use `paginate` to process large paginated resources page by page instead.
+
+        :param request: Request to sign and send.
+        :ptype request: JwsBase
+        :param empty_response: Don't parse the body of the response.
+        :ptype empty_response: bool
+        :param retry_policy: Policy for this operation, instead of the session's `retry_policy`.
+        :ptype retry_policy: RetryPolicy | None
+        :return: Parsed response, status code and Location header of the response.
+        :rtype: tuple[dict, int, str]
+        :raises ACME_Exception: Problem of the last attempt, once the retry budget is used up or the problem isn't retried.
+        """
+        data, status, location, next_url = await self._post_with_retries(request, empty_response, retry_policy)
+        if next_url is not None and not empty_response:
+            async for new_data in self.paginate(request.post_as_get(next_url), retry_policy=retry_policy):
+                for key in new_data.keys():
+                    if key in data.keys() and type(new_data[key]) == list and type(data[key]) == list:
+                        data[key] += new_data[key]
+                    elif key not in data.keys() and key != "meta":
+                        data[key] = new_data[key]
+                    # Other members (e.g. "meta") keep the value of the first page
+        return data, status, location
+
+    async def post_many(self, requests: Iterable[JwsBase], concurrency: int = 16, empty_response: bool = False,
+                        retry_policy: RetryPolicy | None = None) -> list[BatchResult]:
+        """
+        Send many requests with at most `concurrency` of them in flight at the same time.
+        A failing request doesn't cancel the rest of the batch, its exception is returned in its result instead.
+        Since every response returns a fresh nonce, the nonce pools are only asked to provide one nonce per concurrently running request upfront.
+
+        :param requests: Requests to sign and send.
+        :ptype requests: Iterable[JwsBase]
+        :param concurrency: Maximal number of requests in flight.
+        :ptype concurrency: int
+        :param empty_response: Don't parse the bodies of the responses.
+        :ptype empty_response: bool
+        :param retry_policy: Policy for each request, instead of the session's `retry_policy`.
+        :ptype retry_policy: RetryPolicy | None
+        :return: One result per request, in the order of `requests`.
+        :rtype: list[BatchResult]
+        """
+        requests = list(requests)
+        origins: dict[str, list[str]] = dict()
+        for request in requests:
+            origins.setdefault(self._location(request.url), []).append(request.url)
+        for urls in origins.values():
+            (await self.get_nonce_pool(urls[0])).expect(min(len(urls), concurrency))
+        semaphore = Semaphore(concurrency)
+
+        async def send(request: JwsBase) -> BatchResult:
+            async with semaphore:
+                try:
+                    data, status, location = await self.post(request, empty_response=empty_response, retry_policy=retry_policy)
+                except Exception as e:
+                    return BatchResult(request=request, error=e)
+                return BatchResult(request=request, data=data, status=status, location=location)
+
+        return list(await gather(*[send(request) for request in requests]))
+
+    async def paginate(self, request: JwsBase, retry_policy: RetryPolicy | None = None) -> AsyncIterator[dict]:
+        """
+        Send a POST-as-GET request to a paginated resource, and yield each page as soon as it has arrived.
+        The next page is only requested, once the consumer asks for it, so stopping the iteration early saves the remaining requests,
+        and only one page is held in memory at a time.
+
+        :param request: Request for the first page.
+        :ptype request: JwsBase
+        :param retry_policy: Policy for each page request, instead of the session's `retry_policy`.
+        :ptype retry_policy: RetryPolicy | None
+        :return: Asynchronous iterator over the parsed pages.
+        :rtype: AsyncIterator[dict]
+        """
+        next_request = request
+        while next_request is not None:
+            data, status, location, next_url = await self._post_with_retries(next_request, False, retry_policy)
+            next_request = None if next_url is None else request.post_as_get(next_url)
+            yield data
+
+    async def _post_with_retries(self, request: JwsBase, empty_response: bool, retry_policy: RetryPolicy | None) -> tuple[dict, int, str, str | None]:
+        retries = (self.retry_policy if retry_policy is None else retry_policy).start()
         while True:
             try:
-                resp, status, location = await self._post(request, empty_response=empty_response)
-            except BadNonceException:
+                return await self._post(request, empty_response=empty_response)
+            except ACME_Exception as e:
+                delay = retries.next_delay(e)
+                if delay is None:
+                    raise
                 request.reset_build()
-            else:
-                return resp, status, location
+                await sleep(delay)
+
+    @staticmethod
+    def _harvest_nonce(resp: ClientResponse, pool: NonceManager):
+        """
+        Put the nonce from the Replay-Nonce header of a response into the pool, no matter if the response is an error or not.
+        """
+        new_nonce = resp.headers.get("Replay-Nonce", None)
+        if new_nonce is not None:
+            pool.put_nonce(new_nonce)
+
+    async def _decode(self, resp: ClientResponse):
+        """
+        Decode the JSON body of a response straight from its bytes. An empty body is decoded as `None`.
+        """
+        body = await resp.read()
+        return self.codec.decode(body) if body.strip() else None
 
-    async def _post(self, request: JwsBase, empty_response: bool) -> tuple[dict, int, str]:
+    async def _post(self, request: JwsBase, empty_response: bool) -> tuple[dict, int, str, str | None]:
         session = await self.check_session(request.url)
-        payload = request.build(await self.nonce_pool.get_nonce())
+        pool = await self.get_nonce_pool(request.url)
+        nonce = await pool.get_nonce()
+        payload = await request.build_async(nonce, self.signing_executor, codec=self.codec)
 
         async with session.post(url=request.url, data=payload, headers={"Content-Type": "application/jose+json"}) as resp:
+            self._harvest_nonce(resp, pool)
+            request.retry_after = parse_retry_after(resp.headers.get("Retry-After", None))
             try:
                 assert resp.status < 400, "code"
+                pool.report_accepted(nonce)
                 if empty_response:
                     data = None
                 else:
                     assert not resp.headers["Content-Type"] == "application/problem+json", "header"
-                    data = await resp.json()
-                new_nonce = resp.headers["Replay-Nonce"]
-                self.nonce_pool.put_nonce(new_nonce)
-
-                next_url = resp.links.get("next", None)
-                while next_url is not None:
-                    extracted_properties = {"key": request.key, "url": next_url, "payload": b""}
-                    if isinstance(request, JwsKid):
-                        extracted_properties["kid"] = request.kid
-                    next_request = request.__class__(**extracted_properties)
-                    session = await self.check_session(next_url)
-                    next_payload = next_request.build(await self.nonce_pool.get_nonce())
-                    async with session.post(url=next_url, data=next_payload, headers={"Content-Type": "application/jose+json"}) as next_resp:
-                        assert next_resp.status < 400, "code"
-                        if empty_response:
-                            data = None
-                        else:
-                            assert not next_resp.headers["Content-Type"] == "application/problem+json", "header"
-                            new_data = await next_resp.json()
-                        new_nonce = next_resp.headers["Replay-Nonce"]
-                        self.nonce_pool.put_nonce(new_nonce)
-                        next_url = next_resp.links.get("next", None)
-                        for key in new_data.keys():
-                            if key in data.keys() and type(new_data[key]) == list and type(data[key] ) == list:
-                                data[key] += new_data[key]
-                            elif key == "meta":
-                                pass
-                            elif key not in data.keys():
-                                data[key] = new_data[key]
-                            else:
-                                raise NotImplementedError(f"Case of key '{key} existing in old and new dict, and having types {type(data[key])} and {type(new_data[key])} not covered.")
-
-                return data, resp.status, resp.headers.get("Location", None)
+                    data = await self._decode(resp)
+                next_link = resp.links.get("next", None)
+                next_url = None if next_link is None else str(next_link["url"])
+                return data, resp.status, resp.headers.get("Location", None), next_url
             except KeyError as e:
                 print(resp.status, file=sys.stderr)
                 s = await resp.text()
@@ -106,6 +311,10 @@ class Session:
                 raise e
             except AssertionError as e:
                 if str(e) == "code":
-                    raise UnexpectedResponseException(resp.status, response=await resp.json()).convert_exception()
+                    exception = UnexpectedResponseException(resp.status, response=await self._decode(resp)).convert_exception()
+                    exception.retry_after = request.retry_after
+                    if isinstance(exception, BadNonceException):
+                        pool.report_bad_nonce(nonce)
+                    raise exception
                 else:
                     raise ClientResponseError(status=resp.status, headers=resp.headers, history=(resp,), request_info=resp.request_info)
@@ -0,0 +1,3 @@
+from .provider import ChangeSet, DnsProvider, ProviderStatistics, normalize_name
+from .zonefile import ZoneFileProvider
+from .propagation import PropagationChecker, ZoneTiming
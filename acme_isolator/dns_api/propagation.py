@@ -0,0 +1,225 @@
+from asyncio import Task, as_completed, create_task, gather, shield, sleep, timeout as time_limit
+from collections.abc import AsyncIterator, Callable, Iterable
+from dataclasses import dataclass, field
+from time import monotonic
+from .provider import normalize_name
+from .wire import A, AAAA, NS, TXT, query
+
+
+def system_resolver() -> str:
+    """
+    Address of the first nameserver configured in /etc/resolv.conf, or the local host, if there is none.
+    """
+    try:
+        with open("/etc/resolv.conf", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    return parts[1]
+    except OSError:
+        pass
+    return "127.0.0.1"
+
+
+@dataclass
+class ZoneTiming:
+    """
+    Progress of the propagation of records within one zone.
+
+    :ivar zone: Name of the zone.
+    :ivar nameservers: Addresses of the authoritative nameservers, which have been checked.
+    :ivar rounds: Number of times all nameservers have been queried.
+    :ivar started: Time (`time.monotonic()`) of the first check.
+    :ivar propagated: Time (`time.monotonic()`) all nameservers have returned the expected values, or `None` while they haven't.
+    """
+    zone: str
+    nameservers: list[str] = field(default_factory=list)
+    rounds: int = 0
+    started: float = field(default_factory=monotonic)
+    propagated: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Seconds from the first check until propagation, or until now, while the records haven't propagated.
+        """
+        return (monotonic() if self.propagated is None else self.propagated) - self.started
+
+
+class PropagationChecker:
+    """
+    Checks that TXT records have been published by all authoritative nameservers of their zone,
+    before the corresponding challenges are answered.
+
+    The records of each zone are checked independently and concurrently: in each round all names of the zone are queried
+    at all authoritative nameservers of the zone at the same time, until every server returns all expected values of every name.
+    The zone of a name and the authoritative nameservers of a zone are looked up through `resolver`, and cached for `ns_ttl` seconds.
+    Concurrent lookups of the same name share a single query.
+
+    :ivar resolver: Address of the recursive resolver used to find the zones and their nameservers.
+    :ivar port: Port of the resolver and the authoritative nameservers.
+    :ivar interval: Seconds between two rounds of queries of a zone.
+    :ivar query_timeout: Seconds to wait for a single response. A server not responding counts as not propagated.
+    :ivar ns_ttl: Seconds the zone of a name, and the nameservers of a zone are cached.
+    :ivar zone_of: Function returning the zone of a record name (e.g. `DnsProvider.zone_of`). Without it, zones are looked up through the resolver.
+    """
+    resolver: str
+    port: int
+    interval: float
+    query_timeout: float
+    ns_ttl: float
+    zone_of: Callable[[str], str] | None
+
+    def __init__(self, resolver: str | None = None, port: int = 53, interval: float = 2.0, query_timeout: float = 2.0, ns_ttl: float = 3600.0,
+                 zone_of: Callable[[str], str] | None = None, nameservers: dict[str, list[str]] | None = None):
+        """
+        :param nameservers: Addresses of the authoritative nameservers of zones, which are used instead of looking them up.
+        :ptype nameservers: dict[str, list[str]] | None
+        """
+        self.resolver = system_resolver() if resolver is None else resolver
+        self.port = port
+        self.interval = interval
+        self.query_timeout = query_timeout
+        self.ns_ttl = ns_ttl
+        self.zone_of = zone_of
+        self._nameservers: dict[str, tuple[float, list[str]]] = {normalize_name(zone): (float("inf"), list(addresses))
+                                                                  for (zone, addresses) in (nameservers or dict()).items()}
+        self._zones: dict[str, tuple[float, str]] = dict()  # Record name to the expiry and name of its zone
+        self._has_ns: dict[str, tuple[float, bool]] = {zone: (float("inf"), True) for zone in self._nameservers}
+        self._ns_lookups: dict[str, Task] = dict()
+
+    async def _resolve(self, name: str, type: int) -> list:
+        message = await query(self.resolver, name, type, port=self.port, timeout=self.query_timeout, recursion=True)
+        return [record.data for record in message.answers if record.type == type]
+
+    async def _lookup_ns(self, name: str) -> bool:
+        found = len(await self._resolve(name, NS)) > 0
+        self._has_ns[name] = (monotonic() + self.ns_ttl, found)
+        return found
+
+    async def _is_zone(self, name: str) -> bool:
+        """
+        Whether a name has NS records, i.e. is the apex of a zone. Concurrent lookups of the same name share one query.
+        """
+        cached = self._has_ns.get(name, None)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
+        task = self._ns_lookups.get(name, None)
+        if task is None:
+            task = create_task(self._lookup_ns(name))
+            self._ns_lookups[name] = task
+            task.add_done_callback(lambda t: self._ns_lookups.pop(name, None))
+        return await shield(task)
+
+    async def find_zone(self, name: str) -> str:
+        """
+        Find the zone of a record name, i.e. the closest enclosing name with NS records,
+        so zones delegated below another zone (e.g. `_acme-challenge` to a separate server) are found as well.
+        """
+        name = normalize_name(name)
+        if self.zone_of is not None:
+            return normalize_name(self.zone_of(name))
+        cached = self._zones.get(name, None)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
+        labels = name.split(".")
+        for candidate in (".".join(labels[i:]) for i in range(len(labels) - 1)):
+            if await self._is_zone(candidate):
+                self._zones[name] = (monotonic() + self.ns_ttl, candidate)
+                return candidate
+        raise ValueError(f"No zone found for {name}.")
+
+    async def nameservers(self, zone: str) -> list[str]:
+        """
+        Addresses of the authoritative nameservers of a zone, looked up through the resolver and cached.
+        """
+        zone = normalize_name(zone)
+        cached = self._nameservers.get(zone, None)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
+        names = await self._resolve(zone, NS)
+        results = await gather(*[self._resolve(ns, kind) for ns in names for kind in (A, AAAA)], return_exceptions=True)
+        addresses = list(dict.fromkeys(address for result in results if not isinstance(result, BaseException) for address in result))
+        if len(addresses) == 0:
+            raise ValueError(f"No authoritative nameservers found for {zone}.")
+        self._nameservers[zone] = (monotonic() + self.ns_ttl, addresses)
+        return addresses
+
+    async def _published(self, server: str, name: str, values: set[str]) -> bool:
+        try:
+            message = await query(server, name, TXT, port=self.port, timeout=self.query_timeout)
+        except (OSError, TimeoutError, ValueError):
+            return False
+        return values <= {record.data for record in message.answers if record.type == TXT and record.name == name}
+
+    async def wait_zone(self, zone: str, records: dict[str, set[str]]) -> ZoneTiming:
+        """
+        Wait until all authoritative nameservers of a zone return all expected values of the records.
+
+        :param zone: Name of the zone.
+        :ptype zone: str
+        :param records: Expected TXT values keyed by record name.
+        :ptype records: dict[str, set[str]]
+        :rtype: ZoneTiming
+        """
+        timing = ZoneTiming(zone=zone, nameservers=await self.nameservers(zone))
+        pending = dict(records)
+        while True:
+            timing.rounds += 1
+            checks = [(name, self._published(server, name, values)) for (name, values) in pending.items() for server in timing.nameservers]
+            results = await gather(*[check for (name, check) in checks])
+            failed = {name for ((name, check), published) in zip(checks, results) if not published}
+            pending = {name: values for (name, values) in pending.items() if name in failed}  # Names, which have been seen everywhere, are done
+            if len(pending) == 0:
+                timing.propagated = monotonic()
+                return timing
+            await sleep(self.interval)
+
+    async def _group(self, records: dict[str, Iterable[str]]) -> dict[str, dict[str, set[str]]]:
+        names = [normalize_name(name) for name in records.keys()]
+        zones = await gather(*[self.find_zone(name) for name in names])
+        grouped = dict()
+        for name, zone, values in zip(names, zones, records.values()):
+            grouped.setdefault(zone, dict()).setdefault(name, set()).update(values)
+        return grouped
+
+    async def iter_propagated(self, records: dict[str, Iterable[str]]) -> AsyncIterator[tuple[ZoneTiming, dict[str, set[str]]]]:
+        """
+        Check all zones concurrently, and yield each zone as soon as its records have propagated,
+        so the challenges of that zone can be answered without waiting for slower zones.
+
+        :param records: Expected TXT values keyed by record name, as returned by `dns_01_records`.
+        :ptype records: dict[str, Iterable[str]]
+        :return: Asynchronous iterator over the timing and the records of each propagated zone.
+        :rtype: AsyncIterator[tuple[ZoneTiming, dict[str, set[str]]]]
+        """
+        grouped = await self._group(records)
+
+        async def wait(zone: str, zone_records: dict[str, set[str]]):
+            return await self.wait_zone(zone, zone_records), zone_records
+
+        tasks = [create_task(wait(zone, zone_records)) for (zone, zone_records) in grouped.items()]
+        try:
+            for next_zone in as_completed(tasks):
+                yield await next_zone
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def wait(self, records: dict[str, Iterable[str]], timeout: float | None = None) -> dict[str, ZoneTiming]:
+        """
+        Wait until the records of all zones have propagated.
+
+        :param records: Expected TXT values keyed by record name, as returned by `dns_01_records`.
+        :ptype records: dict[str, Iterable[str]]
+        :param timeout: Seconds to wait at most.
+        :ptype timeout: float | None
+        :return: Timing of each zone.
+        :rtype: dict[str, ZoneTiming]
+        :raises TimeoutError: If some records haven't propagated within `timeout`.
+        """
+        timings = dict()
+        async with time_limit(timeout):
+            async for timing, zone_records in self.iter_propagated(records):
+                timings[timing.zone] = timing
+        return timings
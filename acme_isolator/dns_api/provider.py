@@ -0,0 +1,267 @@
+import logging
+from abc import ABC, abstractmethod
+from asyncio import Semaphore, Task, create_task, gather, sleep
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+_logger = logging.getLogger(__name__)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Canonical form of a domain name: lower case, without the trailing dot of the root.
+    """
+    return name.rstrip(".").lower()
+
+
+@dataclass
+class ChangeSet:
+    """
+    TXT record values to add and to remove, keyed by record name.
+    Values are added to and removed from the record set of a name individually, so a name can hold several values at once
+    (e.g. the dns-01 records of `example.com` and `*.example.com`).
+
+    :ivar upserts: Values to add, keyed by record name.
+    :ivar deletions: Values to remove, keyed by record name.
+    """
+    upserts: dict[str, set[str]] = field(default_factory=dict)
+    deletions: dict[str, set[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_records(cls, records: dict[str, Iterable[str]], delete: bool = False) -> "ChangeSet":
+        """
+        Create a change set from TXT values keyed by record name, as returned by `dns_01_records`.
+
+        :param records: TXT values keyed by record name.
+        :ptype records: dict[str, Iterable[str]]
+        :param delete: Remove the values, instead of adding them.
+        :ptype delete: bool
+        :rtype: ChangeSet
+        """
+        changes = cls()
+        for name, values in records.items():
+            for value in values:
+                if delete:
+                    changes.remove(name, value)
+                else:
+                    changes.add(name, value)
+        return changes
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self.upserts.values()) + sum(len(values) for values in self.deletions.values())
+
+    def __bool__(self) -> bool:
+        return len(self.upserts) > 0 or len(self.deletions) > 0
+
+    def add(self, name: str, value: str):
+        name = normalize_name(name)
+        self.upserts.setdefault(name, set()).add(value)
+        self._discard(self.deletions, name, value)
+
+    def remove(self, name: str, value: str):
+        name = normalize_name(name)
+        self.deletions.setdefault(name, set()).add(value)
+        self._discard(self.upserts, name, value)
+
+    @staticmethod
+    def _discard(records: dict[str, set[str]], name: str, value: str):
+        values = records.get(name, None)
+        if values is not None:
+            values.discard(value)
+            if len(values) == 0:
+                del records[name]
+
+    def update(self, other: "ChangeSet"):
+        """
+        Merge the changes of another change set into this one. Later changes of the same value win.
+        """
+        for name, values in other.upserts.items():
+            for value in values:
+                self.add(name, value)
+        for name, values in other.deletions.items():
+            for value in values:
+                self.remove(name, value)
+
+    def names(self) -> set[str]:
+        return self.upserts.keys() | self.deletions.keys()
+
+    def split(self, zone_of) -> dict[str, "ChangeSet"]:
+        """
+        Split the changes by zone.
+
+        :param zone_of: Function returning the zone of a record name.
+        :return: One change set per zone.
+        :rtype: dict[str, ChangeSet]
+        """
+        zones = dict()
+        for name, values in self.upserts.items():
+            zones.setdefault(zone_of(name), ChangeSet()).upserts[name] = set(values)
+        for name, values in self.deletions.items():
+            zones.setdefault(zone_of(name), ChangeSet()).deletions[name] = set(values)
+        return zones
+
+
+@dataclass
+class ProviderStatistics:
+    """
+    Counters of a `DnsProvider`.
+
+    :ivar transactions: Number of change sets sent to the backend, one per zone and batch.
+    :ivar upserts: Number of values added.
+    :ivar deletions: Number of values removed.
+    :ivar failed_cleanups: Number of deferred cleanups, which have failed and have been scheduled again.
+    """
+    transactions: int = 0
+    upserts: int = 0
+    deletions: int = 0
+    failed_cleanups: int = 0
+
+
+class DnsProvider(ABC):
+    """
+    Base class of DNS backends, which publish the TXT records of dns-01 challenges.
+
+    Changes are handed over as whole `ChangeSet` objects, which are split by zone and applied as one transaction per zone,
+    with up to `concurrency` zones in parallel, instead of one API call per record.
+    Removing the records after validation can be deferred with `defer_cleanup`, which collects the deletions of many challenges,
+    and applies them together after `cleanup_delay` seconds, or when `cleanup` or `close` is called.
+    A deferred cleanup, which fails, is logged and tried again after another `cleanup_delay` seconds.
+
+    Subclasses implement `zones` and `apply_zone`, and may implement `get_txt`.
+
+    :ivar concurrency: Maximal number of zones changed at the same time.
+    :ivar cleanup_delay: Seconds deferred deletions are collected, before they are applied.
+    :ivar stats: Counters of transactions and changed values.
+    """
+    concurrency: int
+    cleanup_delay: float
+    stats: ProviderStatistics
+
+    def __init__(self, concurrency: int = 8, cleanup_delay: float = 30.0):
+        self.concurrency = concurrency
+        self.cleanup_delay = cleanup_delay
+        self.stats = ProviderStatistics()
+        self._pending_cleanup = ChangeSet()
+        self._cleanup_task: Task | None = None
+
+    @abstractmethod
+    def zones(self) -> Iterable[str]:
+        """
+        Names of the zones managed by the backend.
+        """
+        pass
+
+    @abstractmethod
+    async def apply_zone(self, zone: str, changes: ChangeSet):
+        """
+        Apply all changes of a zone as a single transaction.
+
+        :param zone: Name of the zone.
+        :ptype zone: str
+        :param changes: Changes of records within the zone.
+        :ptype changes: ChangeSet
+        """
+        pass
+
+    async def get_txt(self, name: str) -> set[str]:
+        """
+        Values of the TXT record set of a name, as published by the backend.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can't read records.")
+
+    def zone_of(self, name: str) -> str:
+        """
+        Find the zone of a record name, which is the longest managed zone the name belongs to.
+
+        :raises ValueError: If no managed zone contains the name.
+        """
+        name = normalize_name(name)
+        best = None
+        for zone in self.zones():
+            zone = normalize_name(zone)
+            if (name == zone or name.endswith("." + zone)) and (best is None or len(zone) > len(best)):
+                best = zone
+        if best is None:
+            raise ValueError(f"No zone managed by {type(self).__name__} contains {name}.")
+        return best
+
+    async def apply(self, changes: ChangeSet) -> dict[str, ChangeSet]:
+        """
+        Apply a change set, as one transaction per zone.
+
+        :param changes: Changes of records in any managed zones.
+        :ptype changes: ChangeSet
+        :return: The applied changes, split by zone.
+        :rtype: dict[str, ChangeSet]
+        """
+        zones = changes.split(self.zone_of)
+        semaphore = Semaphore(self.concurrency)
+
+        async def apply_zone(zone: str, zone_changes: ChangeSet):
+            async with semaphore:
+                await self.apply_zone(zone, zone_changes)
+            self.stats.transactions += 1
+            self.stats.upserts += sum(len(values) for values in zone_changes.upserts.values())
+            self.stats.deletions += sum(len(values) for values in zone_changes.deletions.values())
+
+        await gather(*[apply_zone(zone, zone_changes) for (zone, zone_changes) in zones.items()])
+        return zones
+
+    def defer_cleanup(self, records: ChangeSet | dict[str, Iterable[str]]):
+        """
+        Schedule the removal of records, to be applied together with other deferred removals.
+
+        :param records: Records to remove, given as change set (its upserts are removed as well), or as TXT values keyed by record name.
+        :ptype records: ChangeSet | dict[str, Iterable[str]]
+        """
+        if isinstance(records, ChangeSet):
+            for name, values in records.upserts.items():
+                for value in values:
+                    self._pending_cleanup.remove(name, value)
+            for name, values in records.deletions.items():
+                for value in values:
+                    self._pending_cleanup.remove(name, value)
+        else:
+            self._pending_cleanup.update(ChangeSet.from_records(records, delete=True))
+        if self._cleanup_task is None:
+            self._cleanup_task = create_task(self._cleanup_later())
+
+    async def _cleanup_later(self):
+        await sleep(self.cleanup_delay)
+        self._cleanup_task = None
+        try:
+            await self.cleanup()
+        except Exception:
+            self.stats.failed_cleanups += 1
+            _logger.exception("Deferred cleanup failed, retrying in %s seconds.", self.cleanup_delay)
+            if self._cleanup_task is None:
+                self._cleanup_task = create_task(self._cleanup_later())  # cleanup() has put the removals back
+
+    async def cleanup(self) -> dict[str, ChangeSet]:
+        """
+        Apply all deferred removals now.
+
+        :return: The applied changes, split by zone.
+        :rtype: dict[str, ChangeSet]
+        """
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+        changes, self._pending_cleanup = self._pending_cleanup, ChangeSet()
+        if not changes:
+            return dict()
+        try:
+            return await self.apply(changes)
+        except BaseException:
+            changes.update(self._pending_cleanup)  # Removals deferred meanwhile take precedence
+            self._pending_cleanup = changes
+            raise
+
+    async def close(self):
+        await self.cleanup()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
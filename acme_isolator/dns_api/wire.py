@@ -0,0 +1,219 @@
+import struct
+from asyncio import DatagramProtocol, Future, get_running_loop, open_connection, wait_for
+from dataclasses import dataclass, field
+from ipaddress import IPv4Address, IPv6Address
+from random import getrandbits
+
+A = 1
+NS = 2
+SOA = 6
+TXT = 16
+AAAA = 28
+
+FLAG_RESPONSE = 0x8000
+FLAG_AUTHORITATIVE = 0x0400
+FLAG_TRUNCATED = 0x0200
+FLAG_RECURSION_DESIRED = 0x0100
+
+_header = struct.Struct("!HHHHHH")
+_record = struct.Struct("!HHIH")
+
+
+@dataclass
+class Record:
+    """
+    Resource record of a DNS message. `data` is decoded for A, AAAA (address), NS (name) and TXT records (joined strings),
+    and kept as bytes otherwise.
+    """
+    name: str
+    type: int
+    ttl: int
+    data: str | bytes
+
+
+@dataclass
+class Message:
+    """
+    Parsed DNS message (RFC 1035 section 4.1), reduced to what is needed to check published records.
+    """
+    id: int
+    flags: int
+    questions: list[tuple[str, int]] = field(default_factory=list)
+    answers: list[Record] = field(default_factory=list)
+    authority: list[Record] = field(default_factory=list)
+
+    @property
+    def rcode(self) -> int:
+        return self.flags & 0xF
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.flags & FLAG_TRUNCATED)
+
+
+def encode_name(name: str) -> bytes:
+    """
+    Encode a domain name as sequence of labels, without compression.
+    """
+    result = bytearray()
+    for label in name.rstrip(".").split("."):
+        if label:
+            encoded = label.encode("idna") if not label.isascii() else label.encode("ascii")
+            result.append(len(encoded))
+            result += encoded
+    result.append(0)
+    return bytes(result)
+
+
+def encode_record(name: str, type: int, ttl: int, data: bytes) -> bytes:
+    return encode_name(name) + _record.pack(type, 1, ttl, len(data)) + data
+
+
+def encode_txt(value: str) -> bytes:
+    """
+    Encode a TXT value as rdata, split into character strings of at most 255 bytes.
+    """
+    value = value.encode("utf-8")
+    return b"".join(bytes([len(chunk)]) + chunk for chunk in (value[i:i + 255] for i in range(0, max(len(value), 1), 255)))
+
+
+def build_query(name: str, type: int, id: int | None = None, recursion: bool = False) -> tuple[int, bytes]:
+    """
+    Build a query for a single question of class IN.
+
+    :param recursion: Set the RD flag, for queries to a recursive resolver. Queries to authoritative servers don't need it.
+    :return: Message id and the encoded message.
+    :rtype: tuple[int, bytes]
+    """
+    id = getrandbits(16) if id is None else id
+    flags = FLAG_RECURSION_DESIRED if recursion else 0
+    return id, _header.pack(id, flags, 1, 0, 0, 0) + encode_name(name) + struct.pack("!HH", type, 1)
+
+
+def _decode_name(data: bytes, offset: int) -> tuple[str, int]:
+    labels = list()
+    end = None
+    jumps = 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            if jumps > 64:
+                raise ValueError("Compression loop in DNS message.")
+        elif length == 0:
+            offset += 1
+            break
+        else:
+            labels.append(data[offset + 1:offset + 1 + length].decode("ascii", errors="replace"))
+            offset += 1 + length
+    return ".".join(labels).lower(), offset if end is None else end
+
+
+def _decode_record(data: bytes, offset: int) -> tuple[Record, int]:
+    name, offset = _decode_name(data, offset)
+    type, klass, ttl, length = _record.unpack_from(data, offset)
+    offset += _record.size
+    rdata = data[offset:offset + length]
+    if type == A:
+        value = str(IPv4Address(rdata))
+    elif type == AAAA:
+        value = str(IPv6Address(rdata))
+    elif type == NS:
+        value = _decode_name(data, offset)[0]
+    elif type == TXT:
+        chunks, position = list(), 0
+        while position < len(rdata):
+            chunks.append(rdata[position + 1:position + 1 + rdata[position]])
+            position += 1 + rdata[position]
+        value = b"".join(chunks).decode("utf-8", errors="replace")
+    else:
+        value = rdata
+    return Record(name=name, type=type, ttl=ttl, data=value), offset + length
+
+
+def parse_message(data: bytes) -> Message:
+    """
+    Parse a DNS message. The additional section is ignored.
+
+    :raises ValueError: If the message is malformed.
+    """
+    try:
+        id, flags, qdcount, ancount, nscount, arcount = _header.unpack_from(data, 0)
+        message = Message(id=id, flags=flags)
+        offset = _header.size
+        for _ in range(qdcount):
+            name, offset = _decode_name(data, offset)
+            message.questions.append((name, struct.unpack_from("!H", data, offset)[0]))
+            offset += 4
+        for section, count in ((message.answers, ancount), (message.authority, nscount)):
+            for _ in range(count):
+                record, offset = _decode_record(data, offset)
+                section.append(record)
+        return message
+    except (IndexError, struct.error) as e:
+        raise ValueError("Malformed DNS message.") from e
+
+
+class _QueryProtocol(DatagramProtocol):
+    def __init__(self, id: int, future: Future):
+        self.id = id
+        self.future = future
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            message = parse_message(data)
+        except ValueError:
+            return
+        if message.id == self.id and message.flags & FLAG_RESPONSE and not self.future.done():
+            self.future.set_result(message)
+
+    def error_received(self, exc: Exception):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def query(server: str, name: str, type: int, port: int = 53, timeout: float = 2.0, recursion: bool = False) -> Message:
+    """
+    Send a single query over UDP, and repeat it over TCP, if the response is truncated.
+
+    :param server: IP address of the nameserver.
+    :ptype server: str
+    :param name: Domain name to query.
+    :ptype name: str
+    :param type: Record type to query, e.g. `TXT`.
+    :ptype type: int
+    :param port: Port of the nameserver.
+    :ptype port: int
+    :param timeout: Seconds to wait for the response.
+    :ptype timeout: float
+    :param recursion: Ask for recursion, for queries to a recursive resolver.
+    :ptype recursion: bool
+    :rtype: Message
+    :raises TimeoutError: If the server doesn't respond in time.
+    """
+    loop = get_running_loop()
+    id, data = build_query(name, type, recursion=recursion)
+    future = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _QueryProtocol(id, future), remote_addr=(server, port))
+    try:
+        transport.sendto(data)
+        message = await wait_for(future, timeout)
+    finally:
+        transport.close()
+    if message.truncated:
+        message = await wait_for(_query_tcp(server, port, data), timeout)
+    return message
+
+
+async def _query_tcp(server: str, port: int, data: bytes) -> Message:
+    reader, writer = await open_connection(server, port)
+    try:
+        writer.write(struct.pack("!H", len(data)) + data)
+        await writer.drain()
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+        return parse_message(await reader.readexactly(length))
+    finally:
+        writer.close()
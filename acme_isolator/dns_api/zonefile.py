@@ -0,0 +1,101 @@
+import os
+from asyncio import Lock, to_thread
+from collections.abc import Iterable
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from .provider import ChangeSet, DnsProvider, normalize_name
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    result, escaped = list(), False
+    for character in value:
+        if escaped or character != "\\":
+            result.append(character)
+            escaped = False
+        else:
+            escaped = True
+    return "".join(result)
+
+
+class ZoneFileProvider(DnsProvider):
+    """
+    Reference backend, keeping the TXT records of each zone in a master file (RFC 1035 section 5) named `<zone>.zone` in `directory`,
+    e.g. to be loaded by a local nameserver or a test.
+
+    Like an RFC 2136 update message, the changes of a zone are applied as a whole:
+    each change set rewrites the file of its zone once, and replaces it atomically, so readers never see a partially applied change set.
+    The serial in the header of the file is incremented with every change set.
+
+    :ivar directory: Directory holding the zone files.
+    :ivar ttl: TTL of the TXT records in seconds.
+    """
+    directory: Path
+    ttl: int
+
+    def __init__(self, directory: str | Path, zones: Iterable[str], ttl: int = 60, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._zones = [normalize_name(zone) for zone in zones]
+        self._locks = {zone: Lock() for zone in self._zones}
+
+    def zones(self) -> list[str]:
+        return self._zones
+
+    def path(self, zone: str) -> Path:
+        return self.directory / f"{normalize_name(zone)}.zone"
+
+    def _read(self, zone: str) -> tuple[int, dict[str, set[str]]]:
+        serial, records = 0, dict()
+        try:
+            with open(self.path(zone), "r") as f:
+                for line in f:
+                    if line.startswith("; serial "):
+                        serial = int(line.split()[2])
+                    elif line.strip() == "" or line.startswith(("$", ";")):
+                        continue
+                    else:
+                        name, ttl, klass, kind, value = line.split(maxsplit=4)
+                        if kind == "TXT":
+                            records.setdefault(normalize_name(name), set()).add(_unquote(value))
+        except FileNotFoundError:
+            pass
+        return serial, records
+
+    def _write(self, zone: str, serial: int, records: dict[str, set[str]]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(zone)
+        with NamedTemporaryFile("w", dir=self.directory, prefix=f".{path.name}.", delete=False) as f:
+            f.write(f"; serial {serial}\n$ORIGIN {zone}.\n$TTL {self.ttl}\n")
+            for name in sorted(records.keys()):
+                for value in sorted(records[name]):
+                    f.write(f"{name}. {self.ttl} IN TXT {_quote(value)}\n")
+        os.replace(f.name, path)
+
+    def _apply(self, zone: str, changes: ChangeSet):
+        serial, records = self._read(zone)
+        for name, values in changes.deletions.items():
+            remaining = records.get(name, set()) - values
+            if len(remaining) == 0:
+                records.pop(name, None)
+            else:
+                records[name] = remaining
+        for name, values in changes.upserts.items():
+            records.setdefault(name, set()).update(values)
+        self._write(zone, serial + 1, records)
+
+    async def apply_zone(self, zone: str, changes: ChangeSet):
+        async with self._locks[zone]:
+            await to_thread(self._apply, zone, changes)
+
+    async def get_txt(self, name: str) -> set[str]:
+        zone = self.zone_of(name)
+        serial, records = await to_thread(self._read, zone)
+        return records.get(normalize_name(name), set())
@@ -0,0 +1 @@
+from .pool import SshPool, SshTarget, SshStatistics, SshResult, Command, CommandResult, FileWrite
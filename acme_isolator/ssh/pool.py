@@ -0,0 +1,285 @@
+import posixpath
+from asyncio import Semaphore, Task, create_task, gather, shield
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from time import monotonic
+from uuid import uuid4
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+
+@dataclass(frozen=True)
+class SshTarget:
+    """
+    Host reachable over SSH. Targets are compared by value, so equal targets share a pooled connection.
+
+    :ivar host: Host name or address.
+    :ivar port: SSH port.
+    :ivar username: Login name. Defaults to the local user.
+    """
+    host: str
+    port: int = 22
+    username: str | None = None
+
+
+@dataclass(kw_only=True)
+class Command:
+    """
+    Shell command to run on a target, for `SshPool.run_batch`.
+    """
+    target: SshTarget
+    command: str
+    input: str | None = None
+
+
+@dataclass(kw_only=True)
+class FileWrite:
+    """
+    File to write on a target, for `SshPool.run_batch`. The file is replaced atomically.
+    """
+    target: SshTarget
+    path: str
+    data: bytes | str
+    mode: int = 0o644
+
+
+@dataclass(kw_only=True)
+class CommandResult:
+    exit_status: int
+    stdout: str
+    stderr: str
+
+
+@dataclass(kw_only=True)
+class SshResult:
+    """
+    Outcome of a single job of a batch run by `SshPool.run_batch`.
+
+    :ivar job: The job, this result belongs to.
+    :ivar result: Result of a command, or `None` for a file write and for failed jobs.
+    :ivar error: Exception raised by the job, if it failed.
+    """
+    job: Command | FileWrite
+    result: CommandResult | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class SshStatistics:
+    """
+    Counters of an `SshPool`.
+
+    :ivar handshakes: Number of connections established.
+    :ivar channels: Number of channels opened for commands.
+    :ivar file_writes: Number of files written.
+    :ivar reconnects: Number of connections, which were lost and had to be established again.
+    """
+    handshakes: int = 0
+    channels: int = 0
+    file_writes: int = 0
+    reconnects: int = 0
+
+
+@dataclass(eq=False)
+class _PooledConnection:
+    connection: "asyncssh.SSHClientConnection"
+    channels: Semaphore
+    sftp: "asyncssh.SFTPClient | None" = None
+    sftp_task: Task | None = None
+    last_used: float = field(default_factory=monotonic)
+
+
+class SshPool:
+    """
+    Pool of long-lived SSH connections, one per target, over which commands and file writes are multiplexed as channels,
+    so deploying challenge material to many hosts costs one handshake per host, instead of one per record.
+
+    Connecting is single-flight: concurrent jobs for a target, which isn't connected yet, wait for the same handshake.
+    Each connection carries up to `max_channels` channels at the same time (OpenSSH allows 10 sessions per connection by default),
+    further jobs for the same target wait for a free channel. Files are written through one SFTP session per connection.
+    A connection, which has been lost, is established again once, when the next job for its target fails.
+
+    Requires the optional `asyncssh` package.
+
+    :ivar max_channels: Maximal number of channels in use per connection.
+    :ivar connect_options: Keyword arguments for `asyncssh.connect`, e.g. `client_keys` and `known_hosts`.
+    :ivar stats: Counters of handshakes and channels.
+    """
+    max_channels: int
+    connect_options: dict
+    stats: SshStatistics
+
+    def __init__(self, max_channels: int = 10, **connect_options):
+        if asyncssh is None:
+            raise ImportError("SshPool requires the asyncssh package.")
+        self.max_channels = max_channels
+        self.connect_options = connect_options
+        self.stats = SshStatistics()
+        self._connections: dict[SshTarget, _PooledConnection] = dict()
+        self._connecting: dict[SshTarget, Task] = dict()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    async def _connect(self, target: SshTarget) -> _PooledConnection:
+        options = dict(self.connect_options)
+        if target.username is not None:
+            options["username"] = target.username
+        connection = await asyncssh.connect(target.host, port=target.port, **options)
+        self.stats.handshakes += 1
+        pooled = _PooledConnection(connection=connection, channels=Semaphore(self.max_channels))
+        self._connections[target] = pooled
+        return pooled
+
+    async def connection(self, target: SshTarget) -> _PooledConnection:
+        """
+        Get the pooled connection of a target, and establish it, if there is none yet.
+        """
+        pooled = self._connections.get(target, None)
+        if pooled is not None:
+            pooled.last_used = monotonic()
+            return pooled
+        task = self._connecting.get(target, None)
+        if task is None:
+            task = create_task(self._connect(target))
+            self._connecting[target] = task
+            task.add_done_callback(lambda t: self._connecting.pop(target, None))
+        return await shield(task)
+
+    def _drop(self, target: SshTarget, pooled: _PooledConnection):
+        if self._connections.get(target, None) is pooled:
+            del self._connections[target]
+            if pooled.sftp is not None:
+                pooled.sftp.exit()
+            pooled.connection.close()
+
+    async def _with_connection(self, target: SshTarget, operation):
+        pooled = await self.connection(target)
+        try:
+            return await operation(pooled)
+        except (asyncssh.DisconnectError, BrokenPipeError, ConnectionResetError):
+            self._drop(target, pooled)
+            self.stats.reconnects += 1
+            return await operation(await self.connection(target))
+
+    async def run(self, target: SshTarget, command: str, input: str | None = None, check: bool = True) -> CommandResult:
+        """
+        Run a command on a target, in a channel of the target's pooled connection.
+
+        :param target: Host to run the command on.
+        :ptype target: SshTarget
+        :param command: Shell command.
+        :ptype command: str
+        :param input: Data written to the standard input of the command.
+        :ptype input: str | None
+        :param check: Raise `asyncssh.ProcessError`, if the command exits with a non-zero status.
+        :ptype check: bool
+        :rtype: CommandResult
+        """
+        async def operation(pooled: _PooledConnection) -> CommandResult:
+            async with pooled.channels:
+                self.stats.channels += 1
+                process = await pooled.connection.run(command, input=input, check=check)
+            return CommandResult(exit_status=process.exit_status, stdout=process.stdout or "", stderr=process.stderr or "")
+
+        return await self._with_connection(target, operation)
+
+    async def _sftp(self, pooled: _PooledConnection) -> "asyncssh.SFTPClient":
+        async def start() -> "asyncssh.SFTPClient":
+            # start_sftp_client() returns an awaitable async context manager, not a coroutine, which create_task() would reject
+            return await pooled.connection.start_sftp_client()
+
+        if pooled.sftp is None:
+            task = pooled.sftp_task
+            if task is None:
+                task = pooled.sftp_task = create_task(start())
+            try:
+                pooled.sftp = await shield(task)
+            except BaseException:
+                if task.done() and pooled.sftp_task is task:
+                    pooled.sftp_task = None  # Let the next write try again
+                raise
+        return pooled.sftp
+
+    async def write_file(self, target: SshTarget, path: str, data: bytes | str, mode: int = 0o644):
+        """
+        Write a file on a target through the SFTP session of the target's pooled connection.
+        The data is written to a temporary file next to `path`, which then replaces `path`, so readers never see a partial file.
+
+        :param target: Host to write the file to.
+        :ptype target: SshTarget
+        :param path: Absolute path of the file.
+        :ptype path: str
+        :param data: Content of the file. Strings are encoded as UTF-8.
+        :ptype data: bytes | str
+        :param mode: Permissions of the file.
+        :ptype mode: int
+        """
+        data = data.encode("utf-8") if isinstance(data, str) else data
+        temporary = posixpath.join(posixpath.dirname(path), f".{posixpath.basename(path)}.{uuid4().hex}")
+
+        async def operation(pooled: _PooledConnection):
+            sftp = await self._sftp(pooled)
+            async with sftp.open(temporary, "wb") as f:
+                await f.write(data)
+            await sftp.chmod(temporary, mode)
+            await sftp.posix_rename(temporary, path)
+            self.stats.file_writes += 1
+
+        await self._with_connection(target, operation)
+
+    async def run_batch(self, jobs: Iterable[Command | FileWrite]) -> list[SshResult]:
+        """
+        Run many commands and file writes on many targets at once. All targets are connected concurrently,
+        and the jobs of each target share its connection, bounded by `max_channels`. A failing job doesn't stop the other jobs.
+
+        :param jobs: Commands and file writes.
+        :ptype jobs: Iterable[Command | FileWrite]
+        :return: One result per job, in the order of `jobs`.
+        :rtype: list[SshResult]
+        """
+        async def run_job(job: Command | FileWrite) -> SshResult:
+            try:
+                if isinstance(job, Command):
+                    return SshResult(job=job, result=await self.run(job.target, job.command, input=job.input, check=False))
+                await self.write_file(job.target, job.path, job.data, mode=job.mode)
+                return SshResult(job=job)
+            except Exception as e:
+                return SshResult(job=job, error=e)
+
+        return list(await gather(*[run_job(job) for job in jobs]))
+
+    async def close_idle(self, idle: float):
+        """
+        Close connections, which haven't been used for `idle` seconds.
+        """
+        now = monotonic()
+        for target, pooled in list(self._connections.items()):
+            if now - pooled.last_used >= idle:
+                await self._close(target, pooled)
+
+    async def _close(self, target: SshTarget, pooled: _PooledConnection):
+        if self._connections.get(target, None) is pooled:
+            del self._connections[target]
+        if pooled.sftp is not None:
+            pooled.sftp.exit()
+        pooled.connection.close()
+        await pooled.connection.wait_closed()
+
+    async def close(self):
+        for task in list(self._connecting.values()):
+            task.cancel()
+        await gather(*[self._close(target, pooled) for (target, pooled) in list(self._connections.items())])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,42 @@
+"""
+Measure the computation of dns-01 TXT records for a large batch of challenges,
+once canonicalizing and hashing the account key per challenge, and once with the thumbprint cached per key by `dns_01_records`.
+
+Run from the repository root: ``python -m benchmarks.bench_dns_records``
+"""
+from time import perf_counter
+from jwcrypto.jwk import JWK
+from acme_isolator.acme.objects.authorization import ACME_Authorization
+from acme_isolator.acme.objects.challenge import dns_01_records
+from acme_isolator.acme.request.jws import get_signer
+
+COUNT = 10000
+BASE = "https://acme.example.com/acme"
+
+
+def challenges() -> list:
+    result = list()
+    for i in range(COUNT):
+        authorization = ACME_Authorization.from_data({"url": f"{BASE}/authz/{i}", "status": "pending", "expires": None, "wildcard": False,
+                                                      "identifier": {"type": "dns", "value": f"host-{i}.example.com"},
+                                                      "challenges": [{"type": "dns-01", "url": f"{BASE}/chall/{i}", "token": f"{i:043d}", "status": "pending"}]}, parent=None)
+        result += list(authorization.challenges)
+    return result
+
+
+def measure(name: str, function):
+    start = perf_counter()
+    records = function()
+    elapsed = perf_counter() - start
+    print(f"{name:<36} {elapsed * 1e3:8.1f} ms for {len(records)} records")
+
+
+def main():
+    key = JWK.generate(kty="EC", crv="P-256")
+    batch = challenges()
+    measure("thumbprint per challenge", lambda: {c.record_name: c.txt_value(key.thumbprint()) for c in batch})
+    measure("dns_01_records, cached thumbprint", lambda: dns_01_records(batch, thumbprint=get_signer(key).thumbprint))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Measure how building and querying an `ElementList` scales with the number of elements,
+e.g. an `ACME_Orders` list of an account with tens of thousands of orders.
+The time per element should stay flat as the list grows.
+
+Run from the repository root: ``python -m benchmarks.bench_element_list``
+"""
+from time import perf_counter
+from acme_isolator.acme.objects.order import OrderSet, ACME_Order
+
+SIZES = (1000, 10000, 50000)
+BASE = "https://acme.example.com/acme/order/1234567890/"
+
+
+def bench(size: int):
+    urls = [f"{BASE}{i}" for i in range(size)]
+    start = perf_counter()
+    orders = OrderSet(urls, parent=None)
+    built = perf_counter()
+    for url in urls:
+        assert url in orders
+    looked_up = perf_counter()
+    for url in urls:
+        orders.add(ACME_Order(url=url, parent=None, status="pending", authorizations=[], identifiers=[], finalize=url + "/finalize"))
+    upgraded = perf_counter()
+    for url in urls:
+        orders.remove(url)
+    removed = perf_counter()
+    print(f"{size:>8} elements: "
+          f"build {(built - start) / size * 1e6:6.2f} us, "
+          f"contains {(looked_up - built) / size * 1e6:6.2f} us, "
+          f"upgrade {(upgraded - looked_up) / size * 1e6:6.2f} us, "
+          f"remove {(removed - upgraded) / size * 1e6:6.2f} us per element")
+
+
+def main():
+    for size in SIZES:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
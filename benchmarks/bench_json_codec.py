@@ -0,0 +1,51 @@
+"""
+Compare the installed JSON codecs on large responses (an orders list and authorizations) and on order payloads,
+decoding from and encoding to bytes as `Session` and `JwsBase` do.
+
+Run from the repository root: ``python -m benchmarks.bench_json_codec``
+"""
+from timeit import repeat
+from acme_isolator.acme.request.codec import available_codecs, get_codec
+
+BASE = "https://acme.example.com/acme"
+ROUNDS = 20
+
+
+def orders_list(count: int) -> dict:
+    return {"orders": [f"{BASE}/order/1234567890/{i}" for i in range(count)]}
+
+
+def authorization(i: int) -> dict:
+    return {"status": "pending", "expires": "2026-10-25T12:00:00Z", "wildcard": False,
+            "identifier": {"type": "dns", "value": f"host-{i}.example.com"},
+            "challenges": [{"type": kind, "url": f"{BASE}/chall/{i}/{kind}", "token": f"{'x' * 43}", "status": "pending"}
+                           for kind in ("http-01", "dns-01", "tls-alpn-01")]}
+
+
+def order_payload(count: int) -> dict:
+    return {"identifiers": [{"type": "dns", "value": f"host-{i}.example.com"} for i in range(count)], "notBefore": None, "notAfter": None}
+
+
+def bench(name: str, function) -> float:
+    best = min(repeat(function, number=ROUNDS, repeat=5)) / ROUNDS
+    print(f"  {name:<40} {best * 1e6:10.1f} us")
+    return best
+
+
+def main():
+    reference = get_codec("json")
+    documents = {"orders list, 10000 orders": orders_list(10000),
+                 "1000 authorizations": [authorization(i) for i in range(1000)],
+                 "order payload, 100 identifiers": order_payload(100)}
+    encoded = {name: reference.encode(document) for (name, document) in documents.items()}
+    for codec_name in available_codecs():
+        codec = get_codec(codec_name)
+        print(codec_name)
+        for name, document in documents.items():
+            assert codec.decode(encoded[name]) == document
+            bench(f"decode {name}", lambda: codec.decode(encoded[name]))
+            bench(f"encode {name}", lambda: codec.encode(document))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Compare the signing fast path of `JwsBase.build` with jwcrypto's generic `JWS` path for ES256.
+
+Run from the repository root: ``python -m benchmarks.bench_jws``
+"""
+from timeit import repeat
+from jwcrypto.jwk import JWK
+from acme_isolator.acme.request.jws import JwsKid, JwsJwk
+
+ROUNDS = 2000
+KID = "https://acme.example.com/acme/acct/1234567890"
+URL = "https://acme.example.com/acme/authz/abcdefghijklmnopqrstuvwxyz"
+NONCE = "oFvnlFP1wIhRlYS2jTaXbA"
+
+
+def bench(name: str, build) -> float:
+    best = min(repeat(build, number=ROUNDS, repeat=5)) / ROUNDS
+    print(f"{name:<32} {best * 1e6:8.1f} us/request")
+    return best
+
+
+def main():
+    key = JWK.generate(kty="EC", crv="P-256")
+    payload = {"identifiers": [{"type": "dns", "value": f"host-{i}.example.com"} for i in range(10)]}
+    for cls, kwargs in ((JwsKid, {"kid": KID}), (JwsJwk, {})):
+        fast = bench(f"{cls.__name__} fast path", lambda: cls(url=URL, key=key, payload=payload, **kwargs).build(NONCE))
+        generic = bench(f"{cls.__name__} jwcrypto path", lambda: cls(url=URL, key=key, payload=payload, **kwargs).build_jwcrypto(NONCE))
+        print(f"{cls.__name__} speedup: {generic / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure the memory used per order, authorization and challenge object with tracemalloc,
+for objects constructed the way responses of the server are parsed, once with the slotted layout of the ACME objects,
+and once with the same attributes stored in a `__dict__` per instance, as the objects did before they were slotted.
+The `__dict__` layout is measured by copying the attributes of each ACME object into an instance of a plain class,
+and replacing the size of the slotted instances by the size of the copies. The values themselves are shared by both layouts.
+
+Run from the repository root: ``python -m benchmarks.bench_object_memory``
+"""
+import gc
+import sys
+import tracemalloc
+from functools import cache
+from acme_isolator.acme.objects.order import ACME_Order
+from acme_isolator.acme.objects.authorization import ACME_Authorization
+from acme_isolator.acme.objects.base import ACME_Object
+
+COUNT = 10000
+BASE = "https://acme.example.com/acme"
+
+
+def order_data(i: int) -> dict:
+    return {"url": f"{BASE}/order/1234/{i}", "status": "pending", "expires": "2026-10-25T12:00:00Z",
+            "identifiers": [{"type": "dns", "value": f"host-{i}.example.com"}],
+            "authorizations": [f"{BASE}/authz/{i}"], "finalize": f"{BASE}/order/1234/{i}/finalize"}
+
+
+def authorization_data(i: int) -> dict:
+    return {"url": f"{BASE}/authz/{i}", "status": "pending", "expires": "2026-10-25T12:00:00Z", "wildcard": False,
+            "identifier": {"type": "dns", "value": f"host-{i}.example.com"},
+            "challenges": [{"type": kind, "url": f"{BASE}/chall/{i}/{kind}", "token": f"token-{i}-{kind}", "status": "pending"}
+                           for kind in ("http-01", "dns-01", "tls-alpn-01")]}
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, used
+
+
+@cache
+def slot_names(cls: type) -> tuple[str, ...]:
+    return tuple(name for base in reversed(cls.__mro__) for name in base.__dict__.get("__slots__", ()) if name != "__weakref__")
+
+
+@cache
+def dict_class(cls: type) -> type:
+    return type(cls.__name__, (), dict())
+
+
+def with_dict(o: ACME_Object) -> object:
+    """
+    Copy of an ACME object, with its attributes stored in a `__dict__`. Attributes are set in the same order for all objects of a class,
+    so the dictionaries share their keys, like those of instances of a dataclass without slots.
+    """
+    copy = dict_class(type(o))()
+    for name in slot_names(type(o)):
+        if hasattr(o, name):
+            setattr(copy, name, getattr(o, name))
+    return copy
+
+
+def measure(name: str, build, nested=lambda o: []) -> list:
+    objects, slotted = traced(lambda: [build(i) for i in range(COUNT)])
+    instances = [x for o in objects for x in [o, *nested(o)]]
+    copies, copied = traced(lambda: [with_dict(x) for x in instances])
+    unslotted = slotted - sum(sys.getsizeof(x) for x in instances) + copied - sys.getsizeof(copies)
+    print(f"{name:<40} {unslotted / COUNT:8.0f} -> {slotted / COUNT:8.0f} bytes/object ({1 - slotted / unslotted:4.0%} less)")
+    return objects
+def main():
+    print(f"{'':<40} {'__dict__':>8}    {'slotted':>8}")
+    measure("ACME_Order", lambda i: ACME_Order(parent=None, **order_data(i)))
+    measure("ACME_Authorization with 3 challenges", lambda i: ACME_Authorization(parent=None, **authorization_data(i)),
+            nested=lambda authorization: list(authorization.challenges))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Measure the issuance of many orders through an `IssuancePipeline`, once one order after the other, as a caller chaining the steps by hand would,
+and once with all orders flowing through the pipeline concurrently.
+The ACME server is an in-process stand-in, which answers every request after `LATENCY` seconds,
+and validates a challenge `VALIDATION_DELAY` seconds after it has been answered. The records are published to zone files.
+
+Run from the repository root: ``python -m benchmarks.bench_pipeline``
+"""
+import asyncio
+import json
+from base64 import urlsafe_b64decode
+from itertools import count
+from tempfile import TemporaryDirectory
+from time import monotonic, perf_counter
+from aiohttp import web
+from jwcrypto.jwk import JWK
+from acme_isolator.acme.objects.account import ACME_Account
+from acme_isolator.acme.objects.identifier import ACME_Identifier_DNS
+from acme_isolator.acme.objects.pipeline import IssuancePipeline
+from acme_isolator.acme.objects.poll import PollScheduler
+from acme_isolator.acme.request.session import Session
+from acme_isolator.dns_api import ZoneFileProvider
+
+ORDERS = 200
+LATENCY = 0.005
+VALIDATION_DELAY = 0.05
+EXPIRES = "2030-01-01T00:00:00Z"
+
+
+def _decode(segment: str) -> dict:
+    return json.loads(urlsafe_b64decode(segment + "=" * (-len(segment) % 4))) if segment else None
+
+
+class StandInServer:
+    """
+    Minimal ACME server, which knows just enough to let orders with dns-01 challenges become ready.
+    """
+
+    def __init__(self):
+        self.nonces = count()
+        self.orders: dict[str, list[dict]] = dict()
+        self.validated: dict[str, float | None] = dict()  # Challenge id to the time it becomes valid
+        self.app = web.Application()
+        self.app.router.add_get("/dir", self.directory)
+        self.app.router.add_route("HEAD", "/nonce", self.nonce)
+        self.app.router.add_post("/{kind}/{id}", self.post)
+        self.app.router.add_post("/new-order", self.new_order)
+        self.app.router.add_post("/new-account", self.new_account)
+
+    async def start(self) -> str:
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self.base + "/dir"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def respond(self, data: dict, status: int = 200, location: str | None = None) -> web.Response:
+        headers = {"Replay-Nonce": f"nonce-{next(self.nonces)}"}
+        if location is not None:
+            headers["Location"] = location
+        return web.json_response(data, status=status, headers=headers)
+
+    async def directory(self, request):
+        return web.json_response({"newNonce": self.base + "/nonce", "newAccount": self.base + "/new-account", "newOrder": self.base + "/new-order",
+                                  "revokeCert": self.base + "/revoke", "keyChange": self.base + "/key-change", "meta": {}})
+
+    async def nonce(self, request):
+        return web.Response(headers={"Replay-Nonce": f"nonce-{next(self.nonces)}"})
+
+    async def new_account(self, request):
+        return self.respond({"status": "valid", "contact": [], "orders": self.base + "/orders/1"}, location=self.base + "/account/1")
+
+    async def new_order(self, request):
+        await asyncio.sleep(LATENCY)
+        identifiers = _decode((await request.json())["payload"])["identifiers"]
+        order = str(len(self.orders))
+        self.orders[order] = identifiers
+        for i in range(len(identifiers)):
+            self.validated[f"{order}-{i}"] = None
+        return self.respond(self.order(order), status=201, location=f"{self.base}/order/{order}")
+
+    def order(self, order: str) -> dict:
+        identifiers = self.orders[order]
+        times = [self.validated[f"{order}-{i}"] for i in range(len(identifiers))]
+        ready = all(t is not None and t <= monotonic() for t in times)
+        return {"status": "ready" if ready else "pending", "expires": EXPIRES, "identifiers": identifiers, "finalize": f"{self.base}/finalize/{order}",
+                "authorizations": [f"{self.base}/authz/{order}-{i}" for i in range(len(identifiers))]}
+
+    def challenge(self, challenge: str) -> dict:
+        validated = self.validated[challenge]
+        status = "pending" if validated is None else "valid" if validated <= monotonic() else "processing"
+        return {"type": "dns-01", "url": f"{self.base}/chall/{challenge}", "token": f"token-{challenge}", "status": status}
+
+    async def post(self, request):
+        await asyncio.sleep(LATENCY)
+        kind, id = request.match_info["kind"], request.match_info["id"]
+        if kind == "order":
+            return self.respond(self.order(id))
+        order, i = id.split("-")
+        if kind == "authz":
+            challenge = self.challenge(id)
+            return self.respond({"status": "valid" if challenge["status"] == "valid" else "pending", "expires": EXPIRES, "wildcard": False,
+                                 "identifier": self.orders[order][int(i)], "challenges": [challenge]})
+        if self.validated[id] is None:
+            self.validated[id] = monotonic() + VALIDATION_DELAY
+        return self.respond(self.challenge(id))
+
+
+def orders() -> list[list[ACME_Identifier_DNS]]:
+    return [[ACME_Identifier_DNS(value=f"host-{i}.example.com"), ACME_Identifier_DNS(value=f"www.host-{i}.example.com")] for i in range(ORDERS)]
+
+
+async def measure(name: str, function):
+    server = StandInServer()
+    directory = await server.start()
+    with TemporaryDirectory() as directory_path:
+        async with Session(directory, poller=PollScheduler(min_interval=VALIDATION_DELAY, max_rate=1000, concurrency=64)) as session:
+            account = await ACME_Account.create_from_key(session, JWK.generate(kty="EC", crv="P-256"), contact=[])
+            async with ZoneFileProvider(directory_path, zones=["example.com"], cleanup_delay=0) as provider:
+                pipeline = IssuancePipeline(account, provider)
+                start = perf_counter()
+                jobs = await function(pipeline)
+                elapsed = perf_counter() - start
+    await server.stop()
+    assert all(job.ok for job in jobs)
+    print(f"{name:<28} {elapsed:6.2f} s for {len(jobs)} orders, {len(jobs) / elapsed:6.1f} orders/s")
+    for stage, stats in pipeline.stats.items():
+        print(f"    {stage:<10} {stats.throughput:7.1f} orders/s, at most {stats.max_queued} queued, {stats.busy:6.2f} s busy")
+
+
+async def one_by_one(pipeline: IssuancePipeline) -> list:
+    jobs = list()
+    for identifiers in orders():
+        jobs += await pipeline.issue([identifiers])
+    return jobs
+
+
+async def main():
+    await measure("one order after the other", one_by_one)
+    await measure("pipelined", lambda pipeline: pipeline.issue(orders()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
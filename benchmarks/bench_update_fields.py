@@ -0,0 +1,35 @@
+"""
+Measure the time of applying a poll response to an order with `update_fields`,
+once with an unchanged response and once with a status transition.
+
+Run from the repository root: ``python -m benchmarks.bench_update_fields``
+"""
+from asyncio import run
+from time import perf_counter
+from acme_isolator.acme.objects.order import ACME_Order
+
+COUNT = 100000
+BASE = "https://acme.example.com/acme"
+DATA = {"url": f"{BASE}/order/1", "status": "processing", "expires": "2026-10-25T12:00:00Z",
+        "identifiers": [{"type": "dns", "value": "host.example.com"}],
+        "authorizations": [f"{BASE}/authz/1"], "finalize": f"{BASE}/order/1/finalize"}
+
+
+async def measure(name: str, responses: list[dict]):
+    order = ACME_Order.from_data(DATA, parent=None)
+    changed = 0
+    start = perf_counter()
+    for data in responses:
+        if await order.update_fields(data):
+            changed += 1
+    elapsed = perf_counter() - start
+    print(f"{name:<30} {elapsed / len(responses) * 1e6:8.2f} us/update, {changed} changed")
+
+
+async def main():
+    await measure("unchanged", [DATA] * COUNT)
+    await measure("status transitions", [DATA | {"status": ("valid" if i % 2 else "processing")} for i in range(COUNT)])
+
+
+if __name__ == "__main__":
+    run(main())
@@ -5,6 +5,8 @@ import pytest_asyncio
 
 from acme_isolator.acme.objects.account import ACME_Account
 from acme_isolator.acme.objects.exceptions import AccountDoesNotExistException, UnauthorizedException
+from acme_isolator.acme.request.cache import WarmStartCache
+from acme_isolator.acme.request.session import Session
 from jwcrypto.jwk import JWK
 
 
@@ -54,4 +56,24 @@ class TestAccount:
             raise AssertionError("Old key is still accepted by the server")
         await ACME_Account.get_from_key(key=generate_key_pair[1], session=pebble_session.session)
 
+    @pytest.mark.asyncio
+    async def test_post_many(self, pebble_session):
+        results = await pebble_session.post_many([(pebble_session.url, None)] * 10 + [(pebble_session.url + "-missing", None)], concurrency=4)
+        assert len(results) == 11
+        assert all(result.ok for result in results[:10])
+        assert not results[10].ok
+        assert results[10].error is not None
 
+    @pytest.mark.asyncio
+    async def test_warm_start_cache(self, pebble_process, pebble_api_url, pebble_CA_injection, generate_key_pair, tmp_path):
+        cache = WarmStartCache(tmp_path / "cache.json")
+        async with Session(pebble_api_url, cache=cache) as session:
+            account = await ACME_Account.create_from_key(session=session, key=generate_key_pair[0], contact=["mailto:notmymail@example.com"])
+        cache = WarmStartCache(tmp_path / "cache.json")
+        async with Session(pebble_api_url, cache=cache) as session:
+            assert session.directory.newAccount == account.session.directory.newAccount
+            cached = await ACME_Account.get_from_key(session=session, key=generate_key_pair[0])
+            assert cached.from_cache
+            assert cached.url == account.url
+            await cached.update_account()
+            assert not cached.from_cache
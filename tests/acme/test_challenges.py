@@ -0,0 +1,38 @@
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+
+from jwcrypto.jwk import JWK
+
+from acme_isolator.acme.objects.authorization import ACME_Authorization
+from acme_isolator.acme.objects.challenge import ACME_Challenge, ACME_Challenge_dns_01, dns_01_records
+from acme_isolator.acme.request.jws import get_signer, jwk_thumbprint
+
+
+def authorization(value: str, wildcard: bool = False) -> ACME_Authorization:
+    return ACME_Authorization.from_data({"url": f"https://acme.example/authz/{value}", "status": "pending", "expires": None, "wildcard": wildcard,
+                                         "identifier": {"type": "dns", "value": value},
+                                         "challenges": [{"type": kind, "url": f"https://acme.example/chall/{value}/{kind}{wildcard}",
+                                                         "token": f"token-{kind}-{wildcard}", "status": "pending"}
+                                                        for kind in ("http-01", "dns-01")]}, parent=None)
+
+
+def test_thumbprint():
+    for key in (JWK.generate(kty="EC", crv="P-256"), JWK.generate(kty="RSA", size=2048), JWK.generate(kty="OKP", crv="Ed25519")):
+        assert jwk_thumbprint(key.export_public(as_dict=True)) == key.thumbprint()
+        assert get_signer(key).thumbprint is get_signer(key).thumbprint
+
+
+def test_dns_01():
+    thumbprint = jwk_thumbprint(JWK.generate(kty="EC", crv="P-256").export_public(as_dict=True))
+    base, wildcard = authorization("not-my.domain.com"), authorization("not-my.domain.com", wildcard=True)
+    challenges = {c.type: c for c in base.challenges}
+    assert type(challenges["http-01"]) is ACME_Challenge
+    assert type(challenges["dns-01"]) is ACME_Challenge_dns_01
+    assert challenges["http-01"].keyAuthorization(thumbprint) == f"token-http-01-False.{thumbprint}"
+    dns = challenges["dns-01"]
+    digest = sha256(f"token-dns-01-False.{thumbprint}".encode("ascii")).digest()
+    assert dns.txt_value(thumbprint) == urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+    assert dns.record_name == "_acme-challenge.not-my.domain.com"
+    records = dns_01_records([c for a in (base, wildcard) for c in a.challenges if c.type == "dns-01"], thumbprint=thumbprint)
+    assert list(records.keys()) == ["_acme-challenge.not-my.domain.com"]
+    assert len(set(records["_acme-challenge.not-my.domain.com"])) == 2
@@ -0,0 +1,39 @@
+import pytest
+
+from acme_isolator.acme.request.codec import available_codecs, get_codec
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codec_roundtrip(name):
+    codec = get_codec(name)
+    document = {"status": "pending", "identifiers": [{"value": "not-my.domain.com", "type": "dns"}], "notBefore": None, "wildcard": False}
+    encoded = codec.encode(document)
+    assert type(encoded) is bytes
+    assert encoded == get_codec("json").encode(document)
+    assert codec.decode(encoded) == document
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec("not-a-codec")
+
+
+def test_request_codec():
+    from jwcrypto.jwk import JWK
+    from acme_isolator.acme.request.codec import StdlibCodec
+    from acme_isolator.acme.request.jws import JwsKid
+
+    class CountingCodec(StdlibCodec):
+        encoded = 0
+
+        def encode(self, document) -> bytes:
+            self.encoded += 1
+            return super().encode(document)
+
+    codec = CountingCodec()
+    request = JwsKid(url="https://acme.example/order/1", kid="https://acme.example/acct/1", key=JWK.generate(kty="EC", crv="P-256"),
+                     payload={"status": "deactivated"})
+    request.build("nonce", codec=codec)
+    assert codec.encoded == 2  # Payload and protected header
+    request.build("nonce", codec=codec)
+    assert codec.encoded == 3  # The payload is only encoded once
@@ -26,3 +26,34 @@ def test_jwk_sign(generate_key_pair, random_payload, random_nonce):
 def test_kid_string_constructor(generate_key_pair, random_payload_str, random_nonce):
     jws.JwsKid(nonce=random_nonce, kid="46590455", key=generate_key_pair, payload=random_payload_str, url="https://example.com/example_url")
 
+
+
+@pytest.mark.parametrize("build", ["build", "build_jwcrypto"])
+def test_kid_sign_verifies(generate_key_pair, random_payload, random_nonce, build):
+    from jwcrypto.jws import JWS
+    key = generate_key_pair[0]
+    request = jws.JwsKid(kid="https://example.com/acct/1", key=key, payload=random_payload, url="https://example.com/example_url")
+    serialized = JWS()
+    serialized.deserialize(getattr(request, build)(random_nonce).decode("utf-8"))
+    serialized.verify(key)
+    assert serialized.jose_header["nonce"] == random_nonce
+    assert serialized.jose_header["kid"] == "https://example.com/acct/1"
+
+
+@pytest.mark.parametrize("key_parameters, alg", [({"kty": "EC", "crv": "P-256"}, "ES256"),
+                                                 ({"kty": "EC", "crv": "P-384"}, "ES384"),
+                                                 ({"kty": "RSA", "size": 2048}, "RS256"),
+                                                 ({"kty": "RSA", "size": 2048, "alg": "PS256"}, "PS256"),
+                                                 ({"kty": "OKP", "crv": "Ed25519"}, "EdDSA")])
+@pytest.mark.asyncio
+async def test_algorithm_from_key(key_parameters, alg, random_payload, random_nonce):
+    from concurrent.futures import ThreadPoolExecutor
+    from jwcrypto.jwk import JWK
+    from jwcrypto.jws import JWS
+    key = JWK.generate(**key_parameters)
+    request = jws.JwsKid(kid="https://example.com/acct/1", key=key, payload=random_payload, url="https://example.com/example_url")
+    assert request.alg == alg
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        serialized = JWS()
+        serialized.deserialize((await request.build_async(random_nonce, executor)).decode("utf-8"))
+    serialized.verify(key, alg=alg)
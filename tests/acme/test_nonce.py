@@ -61,3 +61,81 @@ async def test_nonce_exhaustion(aiosession, pebble_directory, event_loop):
     async with nonceManager:
         for _ in range(11):
             await nonceManager.get_nonce()
+
+
+@pytest.mark.asyncio
+async def test_nonce_statistics(aiosession, pebble_directory, event_loop):
+    asyncio.set_event_loop(event_loop)
+    url = pebble_directory.newNonce
+    nonceManager = NonceManager(url=url, session=aiosession)
+    async with nonceManager:
+        await asyncio.sleep(5)
+        assert not nonceManager._demand.is_set()
+        for _ in range(20):
+            await nonceManager.get_nonce()
+        assert nonceManager.stats.hits + nonceManager.stats.misses == 20
+        assert nonceManager.stats.fetched >= 20
+        assert nonceManager.stats.wait_time >= 0
+
+
+@pytest.mark.asyncio
+async def test_nonce_freshness(aiosession, pebble_directory, event_loop):
+    asyncio.set_event_loop(event_loop)
+    url = pebble_directory.newNonce
+    nonceManager = NonceManager(url=url, session=aiosession, max_age=2)
+    async with nonceManager:
+        await asyncio.sleep(1)
+        nonceManager.put_nonce("most-recent")
+        assert await nonceManager.get_nonce() == "most-recent"
+        await asyncio.sleep(3)
+        assert await nonceManager.get_nonce() is not None
+        assert nonceManager.stats.expired >= 9
+
+
+@pytest_asyncio.fixture
+async def failing_nonce_url():
+    from aiohttp import web
+
+    async def unavailable(request):
+        return web.Response(status=503)
+
+    released = asyncio.Event()
+
+    async def hanging(request):
+        await released.wait()
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_route("HEAD", "/unavailable", unavailable)
+    app.router.add_route("HEAD", "/hanging", hanging)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    released.set()
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_nonce_fetch_failure(failing_nonce_url):
+    async with ClientSession() as session:
+        async with NonceManager(url=failing_nonce_url + "/unavailable", session=session) as nonceManager:
+            results = await asyncio.wait_for(asyncio.gather(*[nonceManager.get_nonce() for _ in range(5)], return_exceptions=True), 5)
+            assert all(isinstance(result, ConnectionError) for result in results)
+        async with NonceManager(url=failing_nonce_url + "/hanging", session=session) as nonceManager:
+            for _ in range(2):
+                with pytest.raises(TimeoutError):
+                    await asyncio.wait_for(nonceManager.get_nonce(), 0.2)
+            assert nonceManager.stats.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_nonce_without_new_nonce(failing_nonce_url):
+    async with ClientSession() as session:
+        async with NonceManager(url=failing_nonce_url + "/unavailable", session=session) as nonceManager:
+            with pytest.raises(ConnectionError):
+                await nonceManager.get_nonce()
+            nonceManager.put_nonce("harvested")
+            assert await nonceManager.get_nonce() == "harvested"
@@ -1,10 +1,14 @@
+import sys
+import weakref
+
 import pytest
 import pytest_asyncio
 
 from acme_isolator.acme.objects.base import AcmeUrlBase, ElementList
 from acme_isolator.acme.objects.account import ACME_Account
-from acme_isolator.acme.objects.order import ACME_Orders, ACME_Order, OrderStatus
+from acme_isolator.acme.objects.order import ACME_Orders, ACME_Order, OrderSet, OrderStatus
 from acme_isolator.acme.objects.identifier import ACME_Identifier_DNS
+from acme_isolator.acme.objects.authorization import ACME_Authorization
 
 
 class TestOrderCreation:
@@ -57,6 +61,18 @@ class TestOrderCreation:
         for auth in order.authorizations:
             assert isinstance(auth, AcmeUrlBase)
 
+    @pytest.mark.pebble
+    @pytest.mark.asyncio
+    async def test_order_creation_prefetch(self, pebble_session):
+        pebble_session.orders = await pebble_session.orders.request_object(parent=pebble_session)
+        identifiers = [ACME_Identifier_DNS(value="not-my.domain.com"),
+                       ACME_Identifier_DNS(value="subdomain-of.not-my.domain.com")]
+        order = await pebble_session.orders.create_order(identifiers=identifiers, prefetch=("authorizations", "authorizations.challenges"))
+        assert len(order.authorizations) == 2
+        for auth in order.authorizations:
+            assert type(auth) is ACME_Authorization
+            assert len(auth.challenges) > 0
+
 
 class TestOrderProperties:
 
@@ -67,3 +83,86 @@ class TestOrderProperties:
         identifiers = [ACME_Identifier_DNS(value="not-my.domain.com")]
         order = await pebble_session.orders.create_order(identifiers=identifiers)
         assert isinstance(order.status, OrderStatus)
+
+    @pytest.mark.pebble
+    @pytest.mark.asyncio
+    async def test_order_list_iteration(self, pebble_session):
+        pebble_session.orders = await pebble_session.orders.request_object(parent=pebble_session)
+        identifiers = [ACME_Identifier_DNS(value="not-my.domain.com")]
+        order = await pebble_session.orders.create_order(identifiers=identifiers)
+        urls = [url async for url in pebble_session.orders.iter_order_urls()]
+        assert order.url in urls
+        for url in urls:
+            assert type(url) is ACME_Order.url_class
+
+    @pytest.mark.pebble
+    @pytest.mark.asyncio
+    async def test_authorization_resolution(self, pebble_session):
+        pebble_session.orders = await pebble_session.orders.request_object(parent=pebble_session)
+        identifiers = [ACME_Identifier_DNS(value=f"host-{i}.not-my.domain.com") for i in range(5)]
+        order = await pebble_session.orders.create_order(identifiers=identifiers)
+        resolved = [auth async for auth in order.authorizations.iter_requested_elements(concurrency=2)]
+        assert len(resolved) == 5
+        for auth in order.authorizations:
+            assert isinstance(auth, ACME_Authorization)
+            assert len(auth.challenges) > 0
+        assert await order.authorizations.update_all_elements(concurrency=2) == {}
+
+
+class TestOrderSet:
+
+    def test_url_index(self):
+        urls = [f"https://acme.example/order/{i}" for i in range(5)]
+        orders = OrderSet(urls + urls[:2], parent=None)
+        assert len(orders) == 5
+        assert urls[3] in orders
+        order = ACME_Order(url=urls[1], parent=None, status="pending", authorizations=[], identifiers=[], finalize=urls[1] + "/finalize")
+        orders.add(order)
+        orders.add(urls[1])
+        assert orders.get(urls[1]) is order
+        assert [str(o.url) for o in orders] == urls
+        orders.remove(urls[0])
+        orders.discard(urls[0])
+        assert urls[0] not in orders
+        assert len(orders) == 4
+
+    def test_compact_layout(self):
+        order = ACME_Order(url="https://acme.example/order/1", parent=None, status="pending", expires="2026-10-25T12:00:00Z",
+                           authorizations=["https://acme.example/authz/1"], identifiers=[{"type": "dns", "value": "not-my.domain.com"}],
+                           finalize="https://acme.example/order/1/finalize")
+        assert not hasattr(order, "__dict__")
+        assert weakref.ref(order)() is order
+        assert order.status is OrderStatus.ORDER_PENDING
+        assert order.expires is sys.intern("2026-10-25T12:00:00Z")
+        order.status = "ready"
+        assert order.status is OrderStatus.ORDER_READY
+
+    def test_change_set(self):
+        data = {"url": "https://acme.example/order/1", "status": "pending", "authorizations": ["https://acme.example/authz/1"],
+                "identifiers": [{"type": "dns", "value": "not-my.domain.com"}], "finalize": "https://acme.example/order/1/finalize"}
+        order = ACME_Order.from_data(data, parent=None)
+        assert order.apply_fields(data) == {}
+        changes = order.apply_fields(data | {"status": "valid", "certificate": "https://acme.example/cert/1", "unknown": 1})
+        assert changes.keys() == {"status", "certificate"}
+        assert changes["status"] == (OrderStatus.ORDER_PENDING, OrderStatus.ORDER_VALID)
+        old, new = order.apply_fields({"authorizations": ["https://acme.example/authz/2"]})["authorizations"]
+        assert old == ("https://acme.example/authz/1",)
+        assert new == ("https://acme.example/authz/1", "https://acme.example/authz/2")
+        assert len(order.authorizations) == 2
+        assert order.apply_fields({"authorizations": ["https://acme.example/authz/2"]}) == {}
+
+class TestOrderPolling:
+
+    @pytest.mark.pebble
+    @pytest.mark.asyncio
+    async def test_poll_timeout(self, pebble_session):
+        pebble_session.orders = await pebble_session.orders.request_object(parent=pebble_session)
+        order = await pebble_session.orders.create_order(identifiers=[ACME_Identifier_DNS(value="not-my.domain.com")])
+        poller = pebble_session.session.poller
+        assert await order.wait_for_status(OrderStatus.ORDER_PENDING) is order
+        with pytest.raises(TimeoutError):
+            await order.wait_for_status(OrderStatus.ORDER_READY, timeout=3)
+        assert poller.stats.polls > 0
+        assert len(poller) == 0
+        assert pebble_session.session.objects.size.pinned == 0
+
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+import pytest_asyncio
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwcrypto.common import base64url_encode
+
+from acme_isolator.acme.objects.account import ACME_Account
+from acme_isolator.acme.objects.identifier import ACME_Identifier_DNS
+from acme_isolator.acme.objects.order import ACME_Order, OrderStatus
+from acme_isolator.acme.objects.pipeline import IssuancePipeline
+from acme_isolator.acme.request.session import Session
+from acme_isolator.dns_api import ZoneFileProvider
+from .pebble_fixtures import PebbleStarter
+
+
+class AlwaysValidPebbleStarter(PebbleStarter):
+    env = dict(os.environ, PEBBLE_VA_ALWAYS_VALID="1", PEBBLE_VA_NOSLEEP="1")  # Pebble can't resolve the records of the zone file
+
+
+@pytest.fixture(scope="module")
+def pebble_process_always_valid(xprocess):
+    process_name = "pebble-always-valid"
+    xprocess.ensure(process_name, AlwaysValidPebbleStarter)
+    yield
+    xprocess.getinfo(process_name).terminate()
+
+
+@pytest_asyncio.fixture()
+async def always_valid_account(pebble_process_always_valid, pebble_CA_injection, pebble_api_url, generate_key_pair) -> ACME_Account:
+    async with Session(pebble_api_url) as session:
+        yield await ACME_Account.create_from_key(session=session, key=generate_key_pair[0], contact=["mailto:notmymail@example.com"])
+
+
+async def finalize(order: ACME_Order) -> str:
+    names = [x509.DNSName(identifier.value) for identifier in order.identifiers]
+    csr = x509.CertificateSigningRequestBuilder().subject_name(x509.Name([])).add_extension(x509.SubjectAlternativeName(names), critical=False) \
+        .sign(ec.generate_private_key(ec.SECP256R1()), hashes.SHA256())
+    resp, status, location = await order.account.post(order.finalize, payload={"csr": base64url_encode(csr.public_bytes(serialization.Encoding.DER))})
+    await order.update_fields(resp)
+    await order.wait_for_status(OrderStatus.ORDER_VALID, timeout=60)
+    return order.certificate
+
+
+@pytest.mark.pebble
+@pytest.mark.asyncio
+async def test_pipeline(always_valid_account, tmp_path):
+    async with ZoneFileProvider(tmp_path, zones=["not-my.domain.com"], cleanup_delay=0) as provider:
+        pipeline = IssuancePipeline(always_valid_account, provider, finalizer=finalize, queue_size=2, validation_timeout=60)
+        orders = [[ACME_Identifier_DNS(value=f"host-{i}.not-my.domain.com"), ACME_Identifier_DNS(value=f"www.host-{i}.not-my.domain.com")]
+                  for i in range(10)]
+        jobs = await pipeline.issue(orders)
+        assert [job.index for job in jobs] == list(range(10))
+        for job in jobs:
+            assert job.ok, job.error
+            assert job.order.status is OrderStatus.ORDER_VALID
+            assert len(job.challenges) == 2
+            assert job.result.startswith("https://")
+        for stage in ("order", "deploy", "respond", "validate", "finalize"):
+            assert pipeline.stats[stage].completed == 10
+            assert pipeline.stats[stage].failed == 0
+            assert pipeline.stats[stage].queued == 0
+    assert "TXT" not in (tmp_path / "not-my.domain.com.zone").read_text()
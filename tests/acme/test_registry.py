@@ -0,0 +1,69 @@
+import asyncio
+import gc
+import pytest
+
+from time import monotonic
+
+from acme_isolator.acme.objects.registry import ObjectRegistry
+from acme_isolator.acme.objects.order import ACME_Order
+
+
+def make_order(i: int) -> ACME_Order:
+    return ACME_Order(url=f"https://acme.example/order/{i}", parent=None, status="pending", authorizations=[], identifiers=[],
+                      finalize=f"https://acme.example/order/{i}/finalize")
+
+
+def test_identity():
+    registry = ObjectRegistry()
+    order = registry.add(make_order(0))
+    assert registry.get(order.url) is order
+    assert order.url in registry
+    assert registry.get("https://acme.example/order/1") is None
+
+
+def test_bounded():
+    registry = ObjectRegistry(max_recent=10)
+    for i in range(1000):
+        registry.add(make_order(i))
+    gc.collect()
+    assert registry.size.recent == 10
+    assert len(registry) == 10
+    assert registry.get("https://acme.example/order/999") is not None
+    assert registry.get("https://acme.example/order/0") is None
+
+
+def test_pinning():
+    registry = ObjectRegistry(max_recent=0)
+    pinned = make_order(0)
+    with registry.pinned(pinned):
+        del pinned
+        registry.add(make_order(1))
+        gc.collect()
+        assert registry.get("https://acme.example/order/0") is not None
+        assert registry.get("https://acme.example/order/1") is None
+        assert registry.size.pinned == 1
+    gc.collect()
+    assert len(registry) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    registry = ObjectRegistry(freshness=60)
+    requests = 0
+
+    async def request():
+        nonlocal requests
+        requests += 1
+        await asyncio.sleep(0.05)
+        order = registry.add(make_order(0))
+        order._fetched = monotonic()
+        return order
+
+    results = await asyncio.gather(*[registry.fetch("https://acme.example/order/0", request) for _ in range(10)])
+    assert requests == 1
+    assert registry.coalesced == 9
+    assert all(result is results[0] for result in results)
+    assert await registry.fetch("https://acme.example/order/0", request) is results[0]
+    assert requests == 1
+    await registry.fetch("https://acme.example/order/0", request, freshness=0)
+    assert requests == 2
@@ -0,0 +1,37 @@
+import pytest
+
+from acme_isolator.acme.request.retry import RetryPolicy, RetryRule, parse_retry_after
+from acme_isolator.acme.objects.exceptions import BadNonceException, RateLimitedException, ServerInternalException, MalformedException
+
+
+def test_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+
+
+def test_retry_after_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_retry_after_respected():
+    e = RateLimitedException({"type": RateLimitedException.type, "detail": "slow down"})
+    e.retry_after = 42.0
+    retries = RetryPolicy(rules={RateLimitedException: RetryRule(attempts=1, base_delay=1.0, jitter=0.0)}).start()
+    assert retries.next_delay(e) == 42.0
+    assert retries.next_delay(e) is None
+
+
+def test_unlisted_problem_not_retried():
+    e = MalformedException({"type": MalformedException.type, "detail": "malformed"})
+    assert RetryPolicy().start().next_delay(e) is None
+
+
+def test_retry_budget():
+    e = ServerInternalException({"type": ServerInternalException.type, "detail": "boom"})
+    b = BadNonceException({"type": BadNonceException.type, "detail": "bad nonce"})
+    retries = RetryPolicy(budget=3).start()
+    delays = [retries.next_delay(e), retries.next_delay(b), retries.next_delay(b)]
+    assert None not in delays
+    assert delays[0] <= 1.0
+    assert retries.next_delay(b) is None
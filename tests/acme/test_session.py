@@ -33,3 +33,24 @@ async def test_session_count(event_loop, pebble_CA_injection, pebble_api_url, pe
     loop = event_loop
     async with Session(pebble_api_url) as session:
         assert len(set(session.sessions.keys())) == 1
+
+
+@pytest.mark.asyncio
+async def test_nonce_pool_per_origin(event_loop, pebble_CA_injection, pebble_api_url, pebble_process):
+    asyncio.set_event_loop(event_loop)
+    async with Session(pebble_api_url) as session:
+        assert len(session.nonce_pools) == 1
+        assert await session.get_nonce_pool(session.directory.newOrder) is session.nonce_pool
+        assert len(session.nonce_pools) == 1
+    assert len(session.nonce_pools) == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_connector(event_loop, pebble_CA_injection, pebble_api_url, pebble_process):
+    asyncio.set_event_loop(event_loop)
+    async with Session(pebble_api_url) as session:
+        await session.check_session("https://127.0.0.1:14000/")
+        assert len(session.sessions) == 2
+        for client_session in session.sessions.values():
+            assert client_session.connector is session.connector
+    assert session.connector.closed
@@ -0,0 +1,48 @@
+import pytest
+
+from acme_isolator.acme.objects.store import StateStore
+from acme_isolator.acme.objects.order import ACME_Order
+
+ACCOUNT = "https://acme.example/acct/1"
+
+
+def order_data(i: int, status: str) -> dict:
+    return {"url": f"https://acme.example/order/{i}", "status": status, "authorizations": [], "identifiers": [],
+            "finalize": f"https://acme.example/order/{i}/finalize"}
+
+
+@pytest.mark.asyncio
+async def test_batched_writes(tmp_path):
+    store = StateStore(tmp_path / "state.db", flush_interval=60, batch_size=4)
+    for i in range(3):
+        data = order_data(i, "valid" if i else "pending")
+        store.put(ACME_Order.from_data(data, parent=None), data, account=ACCOUNT)
+    assert store.stats.flushes == 0
+    assert (await store.get(order_data(1, "valid")["url"])).final
+    data = order_data(0, "ready")
+    store.put(ACME_Order.from_data(data, parent=None), data, account=ACCOUNT)  # Replaces the queued state
+    await store.close()
+    assert store.stats.writes == 3
+
+    store = StateStore(tmp_path / "state.db")
+    assert await store.urls(ACME_Order, account=ACCOUNT) == [order_data(i, "")["url"] for i in range(3)]
+    assert await store.urls(ACME_Order, account=ACCOUNT + "-other") == []
+    state = await store.get(order_data(0, "")["url"])
+    assert state.data["status"] == "ready"
+    assert not state.final
+    assert "url" not in state.data
+    assert await store.get("https://acme.example/order/missing") is None
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_cancels_timer(tmp_path):
+    store = StateStore(tmp_path / "state.db", flush_interval=60)
+    data = order_data(0, "pending")
+    store.put(ACME_Order.from_data(data, parent=None), data, account=ACCOUNT)
+    timer = store._flush_task
+    await store.flush()
+    assert store._flush_task is None
+    assert timer.cancelling()
+    assert store.stats.writes == 1
+    await store.close()
@@ -0,0 +1,99 @@
+import asyncio
+import struct
+
+import pytest
+import pytest_asyncio
+
+from acme_isolator.dns_api import PropagationChecker
+from acme_isolator.dns_api.wire import A, NS, TXT, FLAG_AUTHORITATIVE, FLAG_RESPONSE, encode_name, encode_record, encode_txt, parse_message
+
+
+class StandInServer(asyncio.DatagramProtocol):
+    """
+    Minimal in-process nameserver, answering from a dictionary of (name, type) to record data.
+    """
+
+    def __init__(self, records: dict[tuple[str, int], list[bytes]]):
+        self.records = records
+        self.queries = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        query = parse_message(data)
+        name, kind = query.questions[0]
+        answers = [encode_record(name, kind, 60, rdata) for rdata in self.records.get((name, kind), [])]
+        header = struct.pack("!HHHHHH", query.id, FLAG_RESPONSE | FLAG_AUTHORITATIVE, 1, len(answers), 0, 0)
+        self.transport.sendto(header + encode_name(name) + struct.pack("!HH", kind, 1) + b"".join(answers), addr)
+
+
+@pytest_asyncio.fixture
+async def nameservers():
+    loop = asyncio.get_running_loop()
+    records = {("example.com", NS): [encode_name("ns1.example.com"), encode_name("ns2.example.com")],
+               ("ns1.example.com", A): [bytes([127, 0, 0, 1])], ("ns2.example.com", A): [bytes([127, 0, 0, 2])]}
+    first_transport, first = await loop.create_datagram_endpoint(lambda: StandInServer(dict(records)), local_addr=("127.0.0.1", 0))
+    port = first_transport.get_extra_info("sockname")[1]
+    second_transport, second = await loop.create_datagram_endpoint(lambda: StandInServer(dict(records)), local_addr=("127.0.0.2", port))
+    yield port, first, second
+    first_transport.close()
+    second_transport.close()
+
+
+@pytest.mark.asyncio
+async def test_propagation(nameservers):
+    port, first, second = nameservers
+    name = "_acme-challenge.host.example.com"
+    for server in (first, second):
+        server.records[(name, TXT)] = [encode_txt("apex")]
+    first.records[(name, TXT)].append(encode_txt("wildcard"))
+    first.records[("_acme-challenge.example.org", TXT)] = [encode_txt("org")]
+    checker = PropagationChecker(resolver="127.0.0.1", port=port, interval=0.05, query_timeout=0.5, nameservers={"example.org": ["127.0.0.1"]})
+
+    async def publish_later():
+        await asyncio.sleep(0.2)
+        second.records[(name, TXT)].append(encode_txt("wildcard"))
+
+    publisher = asyncio.create_task(publish_later())
+    timings = await checker.wait({name: ["apex", "wildcard"], "_acme-challenge.example.org": ["org"]}, timeout=5)
+    await publisher
+    assert timings.keys() == {"example.com", "example.org"}
+    assert sorted(timings["example.com"].nameservers) == ["127.0.0.1", "127.0.0.2"]
+    assert timings["example.com"].rounds > 1
+    assert timings["example.com"].elapsed >= 0.2
+    assert timings["example.org"].rounds == 1
+
+    queries = first.queries
+    await checker.wait({name: ["apex"]}, timeout=5)
+    assert first.queries == queries + 1  # Zone and nameservers are cached, only the record is queried
+
+    queries = first.queries
+    names = [f"_acme-challenge.host-{i}.example.com" for i in range(50)]
+    assert await asyncio.gather(*[checker.find_zone(name) for name in names]) == ["example.com"] * 50
+    assert first.queries == queries + 100  # Each new name is looked up once, the known zone is cached
+
+    with pytest.raises(TimeoutError):
+        await checker.wait({name: ["missing"]}, timeout=0.3)
+
+
+@pytest.mark.asyncio
+async def test_delegated_zone(nameservers):
+    port, first, second = nameservers
+    name = "_acme-challenge.example.com"
+    first.records[(name, NS)] = [encode_name("ns3.example.com")]
+    first.records[("ns3.example.com", A)] = [bytes([127, 0, 0, 3])]
+    delegated_transport, delegated = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: StandInServer({(name, TXT): [encode_txt("token")]}), local_addr=("127.0.0.3", port))
+    try:
+        checker = PropagationChecker(resolver="127.0.0.1", port=port, interval=0.05, query_timeout=0.5)
+        assert await checker.find_zone("_acme-challenge.www.example.com") == "example.com"
+        queries = first.queries
+        assert await asyncio.gather(*[checker.find_zone(name) for _ in range(10)]) == [name] * 10
+        assert first.queries == queries + 1  # Concurrent lookups share one query
+        timings = await checker.wait({name: ["token"]}, timeout=5)
+        assert timings[name].nameservers == ["127.0.0.3"]
+        assert delegated.queries == 1
+    finally:
+        delegated_transport.close()
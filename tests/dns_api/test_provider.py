@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from acme_isolator.dns_api import ChangeSet, ZoneFileProvider
+
+
+def test_change_set():
+    changes = ChangeSet.from_records({"_acme-challenge.Example.com.": ["a", "b"]})
+    changes.remove("_acme-challenge.example.com", "b")
+    assert changes.upserts == {"_acme-challenge.example.com": {"a"}}
+    assert changes.deletions == {"_acme-challenge.example.com": {"b"}}
+    assert len(changes) == 2
+    zones = ChangeSet.from_records({"_acme-challenge.a.example.com": ["x"], "_acme-challenge.example.org": ["y"]}).split(
+        lambda name: ".".join(name.split(".")[-2:]))
+    assert zones.keys() == {"example.com", "example.org"}
+
+
+@pytest.mark.asyncio
+async def test_zone_file_provider(tmp_path):
+    async with ZoneFileProvider(tmp_path, zones=["example.com", "sub.example.com", "example.org"]) as provider:
+        records = {f"_acme-challenge.host-{i}.example.com": ["apex", "wildcard"] for i in range(100)}
+        records["_acme-challenge.host.sub.example.com"] = ["sub"]
+        records["_acme-challenge.example.org"] = ["org"]
+        zones = await provider.apply(ChangeSet.from_records(records))
+        assert zones.keys() == {"example.com", "sub.example.com", "example.org"}
+        assert provider.stats.transactions == 3
+        assert await provider.get_txt("_acme-challenge.host-7.example.com") == {"apex", "wildcard"}
+        assert await provider.get_txt("_acme-challenge.host.sub.example.com") == {"sub"}
+
+        provider.defer_cleanup({"_acme-challenge.host-7.example.com": ["wildcard"]})
+        provider.defer_cleanup(ChangeSet.from_records({"_acme-challenge.example.org": ["org"]}))
+        assert await provider.get_txt("_acme-challenge.host-7.example.com") == {"apex", "wildcard"}
+        await provider.cleanup()
+        assert provider.stats.transactions == 5
+        assert await provider.get_txt("_acme-challenge.host-7.example.com") == {"apex"}
+        assert await provider.get_txt("_acme-challenge.example.org") == set()
+        with pytest.raises(ValueError):
+            provider.zone_of("example.net")
+    assert (tmp_path / "example.com.zone").read_text().startswith("; serial 2\n")
+
+
+class FlakyProvider(ZoneFileProvider):
+    failures = 1
+
+    async def apply_zone(self, zone, changes):
+        if changes.deletions and self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("backend unavailable")
+        await super().apply_zone(zone, changes)
+
+
+@pytest.mark.asyncio
+async def test_deferred_cleanup_retry(tmp_path):
+    async with FlakyProvider(tmp_path, zones=["example.com"], cleanup_delay=0.01) as provider:
+        await provider.apply(ChangeSet.from_records({"_acme-challenge.example.com": ["a"]}))
+        provider.defer_cleanup({"_acme-challenge.example.com": ["a"]})
+        await asyncio.sleep(0.1)
+        assert provider.stats.failed_cleanups == 1
+        assert provider.stats.deletions == 1
+        assert await provider.get_txt("_acme-challenge.example.com") == set()
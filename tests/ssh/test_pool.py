@@ -0,0 +1,43 @@
+import pytest
+import pytest_asyncio
+
+asyncssh = pytest.importorskip("asyncssh")
+
+from acme_isolator.ssh import Command, FileWrite, SshPool, SshTarget
+
+
+async def handle_process(process):
+    data = await process.stdin.read() if process.command.startswith("cat") else process.command
+    process.stdout.write(data)
+    process.exit(0)
+
+
+@pytest_asyncio.fixture
+async def ssh_server():
+    host_key = asyncssh.generate_private_key("ssh-ed25519")
+    client_key = asyncssh.generate_private_key("ssh-ed25519")
+    server = await asyncssh.create_server(asyncssh.SSHServer, "127.0.0.1", 0, server_host_keys=[host_key],
+                                          authorized_client_keys=asyncssh.import_authorized_keys(client_key.export_public_key().decode()),
+                                          process_factory=handle_process, sftp_factory=True)
+    port = server.sockets[0].getsockname()[1]
+    yield port, client_key
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_pool_multiplexes_jobs(ssh_server, tmp_path):
+    port, client_key = ssh_server
+    target = SshTarget("127.0.0.1", port=port)
+    async with SshPool(max_channels=4, client_keys=[client_key], known_hosts=None) as pool:
+        jobs = [Command(target=target, command=f"echo {i}") for i in range(20)]
+        jobs += [FileWrite(target=target, path=str(tmp_path / f"token-{i}"), data=f"value-{i}") for i in range(20)]
+        jobs.append(Command(target=target, command="cat", input="stdin"))
+        results = await pool.run_batch(jobs)
+        assert all(result.ok for result in results)
+        assert results[3].result.stdout == "echo 3"
+        assert results[-1].result.stdout == "stdin"
+        assert (tmp_path / "token-7").read_text() == "value-7"
+        assert pool.stats.handshakes == 1
+        assert pool.stats.channels == 21
+        assert pool.stats.file_writes == 20